@@ -0,0 +1,259 @@
+# analysis_cache.py
+# Pozisyon analizlerinin süreç içi önbelleği ve arka plan analizcisi.
+#
+# Motorun bir pozisyon için bulduğu en iyi devam (pv) ve skor, pozisyonun
+# Zobrist hash'i ile saklanır. Hamle analizi sırasında zaten yapılan aramalar
+# ve AI hamlesinden sonra arka planda oyuncunun pozisyonu için yapılan analiz
+# buraya yazılır; /hint çoğu zaman motoru hiç çağırmadan buradan cevap verir.
+#
+# Hamle analizinin multipv=3 "önceki pozisyon" araması da seviyeye göre
+# (variant) saklanır. warm_cache.py açılış ağacındaki pozisyonları önceden
+# analiz edip bir dosyaya yazar; sunucu açılışta bu dosyayı load_warm_file ile
+# önbelleğe yükler.
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+import chess
+import chess.engine
+import chess.polyglot
+
+from engine_pool import EnginePoolTimeout
+
+# --- CONFIGURATION ---
+ANALYSIS_CACHE_SIZE = int(os.environ.get("ANALYSIS_CACHE_SIZE", 50000))
+# Arka plan analiz kuyruğu dolarsa yeni istekler atılır
+BACKGROUND_QUEUE_SIZE = int(os.environ.get("BACKGROUND_ANALYSIS_QUEUE", 256))
+# Arka plan analizi boş motor için en fazla bu kadar bekler; havuz meşgulse atlanır (saniye)
+BACKGROUND_ACQUIRE_TIMEOUT = 0.05
+
+
+def position_key(board):
+    return chess.polyglot.zobrist_hash(board)
+
+
+def encode_score(score):
+    """PovScore -> hamle sırasındaki taraf açısından {"cp": ...} veya {"mate": ...}."""
+    relative = score.relative
+    return {"mate": relative.mate()} if relative.is_mate() else {"cp": relative.score()}
+
+
+def decode_score(score, turn):
+    """encode_score'un tersi: hamle sırasındaki taraf `turn` iken PovScore."""
+    if "mate" in score:
+        return chess.engine.PovScore(chess.engine.Mate(score["mate"]), turn)
+    return chess.engine.PovScore(chess.engine.Cp(score["cp"]), turn)
+
+
+def encode_lines(infos):
+    """Motorun multipv info listesi -> JSON'a yazılabilir satırlar."""
+    return [
+        {"pv": [move.uci() for move in info["pv"]], "score": encode_score(info["score"]), "depth": info.get("depth", 0)}
+        for info in infos if info.get("pv") and "score" in info
+    ]
+
+
+def decode_lines(board, lines):
+    """encode_lines'ın tersi: engine.analyse(multipv=...) sonucu biçiminde liste."""
+    return [
+        {"pv": [chess.Move.from_uci(uci) for uci in line["pv"]],
+         "score": decode_score(line["score"], board.turn),
+         "depth": line["depth"]}
+        for line in lines
+    ]
+
+
+class AnalysisCache:
+    """Pozisyon -> {pv, score, depth} LRU önbelleği (thread-safe)."""
+
+    def __init__(self, max_size=ANALYSIS_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, board):
+        key = position_key(board)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def __contains__(self, board):
+        # İstatistiklere sayılmaz
+        with self._lock:
+            return position_key(board) in self._entries
+
+    def put(self, board, info):
+        """Motorun info sözlüğünü saklar; aynı pozisyonun daha derin analizi korunur."""
+        pv = info.get("pv")
+        if not pv or "score" not in info:
+            return None
+        entry = {
+            "pv": [move.uci() for move in pv],
+            "score": encode_score(info["score"]),
+            "depth": info.get("depth", 0),
+        }
+        key = position_key(board)
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None and old["depth"] > entry["depth"]:
+                self._entries.move_to_end(key)
+                return old
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_lines(self, board, variant):
+        """Pozisyonun `variant` (ör. zorluk seviyesi) için saklanmış multipv analizi veya None."""
+        key = (position_key(board), variant)
+        with self._lock:
+            lines = self._entries.get(key)
+            if lines is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return decode_lines(board, lines)
+
+    def put_lines(self, board, variant, infos):
+        """engine.analyse(multipv=...) sonucunu `variant` için saklar."""
+        self.load_lines(board, variant, encode_lines(infos))
+
+    def load_lines(self, board, variant, lines):
+        if not lines:
+            return
+        key = (position_key(board), variant)
+        with self._lock:
+            self._entries[key] = lines
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+def load_warm_file(cache, path):
+    """warm_cache.py'nin yazdığı JSONL dosyasını önbelleğe yükler; yüklenen satır sayısını döndürür.
+
+    Her satır: {"fen": ..., "variant": ..., "lines": encode_lines(...)}. İlk
+    satırın pv'si /hint için de önbelleğe yazılır.
+    """
+    count = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                board = chess.Board(record["fen"])
+            except (ValueError, KeyError):
+                continue
+            cache.load_lines(board, record["variant"], record["lines"])
+            best = decode_lines(board, record["lines"][:1])
+            if best:
+                cache.put(board, best[0])
+            count += 1
+    return count
+
+
+_shared_cache = None
+_shared_warm = {}  # dosya yolu -> yüklenen satır sayısı
+
+
+def shared_analysis_cache():
+    """Süreç genelinde tek analiz önbelleği (app.py bunu kullanır)."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = AnalysisCache()
+    return _shared_cache
+
+
+def warm_shared_cache(path):
+    """Açılış analizlerini paylaşılan önbelleğe bir kez yükler; yüklenen satır sayısını döndürür.
+
+    serve.py bunu fork'tan önce çağırır; worker'lar dolu önbelleği devralır ve
+    aynı dosyayı yeniden okumaz. Dosya yoksa FileNotFoundError atılır.
+    """
+    if path not in _shared_warm:
+        _shared_warm[path] = load_warm_file(shared_analysis_cache(), path)
+    return _shared_warm[path]
+
+
+class BackgroundAnalyzer:
+    """Pozisyonları arka planda analiz edip önbelleğe yazar.
+
+    İstekleri bekletmemek için tek thread ve sınırlı kuyruk kullanır; havuzda
+    boş motor yoksa iş atlanır. submit_call ile motor gerektiren başka işler
+    (ör. hızlı yol doğrulaması) de aynı kuyruğa verilebilir.
+    """
+
+    def __init__(self, pool, cache, queue_size=BACKGROUND_QUEUE_SIZE):
+        self.pool = pool
+        self.cache = cache
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self.stats = {"submitted": 0, "dropped": 0, "skipped_busy": 0, "analysed": 0, "errors": 0}
+
+    def submit(self, engine_key, board, limit):
+        """Pozisyonu kuyruğa ekler; zaten önbellekteyse veya kuyruk doluysa eklemez."""
+        if board in self.cache:
+            return False
+        board = board.copy()
+        return self.submit_call(engine_key, lambda engine: self._analyse(engine, board, limit))
+
+    def submit_call(self, engine_key, fn):
+        """Motorla yapılacak başka bir arka plan işini kuyruğa ekler: fn(engine)."""
+        try:
+            self._queue.put_nowait((engine_key, fn))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["submitted"] += 1
+        return True
+
+    def _analyse(self, engine, board, limit):
+        # İpucu tam güçte olmalı; oyun seviyesi bir sonraki alımda yeniden ayarlanır
+        engine.configure({"UCI_LimitStrength": False})
+        self.cache.put(board, engine.analyse(board, limit))
+        self.stats["analysed"] += 1
+
+    def _run_job(self, engine_key, fn):
+        try:
+            with self.pool.acquire(engine_key, timeout=BACKGROUND_ACQUIRE_TIMEOUT) as engine:
+                fn(engine)
+        except EnginePoolTimeout:
+            self.stats["skipped_busy"] += 1
+
+    def _run(self):
+        while True:
+            engine_key, fn = self._queue.get()
+            try:
+                self._run_job(engine_key, fn)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Arka plan analizinde hata: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="background-analysis", daemon=True)
+            self._thread.start()
+
+    def snapshot(self):
+        return {"queued": self._queue.qsize(), **self.stats}
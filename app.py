@@ -1,11 +1,35 @@
 # app.py
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import chess
 import chess.engine
+import copy
+import hmac
 import os
 import random
 import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from analysis_cache import BackgroundAnalyzer, shared_analysis_cache, warm_shared_cache
+from calibrate import load_calibration, apply_calibration, recommended_pool_size
+from endgame_tables import shared_tables
+from engine_client import RemoteEnginePool
+from engine_pool import create_engine_pool
+from engine_router import RoutedEnginePool
+from eval_table import open_eval_table
+from game_settings import (ANALYSIS_WARM_PATH, BASE_AI_SETTINGS, DIFFICULTY_LEVELS, TUTOR_MODES,
+                           analysis_limit, play_limit, stockfish_path)
+from game_settings import configure_engine_difficulty as set_engine_strength
+from metrics import CONTENT_TYPE, REGISTRY, process_rss_bytes
+from profiler import ProfilerBusy, collapsed_output, sample_stacks
+from move_classification import THRESHOLDS, classify_delta, move_score_delta
+from session_store import create_session_store
+from static_exchange import ScreenStats, screen_move
+from tiered_analysis import TIER_SHALLOW_DEPTH, TierStats, deepen_reason
+from tracing import SERVER_TIMING, end_trace, log_trace, record_span, server_timing_header, span, start_trace
 
 # --- CONFIGURATION ---
 # PyInstaller ile paketlendiğinde doğru yolu bulmak için
@@ -14,12 +38,9 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 #STOCKFISH_PATH = resource_path("stockfish.exe")
-# Linux (Replit) için doğru binary
-STOCKFISH_PATH = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),
-    "stockfish_linux",
-    "stockfish-ubuntu-x86-64-avx2"
-)
+# İşlemcinin desteklediği en hızlı binary açılışta seçilir (bkz. engine_binary.py).
+# STOCKFISH_PATH ortam değişkeni verilirse o kullanılır.
+STOCKFISH_PATH = stockfish_path()
 
 
 # --- ENGINE & GAME STATE ---
@@ -27,43 +48,279 @@ app = Flask(__name__)
 # CORS, Flutter web veya debug modda backend'e erişim sorunlarını engeller.
 CORS(app)
 
-# Bu basit örnekte, sunucu çalıştığı süre tek bir oyun durumu bellekte tutulur.
-# Daha gelişmiş sistemlerde session veya veritabanı kullanılabilir.
-game_state = {}
+# Oyunlar oyun id'sine göre oturum deposunda tutulur (bkz. session_store.py).
+# Her istek oyunu depodan okur, motor çağrılarını kendi kopyası üzerinde yapar
+# ve sonucu sürüm kontrolüyle geri yazar. Böylece sunucu çok thread'li ve
+# (SESSION_STORE=sqlite:... ile) çok süreçli çalışabilir.
+session_store = create_session_store()
+# game_id göndermeyen (tek oyunlu) istemciler bu oyunu kullanır
+DEFAULT_GAME_ID = "default"
+MAX_GAME_ID_LENGTH = 64
 
 # --- HELPER CLASSES AND FUNCTIONS (Orijinal kodunuzdan adapte edildi) ---
-TUTOR_MODES = ["TAVSİYECİ", "KATI"]
-DIFFICULTY_LEVELS = ["Çok Kolay", "Kolay", "Orta", "Zor"]
-AI_SETTINGS = {
-    "Çok Kolay": {"time": 0.3, "depth": 5, "elo": 1320},
-    "Kolay":      {"time": 0.5, "depth": 8, "elo": 1400},
-    "Orta":       {"time": 0.8, "depth": 12, "elo": 1600},
-    "Zor":        {"time": 1.2, "depth": 18, "elo": 2200}
-}
-BLUNDER_THRESHOLD = -200
-MISTAKE_THRESHOLD = -90
-INACCURACY_THRESHOLD = -40
-
-def init_engine():
+# Seviye adları ve temel ayarları game_settings.py'dedir
+AI_SETTINGS = copy.deepcopy(BASE_AI_SETTINGS)
+# /hint: önbellekte analiz yoksa yapılacak küçük aramanın düğüm sınırı ve gösterilen devam uzunluğu
+HINT_NODES = int(os.environ.get("HINT_NODES", 50000))
+HINT_LINE_PLIES = 6
+# Motorsuz güvenli sayılan / sığ aramayla sınıflandırılan hamlelerin bu oranı
+# arka planda derin aramayla doğrulanır
+SHADOW_CHECK_RATE = float(os.environ.get("SHADOW_CHECK_RATE", 0.05))
+# /admin/* uç noktaları için gerekli token (X-Admin-Token başlığı); boşsa bu uç noktalar kapalıdır
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+# calibrate.py ile üretilen makineye özel ayarlar (varsa) açılışta uygulanır.
+CALIBRATION = load_calibration()
+apply_calibration(AI_SETTINGS, CALIBRATION)
+ENGINE_POOL_SIZE = recommended_pool_size(CALIBRATION)
+
+# Tüm oyunlar tek bir motor havuzunu paylaşır; motorlar ilk istekte başlatılır.
+# ENGINE_SERVER verilmişse (ör. unix:/tmp/chess-engine.sock) motorlar ayrı bir
+# engine_server.py sürecindedir ve birden fazla web worker aynı sıcak motorları
+# paylaşır. ENGINE_NODES (virgülle ayrılmış adresler) verilmişse oyunlar tutarlı
+# hash ile birden fazla motor sunucusuna dağıtılır. Hiçbiri yoksa havuz bu
+# süreçte, bellek/CPU sınırlarına göre kurulur.
+ENGINE_SERVER = os.environ.get("ENGINE_SERVER")
+ENGINE_NODES = [a for a in os.environ.get("ENGINE_NODES", "").split(",") if a]
+if ENGINE_NODES:
+    engine_pool = RoutedEnginePool(ENGINE_NODES)
+    engine_pool.start()
+elif ENGINE_SERVER:
+    engine_pool = RemoteEnginePool(ENGINE_SERVER)
+else:
+    engine_pool = create_engine_pool(STOCKFISH_PATH, ENGINE_POOL_SIZE)
+
+# Pozisyon analizleri önbelleği: hamle analizleri ve AI hamlesinden sonra
+# oyuncunun pozisyonu için arka planda yapılan analizler (/hint için).
+analysis_cache = shared_analysis_cache()
+background_analyzer = BackgroundAnalyzer(engine_pool, analysis_cache)
+background_analyzer.start()
+screen_stats = ScreenStats()
+tier_stats = TierStats()
+# KQK, KRK ve KPK sonlarında AI hamlesi, hamle analizi ve ipucu motor
+# çağrılmadan tablodan gelir. Tablo dosyası yoksa arka planda üretilir;
+# hazır olana kadar bu sonlar da motorla oynanır. serve.py altında tablolar
+# fork'tan önce ana süreçte yüklenmiştir; ensure() bu durumda hiçbir şey yapmaz.
+endgame_tablebase = shared_tables()
+endgame_tablebase.ensure()
+
+# Önceden hesaplanmış değerlendirmeler (eval_table.py); dosya mmap'lenir ve
+# aynı makinedeki tüm worker'lar sayfa önbelleğindeki tek kopyayı paylaşır
+eval_table = open_eval_table()
+
+# Önceden ısıtılmış açılış analizleri arka planda yüklenir; /ready yüklenene kadar 503 döner.
+# serve.py altında fork'tan önce yüklenmiştir ve burada yeniden okunmaz.
+analysis_warm = threading.Event()
+warm_stats = {"path": ANALYSIS_WARM_PATH, "loaded": 0}
+
+def load_analysis_warm():
     try:
-        engine = chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH)
-        return engine
+        warm_stats["loaded"] = warm_shared_cache(ANALYSIS_WARM_PATH)
+        print(f"Açılış analizleri önbelleğe yüklendi: {warm_stats['loaded']}")
+    except FileNotFoundError:
+        pass
     except Exception as e:
-        print(f"HATA: Stockfish motoru başlatılamadı: {e}")
-        return None
+        print(f"Açılış analizleri yüklenemedi: {e}")
+    finally:
+        analysis_warm.set()
+
+threading.Thread(target=load_analysis_warm, name="analysis-warm", daemon=True).start()
+
+# --- METRİKLER (bkz. metrics.py, /metrics) ---
+REQUEST_SECONDS = REGISTRY.histogram(
+    "chess_http_request_duration_seconds", "Route başına istek süresi", ("route", "method", "status"))
+ENGINE_CALL_SECONDS = REGISTRY.histogram(
+    "chess_engine_call_duration_seconds", "Motor çağrısı süresi", ("call",))
+ENGINE_WAIT_SECONDS = REGISTRY.histogram(
+    "chess_engine_acquire_wait_seconds", "Havuzdan motor almak için bekleme süresi")
+ENGINE_WAITING = REGISTRY.gauge(
+    "chess_engine_acquire_waiting", "Şu anda motor bekleyen istek sayısı")
+
+@contextmanager
+def engine_call(name):
+    """Motor çağrısının süresi: metrik histogramına ve isteğin Server-Timing izine yazılır."""
+    with ENGINE_CALL_SECONDS.time(call=name), span(name):
+        yield
+
+@contextmanager
+def acquire_engine(engine_key):
+    """engine_pool.acquire; bekleme süresi ve kuyruk derinliği metriklere yazılır."""
+    ENGINE_WAITING.inc()
+    started = time.perf_counter()
+    waiting = True
+    try:
+        with engine_pool.acquire(engine_key) as engine:
+            ENGINE_WAITING.dec()
+            waiting = False
+            ENGINE_WAIT_SECONDS.observe(time.perf_counter() - started)
+            record_span("engine_wait", started)
+            yield engine
+    finally:
+        if waiting:
+            ENGINE_WAITING.dec()
+
+@contextmanager
+def game_engine(game):
+    """Oyun için havuzdan motor alır ve zorluğa göre ayarlar."""
+    with acquire_engine(game['engine_key']) as engine:
+        configure_engine_difficulty(engine, game['difficulty_index'])
+        yield engine
 
 def configure_engine_difficulty(engine, difficulty_index):
-    if engine is None:
-        return
-    level_name = DIFFICULTY_LEVELS[difficulty_index]
-    settings = AI_SETTINGS[level_name]
-    elo = settings.get("elo")
-    if elo:
-        engine.configure({"UCI_LimitStrength": True, "UCI_Elo": elo})
+    set_engine_strength(engine, AI_SETTINGS[DIFFICULTY_LEVELS[difficulty_index]])
+
+def schedule_tier_shadow_check(temp_board, board, analysis_before, shallow_info, settings, difficulty_index, engine_key):
+    """Sığ aramayla sınıflandırılan hamleyi arka planda derin aramayla da sınıflandırıp karşılaştırır."""
+    temp_board = temp_board.copy()
+    shallow_bucket = classify_delta(move_score_delta(board, analysis_before, shallow_info))
+
+    def verify(engine):
+        configure_engine_difficulty(engine, difficulty_index)
+        with engine_call("shadow_check"):
+            deep_info = engine.analyse(temp_board, analysis_limit(settings))
+        analysis_cache.put(temp_board, deep_info)
+        deep_bucket = classify_delta(move_score_delta(board, analysis_before, deep_info))
+        tier_stats.record_shadow(shallow_bucket, deep_bucket, shallow_info.get("nodes"), deep_info.get("nodes"))
+
+    background_analyzer.submit_call(engine_key, verify)
+
+def classify_by_search(board, engine, move, settings, analysis_before, engine_key=None, difficulty_index=None,
+                       tiered=True):
+    """Hamleden sonraki pozisyonu arayıp hamleyi sınıflandırır.
+
+    Önce sığ arama yapılır; skor farkı bir eşiğe yakın değilse ve pozisyon
+    taktik değilse sınıflandırma için o yeterlidir (bkz. tiered_analysis.py).
+    tiered=False: doğrudan derin arama yapılır ve tier_stats'a yazılmaz
+    (arka plan doğrulamaları için). engine_key verilirse sığ sonuçların bir
+    kısmı difficulty_index seviyesinde arka planda derin aramayla doğrulanır.
+    """
+    depth = settings["depth"]
+    top_moves_before = [info['pv'][0] for info in analysis_before if 'pv' in info and info['pv']]
+    temp_board = board.copy()
+    temp_board.push(move)
+    
+    analysis_after = None
+    reason = None
+    if tiered and TIER_SHALLOW_DEPTH < depth:
+        with engine_call("analysis_after"):
+            shallow = engine.analyse(temp_board, chess.engine.Limit(depth=TIER_SHALLOW_DEPTH))
+        reason = deepen_reason(temp_board, move_score_delta(board, analysis_before, shallow), shallow, THRESHOLDS)
+        if reason is None:
+            analysis_after = shallow
+            tier_stats.record("shallow", shallow.get("nodes"))
+            if engine_key is not None and random.random() < SHADOW_CHECK_RATE:
+                schedule_tier_shadow_check(temp_board, board, analysis_before, shallow, settings,
+                                           difficulty_index, engine_key)
+    if analysis_after is None:
+        with engine_call("analysis_after"):
+            analysis_after = engine.analyse(temp_board, analysis_limit(settings))
+        if tiered:
+            tier_stats.record("deep", analysis_after.get("nodes"), reason)
+    analysis_cache.put(temp_board, analysis_after)
+    
+    score_delta = move_score_delta(board, analysis_before, analysis_after)
+    
+    # Rakibin tehdidi, sonraki pozisyonun aramasındaki ilk hamledir; ayrı arama gerekmez
+    if analysis_after.get("pv"):
+        threat = analysis_after["pv"][0]
+    else:
+        with engine_call("threat_play"):
+            threat = engine.play(temp_board, chess.engine.Limit(time=0.4, depth=max(6, depth//2))).move
+    best_alternative = top_moves_before[0] if top_moves_before else None
+
+    quality = classify_delta(score_delta)
+    
+    comments = {
+        'inaccuracy': "Fena değil, ama daha iyisi olabilirdi.",
+        'mistake': "Dikkat! Bu hamle rakibe bir fırsat veriyor.",
+        'blunder': "Eyvah! Bu çok tehlikeli bir hamle!"
+    }
+    
+    return {
+        'quality': quality,
+        'text': comments.get(quality, "Mantıklı bir hamle."),
+        'color': f'{quality.upper()}_COLOR',
+        'best_alternative': best_alternative.uci() if best_alternative else None,
+        'threat': threat.uci() if threat else None
+    }
+
+def schedule_shadow_check(board, move, difficulty_index, analysis_before, engine_key):
+    """Hızlı yolla kabul edilen hamleyi arka planda motorla da sınıflandırıp karşılaştırır."""
+    board = board.copy()
+    settings = AI_SETTINGS[DIFFICULTY_LEVELS[difficulty_index]]
+
+    def verify(engine):
+        configure_engine_difficulty(engine, difficulty_index)
+        # Hızlı yolun doğrulaması derin aramayla yapılır; kademeli arama istatistiklerine karışmaz
+        feedback = classify_by_search(board, engine, move, settings, analysis_before, tiered=False)
+        screen_stats.record_shadow(board.fen(), move.uci(), "good", feedback['quality'])
+
+    background_analyzer.submit_call(engine_key, verify)
+
+def classify_by_tablebase(board, move):
+    """Oyun sonu tablosu uygulanıyorsa hamleyi motorsuz sınıflandırır, yoksa None.
+
+    Kazancı beraberliğe (veya beraberliği kayba) çeviren hamle blunder'dır;
+    kazanç korunup mat belirgin şekilde uzuyorsa inaccuracy sayılır.
+    """
+    if not endgame_tablebase.applies(board):
+        return None
+    ranked = endgame_tablebase.rank_moves(board)
+    if not ranked:
+        return None
+    best_move, best_outcome, best_distance = ranked[0]
+    _, outcome, distance = next(item for item in ranked if item[0] == move)
+
+    if outcome < best_outcome:
+        quality = "blunder"
+    elif outcome == 0 or distance == best_distance:
+        quality = "excellent"
+    elif outcome > 0 and distance > best_distance + 4:
+        quality = "inaccuracy"
     else:
-        engine.configure({"UCI_LimitStrength": False})
+        quality = "good"
 
-def analyze_player_move(board, engine, move, difficulty_index):
+    comments = {
+        'excellent': "Mükemmel hamle! En kısa yol bu.",
+        'good': "İyi hamle, doğru yoldasın.",
+        'inaccuracy': "Kazanç hâlâ elinde, ama daha hızlı bir yol vardı.",
+        'blunder': "Eyvah! Bu hamle kazanılmış oyunu kaçırıyor!" if best_outcome > 0
+                   else "Eyvah! Bu hamle kaybettiriyor!"
+    }
+    if outcome == 0:
+        comments['excellent'] = "Doğru hamle, beraberliği koruyorsun."
+    elif outcome < 0:
+        comments['excellent'] = "En uzun direnişi seçtin."
+        comments['good'] = "Direnmeye devam!"
+
+    # Rakibin en iyi cevabı, kötü hamlenin neden kötü olduğunu gösterir
+    threat = None
+    if quality == "blunder":
+        temp_board = board.copy(stack=False)
+        temp_board.push(move)
+        threat = endgame_tablebase.best_move(temp_board)
+    return {
+        'quality': quality,
+        'text': comments[quality],
+        'color': 'EXCELLENT_MOVE_COLOR' if quality == 'excellent' else
+                 'GOOD_MOVE_COLOR' if quality == 'good' else f'{quality.upper()}_COLOR',
+        'best_alternative': best_move.uci() if quality != 'excellent' else None,
+        'threat': threat.uci() if threat else None
+    }
+
+def top_move_feedback(quality):
+    return {
+        'quality': quality,
+        'text': random.choice(["Mükemmel hamle!", "Harika bir görüş!"]),
+        'color': 'EXCELLENT_MOVE_COLOR' if quality == 'excellent' else 'GOOD_MOVE_COLOR',
+        'best_alternative': None,
+        'threat': None
+    }
+
+def analyze_player_move(board, engine, move, difficulty_index, engine_key=None):
+    with span("tablebase"):
+        feedback = classify_by_tablebase(board, move)
+    if feedback is not None:
+        return feedback
     if engine is None:
         return {
             'quality': 'good',
@@ -73,57 +330,50 @@ def analyze_player_move(board, engine, move, difficulty_index):
             'threat': None
         }
     
-    depth = AI_SETTINGS[DIFFICULTY_LEVELS[difficulty_index]]["depth"]
+    settings = AI_SETTINGS[DIFFICULTY_LEVELS[difficulty_index]]
     feedback = {}
     
     try:
-        analysis_before = engine.analyse(board, chess.engine.Limit(depth=depth), multipv=3)
+        # Açılış ağacındaki pozisyonlar warm_cache.py ile önceden analiz edilmiş olabilir
+        level_name = DIFFICULTY_LEVELS[difficulty_index]
+        analysis_before = analysis_cache.get_lines(board, level_name)
+        if analysis_before is None and eval_table is not None:
+            # Paylaşılan tablodaki en iyi hamle yeterli derinlikte oynandıysa arama gerekmez
+            known = eval_table.lookup(board)
+            if known is not None and known['move'] == move and known['depth'] >= settings['depth']:
+                return top_move_feedback("excellent")
+        if analysis_before is None:
+            with engine_call("analysis_before"):
+                analysis_before = engine.analyse(board, analysis_limit(settings), multipv=3)
+            if analysis_before:
+                analysis_cache.put(board, analysis_before[0])
+                analysis_cache.put_lines(board, level_name, analysis_before)
         top_moves_before = [info['pv'][0] for info in analysis_before if 'pv' in info and info['pv']]
 
         is_top_move = move in top_moves_before
         
         # En iyi hamlelerden biriyse, direkt kabul et
         if is_top_move:
-            quality = "excellent" if move == top_moves_before[0] else "good"
-            feedback = {
-                'quality': quality,
-                'text': random.choice(["Mükemmel hamle!", "Harika bir görüş!"]),
-                'color': 'EXCELLENT_MOVE_COLOR' if quality == 'excellent' else 'GOOD_MOVE_COLOR',
-                'best_alternative': None,
+            return top_move_feedback("excellent" if move == top_moves_before[0] else "good")
+
+        # Sakin pozisyonlarda açıkça güvenli hamleler için (kaybettiren takas,
+        # asılı taş, kaçırılan taş kazancı, mat tehdidi yok) sonraki pozisyon ve
+        # tehdit aranmaz.
+        with span("screen"):
+            safe, reason = screen_move(board, move, analysis_before)
+        screen_stats.record_screen(safe, reason)
+        if safe:
+            if engine_key is not None and random.random() < SHADOW_CHECK_RATE:
+                schedule_shadow_check(board, move, difficulty_index, analysis_before, engine_key)
+            return {
+                'quality': 'good',
+                'text': "Mantıklı bir hamle.",
+                'color': 'GOOD_MOVE_COLOR',
+                'best_alternative': top_moves_before[0].uci() if top_moves_before else None,
                 'threat': None
             }
-            return feedback
-
-        temp_board = board.copy()
-        temp_board.push(move)
-        analysis_after = engine.analyse(temp_board, chess.engine.Limit(depth=depth))
-        
-        score_before = analysis_before[0]["score"].relative.score(mate_score=10000)
-        score_after = analysis_after["score"].white().score(mate_score=10000)
-        score_delta = score_after - score_before if board.turn == chess.WHITE else score_before - score_after
-        
-        threat = engine.play(temp_board, chess.engine.Limit(time=0.4, depth=max(6, depth//2))).move
-        best_alternative = top_moves_before[0] if top_moves_before else None
 
-        if score_delta <= BLUNDER_THRESHOLD: quality = "blunder"
-        elif score_delta <= MISTAKE_THRESHOLD: quality = "mistake"
-        elif score_delta <= INACCURACY_THRESHOLD: quality = "inaccuracy"
-        else: quality = "good" # Technically not a top move but not bad either
-        
-        comments = {
-            'inaccuracy': "Fena değil, ama daha iyisi olabilirdi.",
-            'mistake': "Dikkat! Bu hamle rakibe bir fırsat veriyor.",
-            'blunder': "Eyvah! Bu çok tehlikeli bir hamle!"
-        }
-        
-        feedback = {
-            'quality': quality,
-            'text': comments.get(quality, "Mantıklı bir hamle."),
-            'color': f'{quality.upper()}_COLOR',
-            'best_alternative': best_alternative.uci() if best_alternative else None,
-            'threat': threat.uci() if threat else None
-        }
-        return feedback
+        return classify_by_search(board, engine, move, settings, analysis_before, engine_key, difficulty_index)
         
     except Exception as e:
         print(f"Analiz sırasında hata: {e}")
@@ -137,18 +387,59 @@ def analyze_player_move(board, engine, move, difficulty_index):
 
 
 # --- API ENDPOINTS ---
+def request_game_id():
+    """İstekteki oyun id'si; verilmemişse tek oyunlu eski istemciler için varsayılan oyun."""
+    data = request.get_json(silent=True) or {}
+    game_id = data.get('game_id') or request.args.get('game_id') or DEFAULT_GAME_ID
+    return str(game_id)[:MAX_GAME_ID_LENGTH]
+
+def load_game(game_id):
+    """Oyunu depodan okur; tahta başlangıç FEN'i ve hamle listesinden kurulur."""
+    with span("load_game"):
+        loaded = session_store.load(game_id)
+        if loaded is None:
+            return None
+        record, version = loaded
+        board = chess.Board(record.pop('start_fen'))
+        for uci in record.pop('moves'):
+            board.push_uci(uci)
+        record.update(game_id=game_id, board=board, version=version)
+        return record
+
+def game_record(game):
+    """Oyunu depoya yazılacak (JSON'a çevrilebilir) kayda çevirir."""
+    record = {key: value for key, value in game.items() if key not in ('game_id', 'board', 'version')}
+    record['start_fen'] = game['board'].root().fen()
+    record['moves'] = [move.uci() for move in game['board'].move_stack]
+    return record
+
+def commit_game(game, updates):
+    """İstek sırasında hesaplanan sonucu depoya yazar.
+
+    Oyun okunduktan sonra değiştiyse (başka bir istek hamle yaptı, oyun
+    sıfırlandı) hiçbir şey yazmaz ve None döndürür; aksi halde yeni oyun
+    durumunu döndürür.
+    """
+    game.update(updates)
+    with span("commit"):
+        version = session_store.save(game['game_id'], game_record(game), game['version'])
+    if version is None:
+        return None
+    game['version'] = version
+    return get_game_state_json(game)
+
+def conflict_response():
+    return jsonify({"error": "Oyun bu sırada değişti, lütfen tekrar dene."}), 409
+
 @app.route('/new_game', methods=['POST'])
 def new_game():
     """Yeni bir oyun başlatır veya mevcut oyunu sıfırlar."""
-    global game_state
-    
-    engine = game_state.get('engine')
-    if not engine:
-        engine = init_engine()
-            
-    game_state = {
+    game_id = request_game_id()
+    game = {
+        "game_id": game_id,
+        # Her yeni oyunda motor tarafında ucinewgame gönderilsin diye ayrı anahtar
+        "engine_key": uuid.uuid4().hex,
         "board": chess.Board(),
-        "engine": engine,
         "tutor_mode_index": 0,
         "difficulty_index": 0,
         "feedback_text": "Merhaba! Satranç Akademisi'ne hoş geldin. İlk hamleni yap.",
@@ -156,47 +447,49 @@ def new_game():
         "last_move": None,
         "best_alternative_move": None,
         "threat_move": None,
-        "pending_move": None  # Onay bekleyen hamle
+        "pending_move": None,  # Onay bekleyen hamle
+        "history": []  # Oyuncu hamlelerinin analizleri ve AI cevapları (geri alma için)
     }
-    if engine:
-        configure_engine_difficulty(game_state['engine'], game_state['difficulty_index'])
+    game['version'] = session_store.create(game_id, game_record(game))
     
+    schedule_hint_analysis(game)
     print("New game started successfully")
-    return jsonify(get_game_state_json())
+    return jsonify(get_game_state_json(game))
 
 @app.route('/game_state', methods=['GET'])
 def get_game_state():
     """Mevcut oyun durumunu döndürür."""
-    if 'board' not in game_state:
+    game = load_game(request_game_id())
+    if game is None:
         return jsonify({"error": "Oyun başlatılmadı."}), 404
-    return jsonify(get_game_state_json())
+    return jsonify(get_game_state_json(game))
     
 @app.route('/make_move', methods=['POST'])
 def make_move():
     """Oyuncunun hamlesini işler."""
-    if 'board' not in game_state:
+    game = load_game(request_game_id())
+    if game is None:
         return jsonify({"error": "Oyun başlatılmadı."}), 404
         
-    move_uci = request.json.get('move')
+    move_uci = (request.get_json(silent=True) or {}).get('move')
     if not move_uci:
         return jsonify({"error": "Hamle bilgisi eksik."}), 400
 
     print(f"Received move: {move_uci}")
         
-    board = game_state['board']
-    engine = game_state['engine']
+    board = game['board']
     
     # Onaylanmış hamle kontrolü
     if move_uci.endswith('_confirmed'):
         actual_move_uci = move_uci.replace('_confirmed', '')
         print(f"Processing confirmed move: {actual_move_uci}")
         
-        if game_state.get('pending_move') == actual_move_uci:
+        if game.get('pending_move') == actual_move_uci:
             # Onaylanmış hamleni yap - analiz yapmadan direkt oyna
             try:
                 move = chess.Move.from_uci(actual_move_uci)
                 if move in board.legal_moves:
-                    return execute_move(move)
+                    return execute_move(game, move)
                 else:
                     return jsonify({"error": "Onaylanacak hamle artık yasal değil."}), 400
             except:
@@ -215,132 +508,350 @@ def make_move():
     
     print(f"Move is legal: {move_uci}")
     
+    # Geri almadan sonra aynı hamle tekrar oynandıysa analiz geçmişten gelir, motor gerekmez
+    cached = history_entry(game, len(board.move_stack), move_uci)
+    if cached is not None:
+        print(f"Analysis served from history: {move_uci}")
+        return analyze_and_play(game, None, move, move_uci, cached)
+
+    # Oyun sonu tablosundaki sonlarda analiz ve AI cevabı motorsuz
+    if endgame_tablebase.applies(board):
+        return analyze_and_play(game, None, move, move_uci)
+
     # Hamle analizini yap (sadece engine varsa)
-    if engine:
-        analysis = analyze_player_move(board, engine, move, game_state['difficulty_index'])
-        is_bad_move = analysis['quality'] in ['blunder', 'mistake']
-        tutor_mode = TUTOR_MODES[game_state['tutor_mode_index']]
-        
-        print(f"Move analysis - Quality: {analysis['quality']}, Is bad: {is_bad_move}, Mode: {tutor_mode}")
-        
-        # KATI modda kötü hamleye izin verme
-        if is_bad_move and tutor_mode == "KATI":
-            game_state.update({
-                "feedback_text": analysis['text'] + " Bu hamleye izin verilmedi. Başka bir hamle dene.",
-                "feedback_color": analysis['color'],
-                "best_alternative_move": analysis['best_alternative'],
-                "threat_move": None,
-                "pending_move": None
-            })
-            return jsonify({"status": "rejected", "analysis": analysis, "game_state": get_game_state_json()})
-        
-        # TAVSİYECİ modda kötü hamle için onaya gönder
-        elif is_bad_move and tutor_mode == "TAVSİYECİ":
-            game_state.update({
-                "feedback_text": analysis['text'] + " Yine de oynamak istediğine emin misin?",
-                "feedback_color": analysis['color'],
-                "best_alternative_move": analysis['best_alternative'],
-                "threat_move": analysis['threat'],
-                "pending_move": move_uci
-            })
-            return jsonify({"status": "confirmation_required", "analysis": analysis, "game_state": get_game_state_json()})
-        
-        # İyi hamle - direkt kabul et ve feedback ver
-        else:
-            print(f"Good move accepted in {tutor_mode} mode")
-            # Hamleyi yap ve feedback'i ayarla
-            board.push(move)
-            game_state['last_move'] = move.uci()
-            game_state['best_alternative_move'] = None
-            game_state['threat_move'] = None
-            game_state['pending_move'] = None
-            game_state['feedback_text'] = analysis['text']
-            game_state['feedback_color'] = analysis['color']
-            
-            # AI hamlesini yap
-            if not board.is_game_over():
-                try:
-                    settings = AI_SETTINGS[DIFFICULTY_LEVELS[game_state['difficulty_index']]]
-                    result = engine.play(board, chess.engine.Limit(time=settings["time"], depth=settings["depth"]))
-                    board.push(result.move)
-                    game_state['last_move'] = result.move.uci()
-                    game_state['feedback_text'] = analysis['text'] + " Sıra sende!"
-                    print(f"AI played: {result.move.uci()}")
-                except Exception as e:
-                    print(f"AI move error: {e}")
-            
-            return jsonify({"status": "accepted", "game_state": get_game_state_json()})
+    if engine_pool.available:
+        with game_engine(game) as engine:
+            return analyze_and_play(game, engine, move, move_uci)
     
     # Normal hamle - doğrudan yap
-    return execute_move(move)
+    return execute_move(game, move)
+
+def history_entry(game, ply, move_uci):
+    """Bu ply'da aynı hamlenin aynı zorlukta yapılmış analizi (varsa)."""
+    for entry in game['history']:
+        if entry['ply'] == ply and entry['move'] == move_uci and entry['difficulty_index'] == game['difficulty_index']:
+            return entry
+    return None
+
+def record_history(game, ply, move_uci, analysis):
+    """Hamlenin analizini geçmişe yazar; bu ply'da farklı bir hamle oynandıysa sonraki kayıtlar silinir."""
+    entry = history_entry(game, ply, move_uci)
+    if entry is None:
+        game['history'] = [e for e in game['history'] if e['ply'] < ply]
+        entry = {
+            "ply": ply,
+            "move": move_uci,
+            "difficulty_index": game['difficulty_index'],
+            "analysis": analysis,
+            "reply": None,
+            "feedback_text": None,
+            "feedback_color": None
+        }
+        game['history'].append(entry)
+    return entry
+
+def play_ai_move(game, board, entry=None, engine=None):
+    """AI hamlesini oynar ve döndürür.
+
+    Oyuncunun bu hamlesine daha önce (geri almadan önce) cevap verildiyse aynı
+    cevap motor çağrılmadan geçmişten oynanır.
+    """
+    if entry is not None and entry['reply']:
+        reply = chess.Move.from_uci(entry['reply'])
+        if reply in board.legal_moves:
+            board.push(reply)
+            return reply
+
+    settings = AI_SETTINGS[DIFFICULTY_LEVELS[game['difficulty_index']]]
+    # Oyun sonu tablosundaki sonlarda motor çağrılmaz
+    reply = endgame_tablebase.best_move(board)
+    if reply is None and engine is None:
+        with game_engine(game) as engine, engine_call("ai_play"):
+            reply = engine.play(board, play_limit(settings)).move
+    elif reply is None:
+        with engine_call("ai_play"):
+            reply = engine.play(board, play_limit(settings)).move
+    board.push(reply)
+
+    if entry is not None:
+        # Yeni cevaptan sonraki kayıtlar artık bu oyunun devamı değil
+        game['history'] = [e for e in game['history'] if e['ply'] <= entry['ply']]
+        entry['reply'] = reply.uci()
+    return reply
+
+def schedule_hint_analysis(game):
+    """Oyuncunun sıradaki pozisyonunu arka planda analiz ettirir (/hint için)."""
+    board = game['board']
+    if board.is_game_over() or not engine_pool.available or endgame_tablebase.applies(board):
+        return
+    settings = AI_SETTINGS[DIFFICULTY_LEVELS[game['difficulty_index']]]
+    background_analyzer.submit(game['engine_key'], board, analysis_limit(settings))
 
-def execute_move(move):
+def analyze_and_play(game, engine, move, move_uci, cached=None):
+    """Oyuncu hamlesini analiz eder; kabul edilirse AI cevabını da oynar."""
+    board = game['board']
+    ply = len(board.move_stack)
+    if cached is not None:
+        analysis = cached['analysis']
+    else:
+        analysis = analyze_player_move(board, engine, move, game['difficulty_index'], game['engine_key'])
+    entry = record_history(game, ply, move_uci, analysis)
+    is_bad_move = analysis['quality'] in ['blunder', 'mistake']
+    tutor_mode = TUTOR_MODES[game['tutor_mode_index']]
+    
+    print(f"Move analysis - Quality: {analysis['quality']}, Is bad: {is_bad_move}, Mode: {tutor_mode}")
+    
+    # KATI modda kötü hamleye izin verme
+    if is_bad_move and tutor_mode == "KATI":
+        state = commit_game(game, {
+            "feedback_text": analysis['text'] + " Bu hamleye izin verilmedi. Başka bir hamle dene.",
+            "feedback_color": analysis['color'],
+            "best_alternative_move": analysis['best_alternative'],
+            "threat_move": None,
+            "pending_move": None
+        })
+        if state is None:
+            return conflict_response()
+        return jsonify({"status": "rejected", "analysis": analysis, "game_state": state})
+    
+    # TAVSİYECİ modda kötü hamle için onaya gönder
+    elif is_bad_move and tutor_mode == "TAVSİYECİ":
+        state = commit_game(game, {
+            "feedback_text": analysis['text'] + " Yine de oynamak istediğine emin misin?",
+            "feedback_color": analysis['color'],
+            "best_alternative_move": analysis['best_alternative'],
+            "threat_move": analysis['threat'],
+            "pending_move": move_uci
+        })
+        if state is None:
+            return conflict_response()
+        return jsonify({"status": "confirmation_required", "analysis": analysis, "game_state": state})
+    
+    # İyi hamle - direkt kabul et ve feedback ver
+    else:
+        print(f"Good move accepted in {tutor_mode} mode")
+        # Hamleyi yap ve feedback'i ayarla
+        board.push(move)
+        updates = {
+            'last_move': move.uci(),
+            'best_alternative_move': None,
+            'threat_move': None,
+            'pending_move': None,
+            'feedback_text': analysis['text'],
+            'feedback_color': analysis['color']
+        }
+        
+        # AI hamlesini yap
+        if not board.is_game_over():
+            try:
+                reply = play_ai_move(game, board, entry, engine)
+                updates['last_move'] = reply.uci()
+                updates['feedback_text'] = analysis['text'] + " Sıra sende!"
+                print(f"AI played: {reply.uci()}")
+            except Exception as e:
+                print(f"AI move error: {e}")
+        entry['feedback_text'] = updates['feedback_text']
+        entry['feedback_color'] = updates['feedback_color']
+        
+        state = commit_game(game, updates)
+        if state is None:
+            return conflict_response()
+        schedule_hint_analysis(game)
+        return jsonify({"status": "accepted", "game_state": state})
+
+def execute_move(game, move):
     """Hamleyi gerçekten oynar ve AI hamlesi yapar"""
-    board = game_state['board']
-    engine = game_state['engine']
+    board = game['board']
     
     print(f"Executing move: {move.uci()}")
+    # Onay öncesi yapılan analizin kaydı (motor yoksa bulunmaz)
+    entry = history_entry(game, len(board.move_stack), move.uci())
     
     # Oyuncu hamlesini yap
     board.push(move)
-    game_state['last_move'] = move.uci()
-    game_state['best_alternative_move'] = None
-    game_state['threat_move'] = None
-    game_state['pending_move'] = None
+    updates = {
+        'last_move': move.uci(),
+        'best_alternative_move': None,
+        'threat_move': None,
+        'pending_move': None
+    }
     
     # Onaylanmış kötü hamle için uyarı mesajı
-    is_confirmed_bad_move = game_state.get('feedback_color') in ['BLUNDER_COLOR', 'MISTAKE_COLOR']
+    is_confirmed_bad_move = game['feedback_color'] in ['BLUNDER_COLOR', 'MISTAKE_COLOR']
     
     # Yapay zeka hamlesini yap
-    if not board.is_game_over() and engine:
+    if not board.is_game_over() and (engine_pool.available or endgame_tablebase.applies(board)
+                                     or (entry is not None and entry['reply'])):
         try:
-            settings = AI_SETTINGS[DIFFICULTY_LEVELS[game_state['difficulty_index']]]
-            result = engine.play(board, chess.engine.Limit(time=settings["time"], depth=settings["depth"]))
-            board.push(result.move)
-            game_state['last_move'] = result.move.uci()
+            reply = play_ai_move(game, board, entry)
+            updates['last_move'] = reply.uci()
             
             if is_confirmed_bad_move:
-                game_state['feedback_text'] = "Kötü hamleyi onayladın! Daha dikkatli ol. Sıra sende."
-                game_state['feedback_color'] = "MISTAKE_COLOR"
+                updates['feedback_text'] = "Kötü hamleyi onayladın! Daha dikkatli ol. Sıra sende."
+                updates['feedback_color'] = "MISTAKE_COLOR"
             else:
-                game_state['feedback_text'] = "Sıra sende. En iyi hamleni düşün!"
-                game_state['feedback_color'] = "COLOR_INFO_TEXT"
+                updates['feedback_text'] = "Sıra sende. En iyi hamleni düşün!"
+                updates['feedback_color'] = "COLOR_INFO_TEXT"
                 
-            print(f"AI played: {result.move.uci()}")
+            print(f"AI played: {reply.uci()}")
         except Exception as e:
             print(f"AI move error: {e}")
-            game_state['feedback_text'] = "Sıra sende!"
-            game_state['feedback_color'] = "COLOR_INFO_TEXT"
+            updates['feedback_text'] = "Sıra sende!"
+            updates['feedback_color'] = "COLOR_INFO_TEXT"
     elif not board.is_game_over():
-        game_state['feedback_text'] = "Sıra sende! (AI engine bulunamadı)"
-        game_state['feedback_color'] = "COLOR_INFO_TEXT"
+        updates['feedback_text'] = "Sıra sende! (AI engine bulunamadı)"
+        updates['feedback_color'] = "COLOR_INFO_TEXT"
+    
+    if entry is not None:
+        entry['feedback_text'] = updates.get('feedback_text', game['feedback_text'])
+        entry['feedback_color'] = updates.get('feedback_color', game['feedback_color'])
     
-    print(f"Move executed successfully. Game over: {board.is_game_over()}")
-    return jsonify({"status": "accepted", "game_state": get_game_state_json()})
+    state = commit_game(game, updates)
+    if state is None:
+        return conflict_response()
+    schedule_hint_analysis(game)
+    print(f"Move executed successfully. Game over: {state['is_game_over']}")
+    return jsonify({"status": "accepted", "game_state": state})
 
 @app.route('/change_settings', methods=['POST'])
 def change_settings():
     """Oyun ayarlarını (zorluk, mod) değiştirir."""
-    if 'board' not in game_state:
+    game = load_game(request_game_id())
+    if game is None:
         return jsonify({"error": "Oyun başlatılmadı."}), 404
     
     new_diff = request.json.get('difficulty_index')
     new_mode = request.json.get('tutor_mode_index')
     
+    updates = {}
     if new_diff is not None:
-        game_state['difficulty_index'] = new_diff
-        if game_state.get('engine'):
-            configure_engine_difficulty(game_state['engine'], new_diff)
+        # Motor, oyun için her alındığında bu zorluğa göre ayarlanır.
+        updates['difficulty_index'] = new_diff
         
     if new_mode is not None:
-        game_state['tutor_mode_index'] = new_mode
+        updates['tutor_mode_index'] = new_mode
+    state = commit_game(game, updates)
+    if state is None:
+        return conflict_response()
     
     print(f"Settings changed - Difficulty: {new_diff}, Mode: {new_mode}")
-    return jsonify(get_game_state_json())
+    return jsonify(state)
 
-def get_game_state_json():
+@app.route('/undo', methods=['POST'])
+def undo():
+    """Son `plies` yarım hamleyi (varsayılan 2: oyuncu + AI) geri alır.
+
+    Analiz geçmişi silinmez; aynı hamleler tekrar oynanırsa analiz ve AI
+    cevabı geçmişten gelir.
+    """
+    game = load_game(request_game_id())
+    if game is None:
+        return jsonify({"error": "Oyun başlatılmadı."}), 404
+    
+    try:
+        plies = int((request.get_json(silent=True) or {}).get('plies', 2))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Geçersiz geri alma sayısı."}), 400
+    
+    board = game['board']
+    if plies < 1 or plies > len(board.move_stack):
+        return jsonify({"error": "Geri alınacak hamle yok."}), 400
+    for _ in range(plies):
+        board.pop()
+    ply = len(board.move_stack)
+    
+    # Bu pozisyona getiren hamlenin geri bildirimini geri yükle
+    restored = None
+    for entry in game['history']:
+        if entry['feedback_text'] and entry['ply'] + (2 if entry['reply'] else 1) == ply:
+            restored = entry
+    
+    state = commit_game(game, {
+        'last_move': board.peek().uci() if board.move_stack else None,
+        'best_alternative_move': None,
+        'threat_move': None,
+        'pending_move': None,
+        'feedback_text': restored['feedback_text'] if restored else "Hamle geri alındı. Sıra sende!",
+        'feedback_color': restored['feedback_color'] if restored else "COLOR_INFO_TEXT"
+    })
+    if state is None:
+        return conflict_response()
+    
+    print(f"Undo {plies} plies, now at ply {ply}")
+    return jsonify({"status": "undone", "plies": plies, "game_state": state})
+
+@app.route('/hint', methods=['GET', 'POST'])
+def hint():
+    """Sıradaki pozisyon için en iyi hamleyi ve kısa bir devamı (SAN) döndürür.
+
+    Pozisyon daha önce analiz edildiyse (hamle analizi, arka plan analizi)
+    cevap önbellekten gelir; yoksa küçük, düğüm sınırlı bir arama yapılır.
+    """
+    game = load_game(request_game_id())
+    if game is None:
+        return jsonify({"error": "Oyun başlatılmadı."}), 404
+    board = game['board']
+    if board.is_game_over():
+        return jsonify({"error": "Oyun bitti."}), 400
+    
+    entry = analysis_cache.get(board)
+    source = "cache"
+    if entry is None and endgame_tablebase.applies(board):
+        entry = tablebase_hint(board)
+        source = "tablebase"
+    if entry is None and eval_table is not None:
+        known = eval_table.lookup(board)
+        if known is not None:
+            entry = {"pv": [known['move'].uci()], "score": known['score'], "depth": known['depth']}
+            source = "eval_table"
+    if entry is None:
+        if not engine_pool.available:
+            return jsonify({"error": "İpucu için motor bulunamadı."}), 503
+        source = "search"
+        with acquire_engine(game['engine_key']) as engine:
+            engine.configure({"UCI_LimitStrength": False})
+            with engine_call("hint"):
+                info = engine.analyse(board, chess.engine.Limit(nodes=HINT_NODES))
+        entry = analysis_cache.put(board, info)
+        if entry is None:
+            return jsonify({"error": "İpucu bulunamadı."}), 503
+    
+    pv = [chess.Move.from_uci(uci) for uci in entry['pv'][:HINT_LINE_PLIES]]
+    return jsonify({
+        "move": pv[0].uci(),
+        "san": board.san(pv[0]),
+        "line": board.variation_san(pv),
+        "score": entry['score'],
+        "depth": entry['depth'],
+        "source": source,
+        "fen": board.fen()
+    })
+
+def tablebase_score(outcome, distance):
+    """Tablo sonucunu hint/önbellek skor biçimine çevirir (mat hamle sayısı)."""
+    if outcome == 0:
+        return {"cp": 0}
+    return {"mate": outcome * ((distance + 1) // 2)}
+
+def tablebase_hint(board):
+    """Oyun sonu tablosundan en iyi devam; /hint önbellek girdisi biçiminde."""
+    result = endgame_tablebase.probe(board)
+    if result is None:
+        return None
+    outcome, distance = result
+    line_board = board.copy(stack=False)
+    pv = []
+    while len(pv) < HINT_LINE_PLIES and not line_board.is_game_over():
+        move = endgame_tablebase.best_move(line_board)
+        if move is None:
+            break
+        pv.append(move.uci())
+        line_board.push(move)
+    return {"pv": pv, "score": tablebase_score(outcome, distance), "depth": None}
+
+def get_game_state_json(game):
     """Oyun durumunu Flutter'ın anlayacağı bir JSON formatına çevirir."""
-    board = game_state['board']
+    board = game['board']
     result = "Oyun devam ediyor"
     if board.is_game_over():
         res = board.result()
@@ -351,22 +862,165 @@ def get_game_state_json():
             result = "Oyun bitti! Sonuç: Berabere."
             
     return {
+        "game_id": game['game_id'],
         "fen": board.fen(),
         "turn": "white" if board.turn == chess.WHITE else "black",
-        "tutor_mode": TUTOR_MODES[game_state['tutor_mode_index']],
-        "difficulty": DIFFICULTY_LEVELS[game_state['difficulty_index']],
-        "tutor_mode_index": game_state['tutor_mode_index'],
-        "difficulty_index": game_state['difficulty_index'],
-        "feedback_text": game_state['feedback_text'],
-        "feedback_color": game_state['feedback_color'],
-        "last_move": game_state.get('last_move'),
-        "best_alternative_move": game_state.get('best_alternative_move'),
-        "threat_move": game_state.get('threat_move'),
+        "tutor_mode": TUTOR_MODES[game['tutor_mode_index']],
+        "difficulty": DIFFICULTY_LEVELS[game['difficulty_index']],
+        "tutor_mode_index": game['tutor_mode_index'],
+        "difficulty_index": game['difficulty_index'],
+        "feedback_text": game['feedback_text'],
+        "feedback_color": game['feedback_color'],
+        "last_move": game.get('last_move'),
+        "best_alternative_move": game.get('best_alternative_move'),
+        "threat_move": game.get('threat_move'),
         "is_game_over": board.is_game_over(),
         "game_result": result
     }
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Sunucu trafik almaya hazır mı: açılış analizleri yüklendi, oyun sonu tabloları üretilmiyor."""
+    state = {
+        "analysis_warm": analysis_warm.is_set(),
+        "warm_positions": warm_stats["loaded"],
+        "endgame_tables": endgame_tablebase.ready.is_set(),
+    }
+    is_ready = state["analysis_warm"] and not endgame_tablebase.building
+    return jsonify({"ready": is_ready, **state}), 200 if is_ready else 503
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    start_trace()
+
+@app.after_request
+def record_request_time(response):
+    started = g.get('request_started')
+    trace = end_trace()
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        elapsed = time.perf_counter() - started
+        REQUEST_SECONDS.observe(elapsed, route=route, method=request.method, status=response.status_code)
+        if trace is not None:
+            # Motor çağrıları ve tahta işlemleri (bkz. tracing.py)
+            if SERVER_TIMING:
+                response.headers['Server-Timing'] = server_timing_header(trace, elapsed * 1000)
+            log_trace(trace, elapsed * 1000, method=request.method, route=route, status=response.status_code)
+    return response
+
+@REGISTRY.collector
+def collect_app_metrics():
+    """Başka modüllerde tutulan sayaçlar /metrics çağrıldığında okunur."""
+    cache = analysis_cache.snapshot()
+    families = [
+        ("chess_sessions", "gauge", "Oturum deposundaki (bellekteki) oyun sayısı", [({}, session_store.count())]),
+        ("chess_cache_hits_total", "counter", "Önbellek isabetleri", [
+            ({"cache": "analysis"}, cache["hits"]),
+            ({"cache": "eval_table"}, eval_table.hits if eval_table is not None else None),
+            ({"cache": "endgame_tables"}, endgame_tablebase.stats["hits"]),
+        ]),
+        ("chess_cache_misses_total", "counter", "Önbellek ıskaları", [
+            ({"cache": "analysis"}, cache["misses"]),
+            ({"cache": "eval_table"}, eval_table.misses if eval_table is not None else None),
+            ({"cache": "endgame_tables"}, endgame_tablebase.stats["probes"] - endgame_tablebase.stats["hits"]),
+        ]),
+        ("chess_cache_hit_ratio", "gauge", "Önbellek isabet oranı", [
+            ({"cache": "analysis"}, cache["hit_rate"]),
+            ({"cache": "eval_table"}, eval_table.snapshot()["hit_rate"] if eval_table is not None else None),
+        ]),
+        ("chess_analysis_cache_entries", "gauge", "Analiz önbelleğindeki girdi sayısı", [({}, cache["size"])]),
+    ]
+    # Yerel havuz: motor süreçlerinin RSS'i ve anlık yük (uzak havuzda motorlar başka süreçte)
+    if hasattr(engine_pool, "engine_pids"):
+        families.append(("chess_engine_rss_bytes", "gauge", "Motor süreci yerleşik bellek kullanımı", [
+            ({"engine": index}, process_rss_bytes(pid)) for index, pid in engine_pool.engine_pids()
+        ]))
+    if hasattr(engine_pool, "load_snapshot"):
+        load = engine_pool.load_snapshot()
+        families.append(("chess_engine_pool_engines", "gauge", "Havuzdaki motorlar", [
+            ({"state": "busy"}, load["busy"]), ({"state": "idle"}, load["idle"])
+        ]))
+        families.append(("chess_engine_pool_waiting", "gauge", "Havuzda motor bekleyenler (arka plan dahil)",
+                         [({}, load["waiting"])]))
+    return families
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metin biçiminde metrikler."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+def admin_authorized():
+    # Yalnızca başlık: sorgu parametresi erişim/proxy günlüklerine ve TRACE_LOG'a düşer
+    token = request.headers.get('X-Admin-Token', "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+@app.route('/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    """`seconds` saniye boyunca istek thread'lerini örnekler; flamegraph için collapsed stack döndürür.
+
+    ?seconds=N (varsayılan 10), ?interval_ms=M (varsayılan 10), ?threads=all
+    (arka plan thread'leri dahil). serve.py ile çalışırken yalnızca isteği
+    alan worker süreci profillenir.
+    """
+    if not admin_authorized():
+        return jsonify({"error": "Yetkisiz."}), 403
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = float(request.args.get('interval_ms', 10)) / 1000
+    except ValueError:
+        return jsonify({"error": "Geçersiz süre."}), 400
+    if seconds <= 0 or interval <= 0:
+        return jsonify({"error": "Geçersiz süre."}), 400
+    try:
+        stacks, rounds = sample_stacks(seconds, interval, requests_only=request.args.get('threads') != 'all')
+    except ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+    print(f"Profil alındı: {seconds}s, {rounds} örnek turu, {sum(stacks.values())} yığın")
+    return Response(collapsed_output(stacks), content_type="text/plain; charset=utf-8",
+                    headers={"X-Profile-Rounds": str(rounds)})
+
+@app.route('/diagnostics/engine_pool', methods=['GET'])
+def engine_pool_diagnostics():
+    """Motor havuzunun durumu ve oyun-motor eşleşmesi (TT yeniden kullanım) istatistikleri."""
+    return jsonify(engine_pool.snapshot())
+
+@app.route('/diagnostics/sessions', methods=['GET'])
+def sessions_diagnostics():
+    """Oturum deposunun durumu (bellekteki oyunlar, bekleyen yazmalar)."""
+    return jsonify(session_store.snapshot())
+
+@app.route('/diagnostics/analysis_cache', methods=['GET'])
+def analysis_cache_diagnostics():
+    """Pozisyon analizi önbelleği ve arka plan analizi istatistikleri."""
+    return jsonify({"cache": analysis_cache.snapshot(), "background": background_analyzer.snapshot()})
+
+@app.route('/diagnostics/move_screen', methods=['GET'])
+def move_screen_diagnostics():
+    """Motorsuz hızlı yolun kullanım oranı ve motorla uyuşma istatistikleri."""
+    return jsonify(screen_stats.snapshot())
+
+@app.route('/diagnostics/tiered_analysis', methods=['GET'])
+def tiered_analysis_diagnostics():
+    """Sığ/derin arama ile sınıflandırılan hamleler, düğüm sayıları ve derin aramayla uyuşma."""
+    return jsonify(tier_stats.snapshot())
+
+@app.route('/diagnostics/eval_table', methods=['GET'])
+def eval_table_diagnostics():
+    """Paylaşılan değerlendirme tablosunun boyutu ve isabet oranı."""
+    return jsonify(eval_table.snapshot() if eval_table is not None else {"loaded": False})
+
+@app.route('/diagnostics/engine_plan', methods=['GET'])
+def engine_plan_diagnostics():
+    """Bellek/CPU sınırlarından hesaplanan motor havuzu planı."""
+    return jsonify(engine_pool.plan_snapshot())
+
+@app.route('/diagnostics/endgame_tables', methods=['GET'])
+def endgame_tables_diagnostics():
+    """Oyun sonu tablolarının durumu ve tablodan cevaplanan hamle sayısı."""
+    return jsonify(endgame_tablebase.snapshot())
+
 # --- SERVER START ---
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    app.run(host='0.0.0.0', port=port, debug=True, threaded=True)
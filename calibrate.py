@@ -0,0 +1,189 @@
+# calibrate.py
+# Sunucunun üzerinde çalıştığı makineyi ölçer: Stockfish'in kendi `bench` ve
+# `speedtest` komutlarını UCI borusu üzerinden çalıştırır, nps değerlerini okur
+# ve seviye ayarlarıyla önerilen motor havuzu boyutunu bir JSON dosyasına yazar.
+# Backend (app.py) bu dosyayı açılışta okur.
+#
+# Kullanım:
+#   python calibrate.py                       # bench + speedtest, sonucu kaydet
+#   python calibrate.py --skip-speedtest      # sadece tek çekirdek bench
+#   python calibrate.py --engine ./stockfish  # farklı bir binary ölç
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+# app.py değil: app.py import edilince motor havuzu ve arka plan işleri başlar ve
+# ölçülen nps'yi bozar
+from game_settings import BASE_AI_SETTINGS, stockfish_path
+
+# --- CONFIGURATION ---
+CALIBRATION_PATH = os.environ.get(
+    "ENGINE_CALIBRATION_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "engine_calibration.json")
+)
+CALIBRATION_VERSION = 1
+
+# Stockfish bench/speedtest çıktısı stderr'e yazılır: "Nodes/second    : 1234567"
+NPS_PATTERN = re.compile(r"Nodes/second\s*:\s*(\d+)")
+# Analiz, oyun hamlesinin yanında en fazla bu kadar ek düğüm harcayabilir.
+ANALYSIS_NODE_FACTOR = 2
+
+
+def run_uci_command(engine_path, command, timeout):
+    """Motoru başlatır, UCI el sıkışmasını yapar, komutu çalıştırıp stderr'i döndürür."""
+    proc = subprocess.Popen(
+        [engine_path],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    try:
+        proc.stdin.write("uci\n")
+        proc.stdin.flush()
+        for line in proc.stdout:
+            if line.strip() == "uciok":
+                break
+        else:
+            raise RuntimeError("Motor 'uciok' cevabı vermedi.")
+
+        proc.stdin.write(f"{command}\nquit\n")
+        proc.stdin.flush()
+        _, stderr = proc.communicate(timeout=timeout)
+        return stderr
+    except Exception:
+        proc.kill()
+        proc.wait()
+        raise
+
+
+def parse_nps(output):
+    """bench/speedtest çıktısındaki son 'Nodes/second' değerini döndürür."""
+    matches = NPS_PATTERN.findall(output)
+    if not matches:
+        raise ValueError("Çıktıda 'Nodes/second' satırı bulunamadı.")
+    return int(matches[-1])
+
+
+def measure_single_thread_nps(engine_path, depth=13, timeout=600):
+    """Tek thread, 16MB hash ile standart bench pozisyonlarında nps ölçer."""
+    return parse_nps(run_uci_command(engine_path, f"bench 16 1 {depth}", timeout))
+
+
+def measure_parallel_nps(engine_path, threads, seconds, timeout=None):
+    """speedtest ile tüm çekirdekler kullanıldığında toplam nps ölçer."""
+    hash_mb = 128 * threads
+    timeout = timeout or seconds * 4 + 60
+    return parse_nps(run_uci_command(engine_path, f"speedtest {threads} {hash_mb} {seconds}", timeout))
+
+
+def derive_calibration(single_nps, parallel_nps, cpu_count, ai_settings):
+    """Ölçülen nps değerlerinden seviye ayarlarını ve havuz boyutunu türetir.
+
+    Her seviyenin süre limiti korunur; bu makinede o sürede aranabilecek düğüm
+    sayısı `nodes` limiti olarak eklenir. Böylece yavaş makinede de hızlı
+    makinede de motor aynı işi yapar ve süre yalnızca üst sınır olarak kalır.
+    """
+    if parallel_nps:
+        efficiency = min(1.0, parallel_nps / float(single_nps * cpu_count))
+    else:
+        efficiency = 1.0
+    pool_size = max(1, int(round(cpu_count * efficiency)))
+
+    levels = {}
+    for level_name, settings in ai_settings.items():
+        nodes = int(single_nps * settings["time"])
+        levels[level_name] = {
+            "time": settings["time"],
+            "depth": settings["depth"],
+            "nodes": nodes,
+            "analysis_nodes": nodes * ANALYSIS_NODE_FACTOR
+        }
+
+    return {
+        "version": CALIBRATION_VERSION,
+        "measured_at": int(time.time()),
+        "cpu_count": cpu_count,
+        "single_thread_nps": single_nps,
+        "parallel_nps": parallel_nps,
+        "parallel_efficiency": round(efficiency, 3),
+        "pool_size": pool_size,
+        "levels": levels
+    }
+
+
+def save_calibration(calibration, path=CALIBRATION_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(calibration, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_calibration(path=CALIBRATION_PATH):
+    """Kalibrasyon dosyasını okur; yoksa veya bozuksa None döndürür."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            calibration = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"UYARI: Kalibrasyon dosyası okunamadı ({path}): {e}")
+        return None
+    if calibration.get("version") != CALIBRATION_VERSION:
+        print(f"UYARI: Kalibrasyon dosyası sürümü uyumsuz, yok sayılıyor: {path}")
+        return None
+    return calibration
+
+
+def apply_calibration(ai_settings, calibration):
+    """Kalibre edilmiş seviye ayarlarını AI_SETTINGS sözlüğüne işler."""
+    if not calibration:
+        return
+    for level_name, level in calibration.get("levels", {}).items():
+        if level_name in ai_settings:
+            ai_settings[level_name].update(level)
+
+
+def recommended_pool_size(calibration):
+    """ENGINE_POOL_SIZE verilmişse o, yoksa kalibrasyonun önerdiği havuz boyutu."""
+    return int(os.environ.get(
+        "ENGINE_POOL_SIZE",
+        calibration["pool_size"] if calibration else 1
+    ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stockfish'i bu makinede ölçer ve backend ayarlarını üretir.")
+    parser.add_argument("--engine", default=None, help="Ölçülecek Stockfish binary yolu (varsayılan: sunucunun seçtiği)")
+    parser.add_argument("--output", default=CALIBRATION_PATH, help="Yazılacak kalibrasyon dosyası")
+    parser.add_argument("--bench-depth", type=int, default=13, help="bench arama derinliği")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="speedtest thread sayısı")
+    parser.add_argument("--speedtest-seconds", type=int, default=30, help="speedtest süresi (saniye)")
+    parser.add_argument("--skip-speedtest", action="store_true", help="Çok çekirdekli ölçümü atla")
+    args = parser.parse_args(argv)
+    args.engine = args.engine or stockfish_path()
+
+    print(f"bench çalışıyor: {args.engine}")
+    single_nps = measure_single_thread_nps(args.engine, depth=args.bench_depth)
+    print(f"Tek thread nps: {single_nps}")
+
+    parallel_nps = None
+    if not args.skip_speedtest and args.threads > 1:
+        print(f"speedtest çalışıyor: {args.threads} thread, {args.speedtest_seconds}s")
+        parallel_nps = measure_parallel_nps(args.engine, args.threads, args.speedtest_seconds)
+        print(f"Toplam nps: {parallel_nps}")
+
+    # Eski kalibrasyon üzerine değil, temel ayarlardan türet.
+    calibration = derive_calibration(single_nps, parallel_nps, args.threads, BASE_AI_SETTINGS)
+    save_calibration(calibration, args.output)
+    print(f"Önerilen havuz boyutu: {calibration['pool_size']}")
+    print(f"Kalibrasyon kaydedildi: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+# concurrency_stress.py
+# Backend'i aynı anda çok sayıda oyunla zorlar ve oyun durumlarının birbirine
+# karışmadığını doğrular.
+#
+# Her thread kendi oyununu açar, rastgele yasal hamleler yapar ve sunucunun
+# döndürdüğü FEN'i kendi tuttuğu tahtayla karşılaştırır. Ayrıca birkaç thread
+# aynı oyuna aynı anda hamle göndererek kilit/sürüm kontrolünü dener: bu
+# isteklerden yalnızca biri kabul edilmeli, diğerleri 400/409 almalıdır.
+#
+# Kullanım:
+#   python concurrency_stress.py                        # süreç içi (Flask test client)
+#   python concurrency_stress.py --url http://127.0.0.1:5000 --games 32
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+import chess
+
+
+class InProcessClient:
+    """app.py'yi bu süreçte yükler ve Flask test client ile konuşur."""
+
+    def __init__(self):
+        import app
+        self.module = app
+        self.app = app.app
+
+    def post(self, path, payload):
+        with self.app.test_client() as client:
+            response = client.post(path, json=payload)
+            return response.status_code, response.get_json()
+
+    def get(self, path, params=None):
+        with self.app.test_client() as client:
+            response = client.get(path, query_string=params)
+            return response.status_code, response.get_json()
+
+    def close(self):
+        # Motor thread'leri daemon değil; kapatılmazsa süreç sonlanmaz
+        self.module.engine_pool.close()
+
+
+class HttpClient:
+    """Çalışan bir sunucuya HTTP ile bağlanır."""
+
+    def __init__(self, base_url, timeout=60):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def post(self, path, payload):
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        return self._send(req)
+
+    def get(self, path, params=None):
+        query = "?" + urllib.parse.urlencode(params) if params else ""
+        return self._send(urllib.request.Request(self.base_url + path + query, method="GET"))
+
+    def _send(self, req):
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b"{}")
+
+    def close(self):
+        pass
+
+
+def play_game(client, moves, seed, errors, counters):
+    """Tek bir oyunu baştan sona oynar; tutarsızlıkları `errors` listesine yazar."""
+    rng = random.Random(seed)
+    game_id = f"stress-{uuid.uuid4().hex[:12]}"
+    status, state = client.post("/new_game", {"game_id": game_id})
+    if status != 200:
+        errors.append(f"{game_id}: new_game {status}")
+        return
+    board = chess.Board()
+
+    for _ in range(moves):
+        if board.is_game_over():
+            break
+        move = rng.choice(list(board.legal_moves)).uci()
+        status, body = client.post("/make_move", {"game_id": game_id, "move": move})
+        if status == 200 and body.get("status") == "confirmation_required":
+            status, body = client.post("/make_move", {"game_id": game_id, "move": move + "_confirmed"})
+        if status != 200:
+            errors.append(f"{game_id}: {move} -> {status} {body}")
+            return
+
+        counters["moves"] += 1
+        if body.get("status") == "rejected":
+            # KATI modda kötü hamle reddedilir; tahta değişmez
+            continue
+        board.push_uci(move)
+        state = body["game_state"]
+        if state["game_id"] != game_id:
+            errors.append(f"{game_id}: başka oyunun durumu döndü ({state['game_id']})")
+            return
+        # AI cevabı sunucu tarafından oynandıysa yerel tahtaya da ekle
+        if state["last_move"] and state["last_move"] != move:
+            board.push_uci(state["last_move"])
+        if state["fen"] != board.fen():
+            errors.append(f"{game_id}: FEN uyuşmuyor\n  sunucu: {state['fen']}\n  yerel:  {board.fen()}")
+            return
+
+
+def contend(client, racers, errors, counters):
+    """Aynı oyuna aynı anda birden fazla hamle gönderir; en fazla biri kabul edilmeli."""
+    game_id = f"race-{uuid.uuid4().hex[:12]}"
+    client.post("/new_game", {"game_id": game_id})
+    moves = [m.uci() for m in chess.Board().legal_moves][:racers]
+    barrier = threading.Barrier(len(moves))
+    results = []
+
+    def race(move):
+        barrier.wait()
+        results.append(client.post("/make_move", {"game_id": game_id, "move": move}))
+
+    threads = [threading.Thread(target=race, args=(move,)) for move in moves]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    accepted = [body for status, body in results if status == 200 and body.get("status") == "accepted"]
+    unexpected = [status for status, _ in results if status not in (200, 400, 409)]
+    counters["races"] += 1
+    counters["race_conflicts"] += sum(1 for status, _ in results if status == 409)
+    if len(accepted) > 1 or unexpected:
+        errors.append(f"{game_id}: {len(accepted)} hamle kabul edildi, beklenmeyen kodlar: {unexpected}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backend'i eşzamanlı oyunlarla zorlar.")
+    parser.add_argument("--url", default=None, help="Sunucu adresi (verilmezse app.py süreç içinde yüklenir)")
+    parser.add_argument("--games", type=int, default=16, help="Aynı anda oynanacak oyun sayısı")
+    parser.add_argument("--moves", type=int, default=20, help="Oyun başına oyuncu hamlesi")
+    parser.add_argument("--races", type=int, default=5, help="Aynı oyuna eşzamanlı hamle denemesi sayısı")
+    parser.add_argument("--racers", type=int, default=4, help="Her denemede yarışan istek sayısı")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    client = HttpClient(args.url) if args.url else InProcessClient()
+    errors = []
+    counters = {"moves": 0, "races": 0, "race_conflicts": 0}
+
+    started = time.monotonic()
+    threads = [
+        threading.Thread(target=play_game, args=(client, args.moves, args.seed + i, errors, counters))
+        for i in range(args.games)
+    ]
+    for t in threads:
+        t.start()
+    for _ in range(args.races):
+        contend(client, args.racers, errors, counters)
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    client.close()
+
+    print(f"{args.games} oyun, {counters['moves']} hamle, {elapsed:.1f}s "
+          f"({counters['moves'] / elapsed:.1f} hamle/s)")
+    print(f"{counters['races']} yarış, {counters['race_conflicts']} çakışma (409)")
+    for error in errors:
+        print(f"HATA: {error}")
+    print("Tutarsızlık bulunmadı." if not errors else f"{len(errors)} tutarsızlık bulundu.")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
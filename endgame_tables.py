@@ -0,0 +1,482 @@
+# endgame_tables.py
+# Basit oyun sonları (KQK, KRK, KPK) için süreç içinde üretilen tablolar.
+#
+# Çocukların en çok çalıştığı basit oyun sonlarında her hamle için hem AI
+# hamlesi hem de öğretmen analizi tam bir Stockfish araması yapıyordu. Bu
+# modül bu sonları geriye doğru analizle (retrograde analysis) bir kez çözer:
+# mat pozisyonlarından başlayıp geri hamleler (unmove) üzerinden BFS ile
+# ilerler. Her pozisyon için kazanç/beraberlik/kayıp ile birlikte mata (KPK'da
+# terfi üzerinden mata) kalan yarım hamle sayısı saklanır; böylece AI kazanan
+# pozisyonda ilerleme kaydeder, kaybeden pozisyonda en uzun direnir.
+#
+# Tablolar güçlü taraf beyazken üretilir; güçlü taraf siyahsa tahta aynalanır.
+# Diske yazarken simetri indirgemesi yapılır (beyaz şah piyonlu sonda a-d
+# hatlarına, piyonsuzda a1-d1-d4 üçgenine taşınır) ve zlib ile sıkıştırılır.
+#
+# Kullanım:
+#   python endgame_tables.py --build     # tabloları üret ve kaydet
+#   python endgame_tables.py --probe "8/8/8/4k3/8/8/8/KQ6 w - - 0 1"
+import argparse
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+import chess
+
+# --- CONFIGURATION ---
+ENDGAME_TABLES_PATH = os.environ.get(
+    "ENDGAME_TABLES_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "endgame_tables.bin")
+)
+FILE_MAGIC = b"CBEGT1"
+# Üretim sırası önemli: KPK terfi sonrası KQK ve KRK tablolarına bakar
+TABLES = (("KQK", chess.QUEEN), ("KRK", chess.ROOK), ("KPK", chess.PAWN))
+
+# Bayt değerleri: 0 beraberlik, 255 geçersiz pozisyon, diğerleri mesafe + 1 (yarım hamle)
+DRAW = 0
+ILLEGAL = 255
+ESCAPE = 255  # siyahın kaybetmeyen bir hamlesi var (taş alma, pat)
+
+WHITE_TO_MOVE = 0
+BLACK_TO_MOVE = 1
+POSITIONS = 2 * 64 * 64 * 64
+
+KING_SQUARES = [list(chess.scan_forward(chess.BB_KING_ATTACKS[sq])) for sq in chess.SQUARES]
+
+
+def _piece_attacks(piece_type, square, occupied):
+    if piece_type == chess.PAWN:
+        return chess.BB_PAWN_ATTACKS[chess.WHITE][square]
+    attacks = 0
+    if piece_type in (chess.ROOK, chess.QUEEN):
+        attacks |= (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] |
+                    chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied])
+    if piece_type in (chess.BISHOP, chess.QUEEN):
+        attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    return attacks
+
+
+def _index(stm, wk, wx, bk):
+    return stm << 18 | wk << 12 | wx << 6 | bk
+
+
+def _placement_ok(piece_type, wk, wx, bk):
+    if wk == wx or wk == bk or wx == bk:
+        return False
+    if chess.BB_SQUARES[bk] & chess.BB_KING_ATTACKS[wk]:
+        return False
+    if piece_type == chess.PAWN and not chess.BB_SQUARES[wx] & ~(chess.BB_RANK_1 | chess.BB_RANK_8):
+        return False
+    return True
+
+
+def _black_in_check(piece_type, wk, wx, bk):
+    return bool(_piece_attacks(piece_type, wx, chess.BB_SQUARES[wk] | chess.BB_SQUARES[bk]) & chess.BB_SQUARES[bk])
+
+
+def _black_moves(piece_type, wk, wx, bk):
+    """Siyah şahın gidebileceği kareler ve taşı alabiliyor mu: (kareler, alma var mı)."""
+    guarded = chess.BB_KING_ATTACKS[wk]
+    # Şah kendi karesini kapatmaz (hat boyunca kaçış yok)
+    attacked = _piece_attacks(piece_type, wx, chess.BB_SQUARES[wk])
+    squares = []
+    can_capture = False
+    for to in KING_SQUARES[bk]:
+        bb = chess.BB_SQUARES[to]
+        if to == wk or bb & guarded:
+            continue
+        if to == wx:
+            can_capture = True
+        elif not bb & attacked:
+            squares.append(to)
+    return squares, can_capture
+
+
+def _white_unmoves(piece_type, wk, wx, bk):
+    """Siyah sıradaki pozisyona beyazın hangi pozisyonlardan gelebileceği (beyaz sırada)."""
+    occupied = chess.BB_SQUARES[wk] | chess.BB_SQUARES[wx] | chess.BB_SQUARES[bk]
+    for frm in KING_SQUARES[wk]:
+        if chess.BB_SQUARES[frm] & occupied or chess.BB_SQUARES[bk] & chess.BB_KING_ATTACKS[frm]:
+            continue
+        if not _black_in_check(piece_type, frm, wx, bk):
+            yield _index(WHITE_TO_MOVE, frm, wx, bk)
+
+    if piece_type == chess.PAWN:
+        sources = []
+        if wx >= 16 and not chess.BB_SQUARES[wx - 8] & occupied:
+            sources.append(wx - 8)
+            if chess.square_rank(wx) == 3 and not chess.BB_SQUARES[wx - 16] & occupied:
+                sources.append(wx - 16)
+    else:
+        sources = chess.scan_forward(_piece_attacks(piece_type, wx, occupied) & ~occupied)
+    for frm in sources:
+        if not _black_in_check(piece_type, wk, frm, bk):
+            yield _index(WHITE_TO_MOVE, wk, frm, bk)
+
+
+def _black_unmoves(wk, wx, bk):
+    """Beyaz sıradaki pozisyona siyahın hangi pozisyonlardan gelebileceği (siyah sırada)."""
+    for frm in KING_SQUARES[bk]:
+        if frm == wk or frm == wx or chess.BB_SQUARES[frm] & chess.BB_KING_ATTACKS[wk]:
+            continue
+        yield _index(BLACK_TO_MOVE, wk, wx, frm)
+
+
+def solve(piece_type, promotion_probe=None):
+    """Bir KXK sonunu çözer; tüm pozisyonlar için bayt dizisi döndürür.
+
+    promotion_probe(piece_type, wk, to, bk): KPK'da terfiden sonraki (siyah
+    sırada) pozisyonun kayıp mesafesi veya None.
+    """
+    value = bytearray(POSITIONS)
+    remaining = bytearray(POSITIONS)
+    done = bytearray(POSITIONS)
+    buckets = defaultdict(list)
+
+    for wk in chess.SQUARES:
+        for wx in chess.SQUARES:
+            for bk in chess.SQUARES:
+                white_index = _index(WHITE_TO_MOVE, wk, wx, bk)
+                black_index = _index(BLACK_TO_MOVE, wk, wx, bk)
+                if not _placement_ok(piece_type, wk, wx, bk):
+                    value[white_index] = value[black_index] = ILLEGAL
+                    continue
+
+                in_check = _black_in_check(piece_type, wk, wx, bk)
+                if in_check:
+                    # Beyaz sıradayken siyah şah çekilemez
+                    value[white_index] = ILLEGAL
+                elif piece_type == chess.PAWN and promotion_probe and chess.square_rank(wx) == 6 \
+                        and wx + 8 not in (wk, bk):
+                    best = None
+                    for promotion in (chess.QUEEN, chess.ROOK):
+                        loss = promotion_probe(promotion, wk, wx + 8, bk)
+                        if loss is not None and (best is None or loss + 1 < best):
+                            best = loss + 1
+                    if best is not None:
+                        value[white_index] = best + 1
+                        buckets[best].append(white_index)
+
+                squares, can_capture = _black_moves(piece_type, wk, wx, bk)
+                if can_capture or (not squares and not in_check):
+                    remaining[black_index] = ESCAPE
+                elif not squares:
+                    value[black_index] = 1  # mat: 0 yarım hamlede kayıp
+                    buckets[0].append(black_index)
+                else:
+                    remaining[black_index] = len(squares)
+
+    distance = 0
+    while buckets:
+        for index in buckets.pop(distance, ()):
+            if done[index] or value[index] != distance + 1:
+                continue
+            done[index] = 1
+            stm, wk, wx, bk = index >> 18, index >> 12 & 63, index >> 6 & 63, index & 63
+            if stm == BLACK_TO_MOVE:
+                # Siyah kaybediyor: buraya gelebilen beyaz pozisyonlar kazanır
+                for pred in _white_unmoves(piece_type, wk, wx, bk):
+                    if not done[pred] and value[pred] != ILLEGAL and (value[pred] == DRAW or value[pred] > distance + 2):
+                        value[pred] = distance + 2
+                        buckets[distance + 1].append(pred)
+            else:
+                # Beyaz kazanıyor: siyahın tüm hamleleri kazanan pozisyonlara gidiyorsa siyah kaybeder
+                for pred in _black_unmoves(wk, wx, bk):
+                    if done[pred] or remaining[pred] == ESCAPE or value[pred] == ILLEGAL:
+                        continue
+                    remaining[pred] -= 1
+                    if remaining[pred] == 0:
+                        value[pred] = distance + 2
+                        buckets[distance + 1].append(pred)
+        distance += 1
+    return value
+
+
+# --- SİMETRİ İNDİRGEMESİ ---
+def _transpose(square):
+    return (square >> 3) | (square & 7) << 3
+
+
+def canonical(piece_type, wk, wx, bk):
+    """Simetri dönüşümü uygulanmış (wk, wx, bk)."""
+    squares = (wk, wx, bk)
+    if chess.square_file(squares[0]) > 3:
+        squares = tuple(sq ^ 7 for sq in squares)
+    if piece_type != chess.PAWN:
+        if chess.square_rank(squares[0]) > 3:
+            squares = tuple(sq ^ 56 for sq in squares)
+        if chess.square_rank(squares[0]) > chess.square_file(squares[0]):
+            squares = tuple(_transpose(sq) for sq in squares)
+    return squares
+
+
+def king_squares(piece_type):
+    """İndirgenmiş tabloda beyaz şahın bulunabileceği kareler (sıralı)."""
+    if piece_type == chess.PAWN:
+        return [sq for sq in chess.SQUARES if chess.square_file(sq) <= 3]
+    return [sq for sq in chess.SQUARES
+            if chess.square_rank(sq) <= chess.square_file(sq) <= 3]
+
+
+def reduce_table(piece_type, value):
+    kings = king_squares(piece_type)
+    reduced = bytearray(2 * len(kings) * 4096)
+    for stm in (WHITE_TO_MOVE, BLACK_TO_MOVE):
+        for k, wk in enumerate(kings):
+            base = (stm * len(kings) + k) * 4096
+            full = _index(stm, wk, 0, 0)
+            reduced[base:base + 4096] = value[full:full + 4096]
+    return reduced
+
+
+class EndgameTable:
+    """Tek bir KXK sonunun indirgenmiş tablosu."""
+
+    def __init__(self, name, piece_type, data):
+        self.name = name
+        self.piece_type = piece_type
+        self.data = data
+        self._king_index = {sq: i for i, sq in enumerate(king_squares(piece_type))}
+
+    def value(self, stm, wk, wx, bk):
+        """Güçlü taraf beyazken ham bayt değeri (0 beraberlik, 255 geçersiz, d+1)."""
+        wk, wx, bk = canonical(self.piece_type, wk, wx, bk)
+        return self.data[((stm * len(self._king_index) + self._king_index[wk]) << 12) | wx << 6 | bk]
+
+
+# --- TAHTA ÜZERİNDE SORGU ---
+def _material(board):
+    """Tahta KXK ise (tablo adı, güçlü renk), değilse None."""
+    if chess.popcount(board.occupied) != 3 or board.clean_castling_rights() or board.has_legal_en_passant():
+        return None
+    for name, piece_type in TABLES:
+        for color in (chess.WHITE, chess.BLACK):
+            if board.pieces_mask(piece_type, color) and not board.occupied_co[not color] & ~board.kings:
+                return name, color
+    return None
+
+
+def _is_trivial_draw(board):
+    # Tablo dışındaki materyal: K-K, K+B-K, K+N-K
+    return board.is_insufficient_material()
+
+
+class EndgameTables:
+    """KQK, KRK ve KPK tabloları; yoksa ilk kullanımda arka planda üretilir."""
+
+    def __init__(self, path=ENDGAME_TABLES_PATH):
+        self.path = path
+        self.tables = {}
+        self.ready = threading.Event()
+        self.building = False
+        self._lock = threading.Lock()
+        self.stats = {"probes": 0, "hits": 0, "built_seconds": None}
+
+    # --- yükleme / üretme ---
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return False
+        if not blob.startswith(FILE_MAGIC):
+            print(f"UYARI: Oyun sonu tablosu dosyası tanınmadı: {self.path}")
+            return False
+        offset = len(FILE_MAGIC)
+        tables = {}
+        pieces = dict(TABLES)
+        while offset < len(blob):
+            name = blob[offset:offset + 3].decode("ascii")
+            (size,) = struct.unpack_from(">I", blob, offset + 3)
+            offset += 7
+            tables[name] = EndgameTable(name, pieces[name], zlib.decompress(blob[offset:offset + size]))
+            offset += size
+        if set(tables) != set(pieces):
+            return False
+        self.tables = tables
+        self.ready.set()
+        return True
+
+    def save(self):
+        parts = [FILE_MAGIC]
+        for name, _ in TABLES:
+            compressed = zlib.compress(bytes(self.tables[name].data), 9)
+            parts.append(name.encode("ascii") + struct.pack(">I", len(compressed)) + compressed)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp_path, self.path)
+
+    def build(self):
+        started = time.monotonic()
+        tables = {}
+
+        def promotion_probe(promotion, wk, to, bk):
+            raw = tables[{chess.QUEEN: "KQK", chess.ROOK: "KRK"}[promotion]].value(BLACK_TO_MOVE, wk, to, bk)
+            return None if raw in (DRAW, ILLEGAL) else raw - 1
+
+        for name, piece_type in TABLES:
+            value = solve(piece_type, promotion_probe if piece_type == chess.PAWN else None)
+            tables[name] = EndgameTable(name, piece_type, reduce_table(piece_type, value))
+            print(f"Oyun sonu tablosu üretildi: {name}")
+        self.tables = tables
+        self.stats["built_seconds"] = round(time.monotonic() - started, 1)
+        self.ready.set()
+
+    def ensure(self, background=True):
+        """Tabloları dosyadan yükler; yoksa üretir ve kaydeder (varsayılan olarak arka planda)."""
+        with self._lock:
+            if self.ready.is_set() or self.building:
+                return
+            if self.load():
+                return
+            self.building = True
+
+        def build_and_save():
+            try:
+                self.build()
+                self.save()
+                print(f"Oyun sonu tabloları kaydedildi: {self.path} ({self.stats['built_seconds']}s)")
+            except Exception as e:
+                print(f"Oyun sonu tabloları üretilemedi: {e}")
+            finally:
+                self.building = False
+
+        if background:
+            threading.Thread(target=build_and_save, name="endgame-tables", daemon=True).start()
+        else:
+            build_and_save()
+
+    # --- sorgu ---
+    def _raw(self, board):
+        """(tablo değeri, güçlü renk) veya None. Değer güçlü taraf beyaz kabul edilerek okunur."""
+        material = _material(board)
+        if material is None:
+            return None
+        name, strong = material
+        table = self.tables[name]
+        if strong == chess.BLACK:
+            board = board.mirror()
+        wk = board.king(chess.WHITE)
+        bk = board.king(chess.BLACK)
+        wx = chess.lsb(board.occupied_co[chess.WHITE] & ~board.kings)
+        stm = WHITE_TO_MOVE if board.turn == chess.WHITE else BLACK_TO_MOVE
+        return table.value(stm, wk, wx, bk), strong
+
+    def probe(self, board):
+        """Sıradaki taraf açısından sonuç: (1 kazanç / 0 beraberlik / -1 kayıp, mata kalan yarım hamle).
+
+        Tablo hazır değilse veya materyal uymuyorsa None.
+        """
+        if not self.ready.is_set():
+            return None
+        if board.is_checkmate():
+            return -1, 0
+        if board.is_stalemate() or _is_trivial_draw(board):
+            return 0, None
+        raw = self._raw(board)
+        if raw is None:
+            return None
+        value, strong = raw
+        if value == ILLEGAL:
+            return None
+        if value == DRAW:
+            return 0, None
+        return (1 if board.turn == strong else -1), value - 1
+
+    def applies(self, board):
+        return self.ready.is_set() and _material(board) is not None
+
+    def rank_moves(self, board):
+        """Yasal hamleleri sıradaki taraf için iyiden kötüye sıralar: [(hamle, sonuç, mesafe)].
+
+        Sonuç hamleden sonraki pozisyonun, hamleyi yapan taraf açısından değeridir.
+        Hamlelerden biri tablo dışına çıkıyorsa (ör. fil terfisi) None döner.
+        """
+        ranked = []
+        for move in board.legal_moves:
+            board.push(move)
+            try:
+                result = self.probe(board)
+            finally:
+                board.pop()
+            if result is None:
+                return None
+            outcome, distance = result
+            ranked.append((move, -outcome, distance))
+
+        def key(item):
+            _, outcome, distance = item
+            if outcome > 0:
+                return (0, distance)  # en hızlı kazanç
+            if outcome == 0:
+                return (1, 0)
+            return (2, -distance)  # en uzun direniş
+        ranked.sort(key=key)
+        return ranked
+
+    def best_move(self, board):
+        """Tablodan en iyi hamle; tablo uygulanamıyorsa None."""
+        self.stats["probes"] += 1
+        if not self.applies(board):
+            return None
+        ranked = self.rank_moves(board)
+        if not ranked:
+            return None
+        self.stats["hits"] += 1
+        return ranked[0][0]
+
+    def snapshot(self):
+        return {
+            "ready": self.ready.is_set(),
+            "building": self.building,
+            "tables": {name: len(table.data) for name, table in self.tables.items()},
+            **self.stats,
+        }
+
+
+_shared = {}
+
+
+def shared_tables(path=ENDGAME_TABLES_PATH):
+    """`path` için süreç genelinde tek EndgameTables nesnesi.
+
+    serve.py tabloları fork'tan önce bununla yükler (dosya yoksa bir kez üretir);
+    worker'lar yüklü tabloları kopyalamadan (copy-on-write) devralır ve dosyayı
+    aynı anda yeniden üretmeye çalışmaz.
+    """
+    tables = _shared.get(path)
+    if tables is None:
+        tables = _shared[path] = EndgameTables(path)
+    return tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Basit oyun sonu tablolarını (KQK, KRK, KPK) üretir ve sorgular.")
+    parser.add_argument("--build", action="store_true", help="Tabloları yeniden üret ve kaydet")
+    parser.add_argument("--probe", default=None, help="Bu FEN için tablo sonucunu ve en iyi hamleyi göster")
+    parser.add_argument("--path", default=ENDGAME_TABLES_PATH)
+    args = parser.parse_args(argv)
+
+    tables = EndgameTables(args.path)
+    if args.build:
+        tables.build()
+        tables.save()
+        print(f"Kaydedildi: {args.path} ({os.path.getsize(args.path)} bayt, {tables.stats['built_seconds']}s)")
+    else:
+        tables.ensure(background=False)
+
+    if args.probe:
+        board = chess.Board(args.probe)
+        print(f"Sonuç: {tables.probe(board)}")
+        move = tables.best_move(board)
+        print(f"En iyi hamle: {board.san(move) if move else None}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# engine_binary.py
+# Çalışılan makinenin CPU özelliklerini okuyup (scripts/get_native_properties.sh
+# ile aynı mantık) bu makinede çalışabilecek en hızlı Stockfish binary'sini seçer.
+# Uygun bir hazır binary yoksa depodaki src/ kaynaklarını yerel mimari ve PGO
+# (profile-build) ile derleyip önbellek dizinine koyan bir yardımcı da içerir.
+#
+# Kullanım:
+#   python engine_binary.py            # tespit edilen mimari ve seçilen binary
+#   python engine_binary.py --build    # uygun binary yoksa kaynaktan derle
+import argparse
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# --- CONFIGURATION ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get(
+    "STOCKFISH_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "chess-backend")
+)
+# Hazır binary'lerin arandığı dizinler (öncelik sırasıyla)
+SEARCH_DIRS = [os.path.join(BASE_DIR, "stockfish_linux"), BASE_DIR]
+# Eski sürümlerde sabit yazılmış dosya adları
+LEGACY_NAMES = {
+    "x86-64-avx2": ["stockfish-ubuntu-x86-64-avx2"],
+    "armv8": ["stockfish_arm"],
+}
+
+# Hızlıdan yavaşa x86-64 mimarileri ve gerektirdikleri CPU bayrakları.
+# vnni256, AVX-512 VNNI işlemcilerde Stockfish için genelde vnni512'den hızlıdır.
+X86_ARCHS = [
+    ("x86-64-vnni256", {"avx512vnni", "avx512dq", "avx512f", "avx512bw", "avx512vl"}),
+    ("x86-64-vnni512", {"avx512vnni", "avx512dq", "avx512f", "avx512bw", "avx512vl"}),
+    ("x86-64-avx512", {"avx512f", "avx512bw"}),
+    ("x86-64-avxvnni", {"avxvnni", "avx2", "bmi2"}),
+    ("x86-64-bmi2", {"bmi2", "avx2"}),
+    ("x86-64-avx2", {"avx2"}),
+    ("x86-64-sse41-popcnt", {"sse41", "popcnt"}),
+    ("x86-64-ssse3", {"ssse3"}),
+    ("x86-64", set()),
+]
+ARM64_ARCHS = [
+    ("armv8-dotprod", {"asimddp"}),
+    ("armv8", set()),
+]
+
+
+def _normalize_flags(text):
+    # gcc avx512vnni yazar, /proc/cpuinfo avx512_vnni; bazı sistemler sse4_1, bazıları sse4.1
+    return {flag.replace("_", "").replace(".", "").lower() for flag in text.split()}
+
+
+def read_cpu_flags():
+    """İşlemcinin desteklediği özellik bayraklarını küme olarak döndürür."""
+    if sys.platform == "darwin":
+        try:
+            out = subprocess.run(
+                ["sysctl", "-n", "machdep.cpu.features", "machdep.cpu.leaf7_features"],
+                capture_output=True, text=True, check=False
+            ).stdout
+            return _normalize_flags(out)
+        except OSError:
+            return set()
+
+    flags_line = ""
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key.strip() in ("flags", "Features"):
+                    flags_line = value
+    except OSError:
+        return set()
+    return _normalize_flags(flags_line)
+
+
+def _is_znver_1_2():
+    # Zen 1/2 işlemcilerde pext/pdep mikrokodla çalışır, bmi2 build'i yavaştır.
+    vendor = family = None
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "vendor_id" and vendor is None:
+                    vendor = value.strip()
+                elif key == "cpu family" and family is None:
+                    family = value.strip()
+    except OSError:
+        return False
+    return vendor == "AuthenticAMD" and family == "23"
+
+
+def compatible_archs(machine=None, flags=None):
+    """Bu makinede çalışabilecek Stockfish ARCH adlarını hızlıdan yavaşa döndürür."""
+    machine = (machine or platform.machine()).lower()
+    flags = read_cpu_flags() if flags is None else flags
+
+    if sys.platform == "darwin" and machine == "arm64":
+        return ["apple-silicon", "armv8"]
+    if machine in ("aarch64", "arm64"):
+        return [arch for arch, required in ARM64_ARCHS if required <= flags]
+    if machine in ("x86_64", "amd64"):
+        znver_1_2 = _is_znver_1_2()
+        return [
+            arch for arch, required in X86_ARCHS
+            if required <= flags and not (znver_1_2 and arch == "x86-64-bmi2")
+        ]
+    return ["general-64" if sys.maxsize > 2**32 else "general-32"]
+
+
+def _os_tag():
+    if sys.platform == "darwin":
+        return "macos"
+    if sys.platform.startswith("win"):
+        return "windows"
+    if "ANDROID_ROOT" in os.environ:
+        return "android"
+    return "ubuntu"
+
+
+def candidate_names(arch):
+    """Belirli bir mimari için aranacak dosya adları."""
+    ext = ".exe" if sys.platform.startswith("win") else ""
+    names = [f"stockfish-native-{arch}{ext}", f"stockfish-{_os_tag()}-{arch}{ext}", f"stockfish-{arch}{ext}"]
+    return names + LEGACY_NAMES.get(arch, [])
+
+
+def find_prebuilt(archs, search_dirs=None):
+    """Uyumlu mimariler arasından diskte bulunan en hızlı binary'yi döndürür: (arch, yol)."""
+    search_dirs = [CACHE_DIR] + list(search_dirs or SEARCH_DIRS)
+    for arch in archs:
+        for directory in search_dirs:
+            for name in candidate_names(arch):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    return arch, path
+    return None, None
+
+
+def build_native(arch, cache_dir=CACHE_DIR, source_root=BASE_DIR, jobs=None, pgo=True):
+    """Depodaki src/ dizinini verilen mimari için derler ve önbelleğe koyar.
+
+    Makefile `../scripts` dizinine baktığı için src/ ve scripts/ geçici bir
+    dizine birlikte kopyalanır; NNUE ağı `make net` ile indirilir.
+    Derlenen binary'nin yolunu döndürür.
+    """
+    ext = ".exe" if sys.platform.startswith("win") else ""
+    os.makedirs(cache_dir, exist_ok=True)
+    target = os.path.join(cache_dir, f"stockfish-native-{arch}{ext}")
+    jobs = jobs or os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory(dir=cache_dir, prefix="build-") as build_root:
+        shutil.copytree(os.path.join(source_root, "src"), os.path.join(build_root, "src"))
+        shutil.copytree(os.path.join(source_root, "scripts"), os.path.join(build_root, "scripts"))
+        src_dir = os.path.join(build_root, "src")
+        make_target = "profile-build" if pgo else "build"
+        print(f"Stockfish derleniyor: make {make_target} ARCH={arch} (-j{jobs})")
+        subprocess.run(["make", f"-j{jobs}", make_target, f"ARCH={arch}"], cwd=src_dir, check=True)
+        shutil.move(os.path.join(src_dir, f"stockfish{ext}"), target)
+
+    os.chmod(target, 0o755)
+    print(f"Stockfish derlendi: {target}")
+    return target
+
+
+def resolve_stockfish_path(default=None, build_if_missing=False, search_dirs=None):
+    """Bu makine için en uygun Stockfish binary yolunu döndürür.
+
+    STOCKFISH_PATH ortam değişkeni her zaman önceliklidir. Hazır binary
+    bulunamazsa ve build_if_missing verilmişse kaynaktan derlenir; o da
+    olmazsa `default` döndürülür.
+    """
+    override = os.environ.get("STOCKFISH_PATH")
+    if override:
+        return override
+
+    archs = compatible_archs()
+    arch, path = find_prebuilt(archs, search_dirs)
+    if path:
+        if archs and arch != archs[0]:
+            print(f"Not: {archs[0]} için binary yok, {arch} kullanılıyor: {path}")
+        return path
+
+    if build_if_missing and archs:
+        try:
+            return build_native(archs[0])
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"HATA: Stockfish derlenemedi: {e}")
+
+    return default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bu makine için en hızlı Stockfish binary'sini bulur veya derler.")
+    parser.add_argument("--build", action="store_true", help="Uygun hazır binary yoksa kaynaktan derle")
+    parser.add_argument("--force-build", action="store_true", help="Hazır binary olsa bile derle")
+    parser.add_argument("--no-pgo", action="store_true", help="profile-build yerine düz build kullan")
+    parser.add_argument("--jobs", type=int, default=None, help="make -j değeri")
+    args = parser.parse_args(argv)
+
+    archs = compatible_archs()
+    print(f"Uyumlu mimariler: {', '.join(archs) or '-'}")
+    arch, path = find_prebuilt(archs)
+
+    if args.force_build or (args.build and arch != (archs[0] if archs else None)):
+        path = build_native(archs[0], jobs=args.jobs, pgo=not args.no_pgo)
+    if not path:
+        print("Uygun Stockfish binary bulunamadı. --build ile derleyebilirsiniz.")
+        return 1
+    print(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
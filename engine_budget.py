@@ -0,0 +1,174 @@
+# engine_budget.py
+# Konteynerin (cgroup) bellek ve CPU sınırlarını okuyup motor havuzunu bu
+# sınırlara sığdıran bütçe planlayıcı.
+#
+# Her Stockfish süreci kendi NNUE ağlarını ve kendi Hash tablosunu tutar.
+# Plan; worker sayısını, worker başına Hash (MB) ve Threads değerini seçer.
+# BudgetWatcher sınırları periyodik olarak yeniden okur, değiştiklerinde planı
+# yeniden hesaplayıp havuza uygular.
+import os
+import threading
+import time
+
+# --- CONFIGURATION ---
+# Python/Flask süreci ve işletim sistemi için ayrılan bellek (MB)
+RESERVED_MB = int(os.environ.get("ENGINE_BUDGET_RESERVED_MB", 256))
+# Hash dışında bir Stockfish sürecinin kullandığı bellek: NNUE ağları, thread yığınları (MB)
+ENGINE_BASE_MB = int(os.environ.get("ENGINE_BUDGET_BASE_MB", 80))
+# Stockfish'in varsayılanı 16MB; altına inmeye değmez
+MIN_HASH_MB = 16
+MAX_HASH_MB = int(os.environ.get("ENGINE_BUDGET_MAX_HASH_MB", 1024))
+WATCH_INTERVAL = float(os.environ.get("ENGINE_BUDGET_INTERVAL", 30))
+# Aynı sınırları paylaşan web süreci sayısı (serve.py ayarlar); her süreç payını planlar
+BUDGET_PROCESSES = max(1, int(os.environ.get("ENGINE_BUDGET_PROCESSES", 1)))
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def _read_first_line(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def read_memory_limit_mb():
+    """cgroup v2/v1 bellek sınırı; sınır yoksa fiziksel bellek (MB)."""
+    limit = None
+    value = _read_first_line(os.path.join(CGROUP_ROOT, "memory.max"))
+    if value and value != "max":
+        limit = int(value)
+    else:
+        value = _read_first_line(os.path.join(CGROUP_ROOT, "memory", "memory.limit_in_bytes"))
+        # cgroup v1 "sınırsız" durumda çok büyük bir sayı döndürür
+        if value and int(value) < 1 << 60:
+            limit = int(value)
+
+    try:
+        physical = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        physical = None
+
+    if limit is None or (physical and physical < limit):
+        limit = physical
+    return limit // (1024 * 1024) if limit else None
+
+
+def read_cpu_limit():
+    """cgroup CPU kotası ve CPU affinity'den kullanılabilir çekirdek sayısı."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = period = None
+    value = _read_first_line(os.path.join(CGROUP_ROOT, "cpu.max"))
+    if value:
+        parts = value.split()
+        if parts[0] != "max":
+            quota, period = int(parts[0]), int(parts[1])
+    else:
+        q = _read_first_line(os.path.join(CGROUP_ROOT, "cpu", "cpu.cfs_quota_us"))
+        p = _read_first_line(os.path.join(CGROUP_ROOT, "cpu", "cpu.cfs_period_us"))
+        if q and p and int(q) > 0:
+            quota, period = int(q), int(p)
+
+    if quota and period:
+        cpus = min(cpus, max(1, quota // period))
+    return cpus
+
+
+def read_limits(processes=None):
+    """Bu sürecin payına düşen bellek (MB) ve çekirdek sayısı."""
+    processes = processes or BUDGET_PROCESSES
+    memory_mb = read_memory_limit_mb()
+    return {
+        "memory_mb": memory_mb // processes if memory_mb else None,
+        "cpus": max(1, read_cpu_limit() // processes),
+    }
+
+
+def plan_engine_budget(limits, max_workers=None):
+    """Sınırlara sığan havuz planını döndürür.
+
+    Önce çekirdek sayısı kadar (en fazla max_workers) tek thread'li worker
+    hedeflenir; bellek bunu taşımıyorsa worker sayısı en az 16MB Hash ile
+    sığacak kadar azaltılır. Artan bellek Hash'e, artan çekirdekler Threads'e
+    dağıtılır.
+    """
+    cpus = max(1, limits.get("cpus") or 1)
+    memory_mb = limits.get("memory_mb")
+    workers = cpus if max_workers is None else max(1, min(cpus, max_workers))
+
+    if memory_mb:
+        usable_mb = max(0, memory_mb - RESERVED_MB)
+        fit = usable_mb // (ENGINE_BASE_MB + MIN_HASH_MB)
+        workers = max(1, min(workers, fit))
+        hash_mb = (usable_mb - workers * ENGINE_BASE_MB) // workers
+        hash_mb = max(MIN_HASH_MB, min(MAX_HASH_MB, hash_mb))
+    else:
+        usable_mb = None
+        hash_mb = MIN_HASH_MB
+
+    threads = max(1, cpus // workers)
+    return {
+        "limits": dict(limits),
+        "usable_mb": usable_mb,
+        "workers": workers,
+        "hash_mb": hash_mb,
+        "threads": threads,
+        "estimated_mb": workers * (ENGINE_BASE_MB + hash_mb),
+    }
+
+
+def plan_engine_options(plan):
+    """Plana göre her motora uygulanacak UCI seçenekleri."""
+    return {"Hash": plan["hash_mb"], "Threads": plan["threads"]}
+
+
+class BudgetWatcher:
+    """Sınırları periyodik olarak okuyup değiştiklerinde planı havuza uygular."""
+
+    def __init__(self, pool, max_workers=None, interval=WATCH_INTERVAL):
+        self.pool = pool
+        self.max_workers = max_workers
+        self.interval = interval
+        self.limits = read_limits()
+        self.plan = plan_engine_budget(self.limits, max_workers)
+        self.applied_at = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def apply(self):
+        self.pool.apply_budget(self.plan["workers"], plan_engine_options(self.plan))
+        self.applied_at = int(time.time())
+
+    def check(self):
+        """Sınırlar değiştiyse yeni planı uygular; değiştiyse True döndürür."""
+        limits = read_limits()
+        if limits == self.limits:
+            return False
+        self.limits = limits
+        self.plan = plan_engine_budget(limits, self.max_workers)
+        print(f"Kaynak sınırları değişti, yeni motor planı: {self.plan}")
+        self.apply()
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Bütçe kontrolü sırasında hata: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="engine-budget", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        return {"plan": self.plan, "applied_at": self.applied_at, "interval": self.interval}
@@ -0,0 +1,154 @@
+# engine_client.py
+# engine_server.py'ye bağlanan istemci. RemoteEnginePool, EnginePool ile aynı
+# arayüzü sunar (available, acquire, snapshot, plan_snapshot); böylece app.py
+# motorların yerel mi yoksa ayrı bir süreçte mi çalıştığını bilmeden kullanır.
+import itertools
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import chess.engine
+
+from engine_pool import EnginePoolTimeout
+from engine_protocol import (
+    connect, send_frame, recv_frame, encode_board, encode_limit,
+    decode_analysis, decode_play_result, ProtocolError
+)
+
+# --- CONFIGURATION ---
+CONNECT_TIMEOUT = float(os.environ.get("ENGINE_SERVER_CONNECT_TIMEOUT", 2.0))
+# Arama istekleri için soket zaman aşımı; motor limitlerinden uzun olmalı
+REQUEST_TIMEOUT = float(os.environ.get("ENGINE_SERVER_REQUEST_TIMEOUT", 120.0))
+# Sunucu erişilebilirliği bu kadar saniye önbelleğe alınır
+AVAILABILITY_TTL = 5.0
+
+
+class RemoteEngineError(chess.engine.EngineError):
+    """Motor sunucusu hata döndürdü veya erişilemiyor."""
+
+
+class RemoteWorker:
+    """Bir oyun için sunucudaki motoru temsil eder (EngineWorker ile aynı arayüz)."""
+
+    def __init__(self, client, game_id, acquire_timeout=None):
+        self.client = client
+        self.game_id = game_id
+        # Sunucu bu sürede boş motor bulamazsa istek EnginePoolTimeout ile döner
+        self.acquire_timeout = acquire_timeout
+        self.options = {}
+        self._current_request = None
+
+    def configure(self, options):
+        # Seçenekler bir sonraki istekle birlikte gönderilir
+        self.options.update(options)
+
+    def _request(self, op, board, limit, **fields):
+        request_id = uuid.uuid4().hex
+        self._current_request = request_id
+        try:
+            return self.client.request({
+                "id": request_id,
+                "op": op,
+                "game": self.game_id,
+                "board": encode_board(board),
+                "limit": encode_limit(limit),
+                "options": self.options,
+                "acquire_timeout": self.acquire_timeout,
+                **fields
+            })
+        finally:
+            self._current_request = None
+
+    def analyse(self, board, limit, multipv=None, **kwargs):
+        return decode_analysis(self._request("analyse", board, limit, multipv=multipv))
+
+    def play(self, board, limit, **kwargs):
+        return decode_play_result(self._request("play", board, limit))
+
+    def stop(self):
+        """Süren analizi erken bitirir (başka bir thread'den çağrılır)."""
+        request_id = self._current_request
+        if request_id:
+            self.client.request({"id": uuid.uuid4().hex, "op": "stop", "target": request_id})
+
+
+class RemoteEnginePool:
+    """Motor sunucusuna bağlantı havuzu tutan istemci."""
+
+    def __init__(self, address):
+        self.address = address
+        self._idle = []
+        self._lock = threading.Lock()
+        self._available = None
+        self._checked_at = 0.0
+        self._ids = itertools.count()
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        sock = connect(self.address, timeout=CONNECT_TIMEOUT)
+        sock.settimeout(REQUEST_TIMEOUT)
+        return sock
+
+    def _checkin(self, sock):
+        with self._lock:
+            self._idle.append(sock)
+
+    def request(self, message):
+        """İsteği gönderir, cevabın `result` alanını döndürür."""
+        try:
+            sock = self._checkout()
+        except OSError as e:
+            raise RemoteEngineError(f"Motor sunucusuna bağlanılamadı ({self.address}): {e}")
+        try:
+            send_frame(sock, message)
+            response = recv_frame(sock)
+        except (OSError, ProtocolError) as e:
+            sock.close()
+            raise RemoteEngineError(f"Motor sunucusu ile iletişim hatası: {e}")
+        if response is None:
+            sock.close()
+            raise RemoteEngineError("Motor sunucusu bağlantıyı kapattı.")
+        self._checkin(sock)
+        if response.get("busy"):
+            raise EnginePoolTimeout(response.get("error", "Boş motor bulunamadı."))
+        if not response.get("ok"):
+            raise RemoteEngineError(response.get("error", "Bilinmeyen sunucu hatası"))
+        return response.get("result")
+
+    def ping(self):
+        return self.request({"id": f"ping-{next(self._ids)}", "op": "ping"})
+
+    @property
+    def available(self):
+        now = time.monotonic()
+        if self._available is None or now - self._checked_at > AVAILABILITY_TTL:
+            try:
+                self._available = bool(self.ping().get("available"))
+            except RemoteEngineError as e:
+                print(f"HATA: {e}")
+                self._available = False
+            self._checked_at = now
+        return self._available
+
+    @contextmanager
+    def acquire(self, game_id, timeout=None):
+        # Motor seçimi (oyun eşleşmesi) sunucu tarafında her istekte yapılır. Sunucu
+        # havuzu tüm web worker'larca paylaşıldığından meşguliyet de orada ölçülür:
+        # timeout her istekle gönderilir ve sunucuda aşılırsa EnginePoolTimeout atılır.
+        yield RemoteWorker(self, game_id, timeout)
+
+    def snapshot(self):
+        return self.request({"id": f"stats-{next(self._ids)}", "op": "stats"})["pool"]
+
+    def plan_snapshot(self):
+        return self.request({"id": f"stats-{next(self._ids)}", "op": "stats"})["plan"]
+
+    def close(self):
+        with self._lock:
+            sockets, self._idle = self._idle, []
+        for sock in sockets:
+            sock.close()
@@ -0,0 +1,513 @@
+# engine_pool.py
+# Birden fazla Stockfish sürecini yöneten motor havuzu.
+#
+# Aynı oyunun ardışık hamleleri arama ağacının büyük kısmını paylaşır; bu yüzden
+# havuz bir oyunu en son ona hizmet veren motora yönlendirmeye çalışır (sticky
+# affinity). O motor belirli bir süreden fazla meşgulse boştaki başka bir motor
+# kullanılır. Motora her çağrıda `game=<oyun id>` verildiği için python-chess
+# `ucinewgame` komutunu yalnızca motor başka bir oyuna geçtiğinde gönderir;
+# böylece aynı oyunda transposition table (hash) sıcak kalır.
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import chess
+import chess.engine
+
+from engine_budget import BudgetWatcher
+
+# --- CONFIGURATION ---
+# Tercih edilen motor meşgulse başka bir motora geçmeden önce beklenecek süre (saniye)
+DEFAULT_AFFINITY_WAIT = 0.25
+# Otomatik ölçekleme: kuyruk beklemesine ve boşta kalma süresine bakılan pencere (saniye)
+AUTOSCALE_WINDOW = 10.0
+AUTOSCALE_INTERVAL = 1.0
+# Havuz, ENGINE_POOL_MIN ile bütçe planının izin verdiği boyut arasında ölçeklenir.
+# ENGINE_POOL_MIN üst sınıra eşitse otomatik ölçekleme kapalıdır.
+ENGINE_POOL_MIN = int(os.environ.get("ENGINE_POOL_MIN", 1))
+ENGINE_POOL_SPARE = int(os.environ.get("ENGINE_POOL_SPARE", 0))
+ENGINE_POOL_IDLE_TIMEOUT = float(os.environ.get("ENGINE_POOL_IDLE_TIMEOUT", 300))
+ENGINE_POOL_GROW_WAIT = float(os.environ.get("ENGINE_POOL_GROW_WAIT", 0.05))
+
+
+class EnginePoolTimeout(Exception):
+    """İstenen sürede boş motor bulunamadı."""
+
+
+class AffinityStats:
+    """Sıcak (aynı oyun) ve soğuk (oyun değişimi) motor kullanımlarının istatistikleri."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.warm_acquires = 0
+        self.cold_acquires = 0
+        self.fallback_acquires = 0
+        # {"warm"/"cold": [toplam derinlik, toplam ms, çağrı sayısı]}
+        self.depth_per_ms = {"warm": [0, 0.0, 0], "cold": [0, 0.0, 0]}
+
+    def record_acquire(self, warm, fallback):
+        with self._lock:
+            if warm:
+                self.warm_acquires += 1
+            else:
+                self.cold_acquires += 1
+            if fallback:
+                self.fallback_acquires += 1
+
+    def record_search(self, warm, depth, elapsed_ms):
+        if not depth or elapsed_ms <= 0:
+            return
+        with self._lock:
+            bucket = self.depth_per_ms["warm" if warm else "cold"]
+            bucket[0] += depth
+            bucket[1] += elapsed_ms
+            bucket[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            total = self.warm_acquires + self.cold_acquires
+            rates = {}
+            for key, (depth, ms, count) in self.depth_per_ms.items():
+                rates[key] = round(depth / ms, 4) if ms else None
+            improvement = None
+            if rates["warm"] and rates["cold"]:
+                improvement = round(rates["warm"] / rates["cold"], 3)
+            return {
+                "acquires": total,
+                "tt_reuse_hit_rate": round(self.warm_acquires / total, 3) if total else None,
+                "fallback_acquires": self.fallback_acquires,
+                "depth_per_ms_warm": rates["warm"],
+                "depth_per_ms_cold": rates["cold"],
+                "depth_per_ms_improvement": improvement,
+            }
+
+
+class EngineWorker:
+    """Havuzdaki tek bir Stockfish süreci.
+
+    `analyse`, `play` ve `configure` metodları SimpleEngine ile aynı şekilde
+    çağrılır; böylece motoru bekleyen kod havuzdan gelen worker'ı doğrudan
+    kullanabilir.
+    """
+
+    def __init__(self, index, engine_path, stats):
+        self.index = index
+        self.engine_path = engine_path
+        self.engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+        self.stats = stats
+        self.game_id = None  # en son hizmet verilen oyun
+        self.busy = False
+        self.warm = False  # şu anki kullanım aynı oyunun devamı mı
+        self.retiring = False  # havuz küçülürken boşalınca kapatılacak
+        self.applied_options = {}
+        self.last_released = time.monotonic()
+
+    def configure(self, options):
+        self.engine.configure(options)
+
+    def analyse(self, board, limit, multipv=None, on_start=None, **kwargs):
+        """SimpleEngine.analyse ile aynı sonucu döndürür.
+
+        `on_start` verilirse çalışan analiz nesnesiyle çağrılır; başka bir
+        thread aramayı bu nesnenin stop() metoduyla erken bitirebilir.
+        """
+        start = time.perf_counter()
+        with self.engine.analysis(board, limit, multipv=multipv, game=self.game_id, **kwargs) as analysis:
+            if on_start is not None:
+                on_start(analysis)
+            analysis.wait()
+        result = analysis.info if multipv is None else analysis.multipv
+        info = result[0] if isinstance(result, list) else result
+        self.stats.record_search(self.warm, info.get("depth"), (time.perf_counter() - start) * 1000)
+        return result
+
+    def play(self, board, limit, **kwargs):
+        kwargs.setdefault("info", chess.engine.INFO_BASIC)
+        start = time.perf_counter()
+        result = self.engine.play(board, limit, game=self.game_id, **kwargs)
+        self.stats.record_search(self.warm, result.info.get("depth"), (time.perf_counter() - start) * 1000)
+        return result
+
+    def restart(self):
+        self.close()
+        self.engine = chess.engine.SimpleEngine.popen_uci(self.engine_path)
+        self.game_id = None
+        self.applied_options = {}
+
+    def close(self):
+        try:
+            self.engine.quit()
+        except Exception:
+            pass
+
+
+class EnginePool:
+    """Oyun-motor eşleşmesini koruyan Stockfish havuzu.
+
+    Motorlar ilk kullanımda başlatılır (fork tabanlı sunucularda her süreç
+    kendi motorlarını açsın diye).
+    """
+
+    def __init__(self, engine_path, size=1, affinity_wait=DEFAULT_AFFINITY_WAIT, options=None,
+                 min_size=None, max_size=None):
+        self.engine_path = engine_path
+        self.size = max(1, size)
+        self.min_size = max(1, min_size or self.size)
+        self.max_size = max(self.min_size, max_size or self.size)
+        self.affinity_wait = affinity_wait
+        # Her motora uygulanacak UCI seçenekleri (Hash, Threads...)
+        self.options = dict(options or {})
+        self.stats = AffinityStats()
+        self.autoscaler = None
+        self.budget = None
+        # Süreç başlatma + NNUE yükleme süresi (saniye, üstel ortalama)
+        self.spawn_cost = None
+        self._workers = []
+        self._indexes = itertools.count()
+        self._cond = threading.Condition()
+        self._waiting = 0
+        self._waits = deque()  # (zaman, bekleme süresi)
+        self._started = False
+        self._closed = False
+
+    def start(self):
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+            for _ in range(self.size):
+                worker = self._spawn()
+                if worker is None:
+                    break
+                self._workers.append(worker)
+
+    def _spawn(self):
+        start = time.monotonic()
+        try:
+            worker = EngineWorker(next(self._indexes), self.engine_path, self.stats)
+            # isready cevabı motorun ağları yükleyip hazır olduğunu gösterir
+            worker.engine.ping()
+        except Exception as e:
+            print(f"HATA: Stockfish motoru başlatılamadı: {e}")
+            return None
+        cost = time.monotonic() - start
+        self.spawn_cost = cost if self.spawn_cost is None else 0.7 * self.spawn_cost + 0.3 * cost
+        return worker
+
+    @property
+    def available(self):
+        self.start()
+        return bool(self._workers)
+
+    def _find_worker(self, game_id):
+        for worker in self._workers:
+            if worker.game_id == game_id and not worker.retiring:
+                return worker
+        return None
+
+    def _pick_idle(self):
+        # Önce hiç oyuna bağlanmamış, sonra en uzun süredir boşta olan motor
+        idle = [w for w in self._workers if not w.busy and not w.retiring]
+        if not idle:
+            return None
+        return min(idle, key=lambda w: (w.game_id is not None, w.last_released))
+
+    def _checkout(self, game_id, timeout):
+        requested = time.monotonic()
+        deadline = None if timeout is None else requested + timeout
+        with self._cond:
+            if not self._workers:
+                raise EnginePoolTimeout("Havuzda çalışan motor yok.")
+            self._waiting += 1
+            try:
+                worker = self._checkout_locked(game_id, deadline)
+            finally:
+                self._waiting -= 1
+            now = time.monotonic()
+            self._waits.append((now, now - requested))
+            while self._waits and self._waits[0][0] < now - AUTOSCALE_WINDOW:
+                self._waits.popleft()
+            return worker
+
+    def _checkout_locked(self, game_id, deadline):
+        # self._cond tutulurken çağrılır
+        preferred = self._find_worker(game_id)
+        if preferred is not None and preferred.busy:
+            affinity_deadline = time.monotonic() + self.affinity_wait
+            if deadline is not None:
+                affinity_deadline = min(affinity_deadline, deadline)
+            while preferred.busy and preferred.game_id == game_id:
+                remaining = affinity_deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+        fallback = False
+        if preferred is not None and not preferred.busy and preferred.game_id == game_id:
+            worker = preferred
+        else:
+            fallback = preferred is not None
+            worker = self._pick_idle()
+            while worker is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise EnginePoolTimeout("Boş motor bulunamadı.")
+                self._cond.wait(remaining)
+                worker = self._pick_idle()
+
+        worker.busy = True
+        worker.warm = worker.game_id == game_id
+        worker.game_id = game_id
+        self.stats.record_acquire(worker.warm, fallback)
+        return worker
+
+    def _checkin(self, worker):
+        with self._cond:
+            worker.busy = False
+            worker.last_released = time.monotonic()
+            retired = worker.retiring and worker in self._workers
+            if retired:
+                self._workers.remove(worker)
+            self._cond.notify_all()
+        if retired:
+            worker.close()
+
+    def resize(self, size):
+        """Havuzu verilen boyuta getirir; fazla motorlar boşaldıklarında kapatılır."""
+        size = max(1, size)
+        to_close = []
+        with self._cond:
+            self.size = size
+            if not self._started:
+                return
+            active = [w for w in self._workers if not w.retiring]
+            missing = size - len(active)
+            if missing < 0:
+                # Önce boştaki, oyunsuz ve en uzun süredir kullanılmayan motorlar
+                active.sort(key=lambda w: (w.busy, w.game_id is not None, w.last_released))
+                for worker in active[:-missing]:
+                    worker.retiring = True
+                    if not worker.busy:
+                        self._workers.remove(worker)
+                        to_close.append(worker)
+        for worker in to_close:
+            worker.close()
+        for _ in range(missing):
+            worker = self._spawn()
+            if worker is None:
+                break
+            # Motor kilit dışında başlatıldı; bu sırada başka bir resize havuzu
+            # doldurmuş olabilir, bu yüzden eklemeden önce yeniden sayılır.
+            with self._cond:
+                surplus = self._closed or sum(1 for w in self._workers if not w.retiring) >= self.size
+                if not surplus:
+                    self._workers.append(worker)
+                    self._cond.notify_all()
+            if surplus:
+                worker.close()
+                break
+
+    def apply_budget(self, size, options):
+        """Bütçe planını uygular: havuz boyutu ve motor seçenekleri.
+
+        Seçenekler motorlara bir sonraki kullanımlarında uygulanır; böylece
+        arama yapan bir motorun Hash tablosu aramanın ortasında değişmez.
+        Otomatik ölçekleme açıksa plan yalnızca üst sınırı belirler.
+        """
+        with self._cond:
+            self.options = dict(options)
+            self.max_size = max(1, size)
+            self.min_size = min(self.min_size, self.max_size)
+            target = self.size if self.autoscaler else self.max_size
+        self.resize(max(self.min_size, min(self.max_size, target)))
+
+    def load_snapshot(self):
+        """Otomatik ölçekleme için anlık yük: meşgul/boş motorlar ve son penceredeki beklemeler."""
+        now = time.monotonic()
+        with self._cond:
+            active = [w for w in self._workers if not w.retiring]
+            idle = [w for w in active if not w.busy]
+            waits = [wait for at, wait in self._waits if at >= now - AUTOSCALE_WINDOW]
+            return {
+                "size": len(active),
+                "busy": len(active) - len(idle),
+                "idle": len(idle),
+                "waiting": self._waiting,
+                "window_requests": len(waits),
+                "window_wait": sum(waits),
+                "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+                "longest_idle": max((now - w.last_released for w in idle), default=0.0),
+            }
+
+    @contextmanager
+    def acquire(self, game_id, timeout=None):
+        """Oyun için bir motor ayırır; tercihen o oyuna en son hizmet veren motoru."""
+        self.start()
+        worker = self._checkout(game_id, timeout)
+        try:
+            if worker.applied_options != self.options:
+                options = dict(self.options)
+                worker.configure(options)
+                worker.applied_options = options
+            yield worker
+        except chess.engine.EngineTerminatedError:
+            print(f"Motor #{worker.index} kapandı, yeniden başlatılıyor.")
+            worker.restart()
+            raise
+        finally:
+            self._checkin(worker)
+
+    def plan_snapshot(self):
+        return self.budget.snapshot() if self.budget else None
+
+    def engine_pids(self):
+        """Çalışan motor süreçleri: [(motor no, pid)] (metrikler için)."""
+        with self._cond:
+            workers = list(self._workers)
+        return [(w.index, w.engine.transport.get_pid()) for w in workers]
+
+    def snapshot(self):
+        with self._cond:
+            workers = [
+                {"index": w.index, "busy": w.busy, "game_id": w.game_id, "retiring": w.retiring}
+                for w in self._workers
+            ]
+            options = dict(self.options)
+        return {
+            "size": len(workers),
+            "target_size": self.size,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "spawn_cost_ms": round(self.spawn_cost * 1000, 1) if self.spawn_cost is not None else None,
+            "autoscaler": self.autoscaler.snapshot() if self.autoscaler else None,
+            "options": options,
+            "workers": workers,
+            "affinity": self.stats.snapshot()
+        }
+
+    def close(self):
+        if self.autoscaler:
+            self.autoscaler.stop()
+        if self.budget:
+            self.budget.stop()
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        for worker in workers:
+            worker.close()
+
+
+class PoolAutoscaler:
+    """Havuzu min_size ile max_size arasında yüke göre büyütüp küçültür.
+
+    - Büyüme: son penceredeki toplam kuyruk beklemesi, yeni bir motorun
+      başlatılma maliyetini (süreç + NNUE yükleme) aşıyorsa ve ortalama
+      bekleme `grow_wait` eşiğinin üstündeyse bir motor eklenir. Yani bir
+      motor ancak kendini amorti edecek kadar bekleme varken açılır.
+    - Yedek kapasite: en az `spare` motor her zaman boşta ve ısınmış tutulur.
+    - Küçülme: yedeklerin dışında `idle_timeout` saniyedir kullanılmayan bir
+      motor varsa bir motor kapatılır.
+    """
+
+    def __init__(self, pool, spare=0, idle_timeout=300.0, grow_wait=0.05, interval=AUTOSCALE_INTERVAL):
+        self.pool = pool
+        self.spare = spare
+        self.idle_timeout = idle_timeout
+        self.grow_wait = grow_wait
+        self.interval = interval
+        self.grown = 0
+        self.shrunk = 0
+        self.last_decision = None
+        self._thread = None
+        self._stop = threading.Event()
+        pool.autoscaler = self
+
+    def decide(self, load):
+        """Yük anlık görüntüsünden hedef havuz boyutunu hesaplar."""
+        pool = self.pool
+        size = load["size"]
+        spawn_cost = pool.spawn_cost or 0.0
+
+        if size < pool.max_size:
+            if load["idle"] < self.spare:
+                return min(pool.max_size, size + self.spare - load["idle"]), "spare"
+            # Boşta motor varken büyümek bekleyenlere yardım etmez
+            saturated = load["waiting"] > 0 or load["idle"] == 0
+            sustained = load["avg_wait"] >= self.grow_wait and load["window_requests"] > 1
+            if saturated and sustained and load["window_wait"] >= spawn_cost:
+                return size + 1, "queue_wait"
+
+        if size > pool.min_size and load["idle"] > self.spare and load["longest_idle"] >= self.idle_timeout:
+            return size - 1, "idle"
+
+        return size, None
+
+    def step(self):
+        load = self.pool.load_snapshot()
+        target, reason = self.decide(load)
+        if reason is None or target == load["size"]:
+            return False
+        self.last_decision = {"at": int(time.time()), "from": load["size"], "to": target, "reason": reason}
+        if target > load["size"]:
+            self.grown += target - load["size"]
+        else:
+            self.shrunk += load["size"] - target
+        print(f"Motor havuzu ölçekleniyor: {load['size']} -> {target} ({reason})")
+        self.pool.resize(target)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.pool._started:
+                    self.step()
+            except Exception as e:
+                print(f"Otomatik ölçekleme sırasında hata: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="engine-autoscale", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        return {
+            "spare": self.spare,
+            "idle_timeout": self.idle_timeout,
+            "grow_wait": self.grow_wait,
+            "grown": self.grown,
+            "shrunk": self.shrunk,
+            "last_decision": self.last_decision,
+        }
+
+
+def create_engine_pool(engine_path, max_size):
+    """Bütçe planlayıcı ve (açıksa) otomatik ölçekleme ile yapılandırılmış havuz.
+
+    max_size (ENGINE_POOL_SIZE veya kalibrasyon) üst sınırdır; asıl boyut
+    konteynerin bellek/CPU sınırlarına göre planlanır.
+    """
+    pool = EnginePool(
+        engine_path,
+        size=min(ENGINE_POOL_MIN + ENGINE_POOL_SPARE, max_size),
+        min_size=min(ENGINE_POOL_MIN, max_size),
+        max_size=max_size
+    )
+    if pool.min_size < pool.max_size:
+        PoolAutoscaler(
+            pool,
+            spare=ENGINE_POOL_SPARE,
+            idle_timeout=ENGINE_POOL_IDLE_TIMEOUT,
+            grow_wait=ENGINE_POOL_GROW_WAIT
+        ).start()
+    pool.budget = BudgetWatcher(pool, max_workers=max_size)
+    pool.budget.apply()
+    pool.budget.start()
+    return pool
@@ -0,0 +1,160 @@
+# engine_protocol.py
+# engine_server.py ile engine_client.py arasındaki çerçeveli (framed) protokol.
+#
+# Her mesaj: 4 baytlık big-endian uzunluk + sıkıştırılmış (boşluksuz) UTF-8 JSON.
+# İstek:  {"id": "...", "op": "analyse"|"play"|"stop"|"ping"|"stats", ...}
+# Cevap:  {"id": "...", "ok": true, "result": ...} veya {"id": "...", "ok": false, "error": "..."}
+# analyse/play isteğindeki "acquire_timeout" süresinde boş motor bulunamazsa
+# cevap {"ok": false, "busy": true, ...} olur.
+#
+# Pozisyon başlangıç FEN'i + hamle listesi olarak gönderilir; böylece motor
+# tekrar (repetition) kurallarını da görür.
+import json
+import socket
+import struct
+
+import chess
+import chess.engine
+
+# --- CONFIGURATION ---
+HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+# Info sözlüğünden taşınan alanlar (score ve pv ayrıca çevrilir)
+INFO_KEYS = ("depth", "seldepth", "multipv", "nodes", "nps", "time", "hashfull", "tbhits")
+
+
+class ProtocolError(Exception):
+    """Bozuk veya beklenmeyen çerçeve."""
+
+
+def parse_address(address):
+    """'unix:/yol/soket' veya 'tcp:host:port' ('host:port') adresini çözer."""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    if address.startswith("tcp:"):
+        address = address[len("tcp:"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def connect(address, timeout=None):
+    family, target = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(target)
+    except OSError:
+        sock.close()
+        raise
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def send_frame(sock, message):
+    payload = json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock):
+    """Bir çerçeve okur; bağlantı düzgün kapandıysa None döndürür."""
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    (size,) = HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Çerçeve çok büyük: {size} bayt")
+    payload = _recv_exact(sock, size)
+    if payload is None:
+        raise ProtocolError("Bağlantı çerçeve ortasında kapandı.")
+    return json.loads(payload.decode("utf-8"))
+
+
+# --- BOARD / LIMIT ---
+def encode_board(board):
+    root = board.root()
+    return {"fen": root.fen(), "moves": [move.uci() for move in board.move_stack]}
+
+
+def decode_board(data):
+    board = chess.Board(data["fen"])
+    for uci in data.get("moves", ()):
+        board.push_uci(uci)
+    return board
+
+
+def encode_limit(limit):
+    return {
+        key: getattr(limit, key)
+        for key in ("time", "depth", "nodes", "mate")
+        if getattr(limit, key) is not None
+    }
+
+
+def decode_limit(data):
+    return chess.engine.Limit(**data)
+
+
+# --- RESULTS ---
+def encode_info(info):
+    data = {key: info[key] for key in INFO_KEYS if key in info}
+    if "score" in info:
+        relative = info["score"].relative
+        if relative.is_mate():
+            data["score"] = {"mate": relative.mate()}
+        else:
+            data["score"] = {"cp": relative.score()}
+        data["turn"] = info["score"].turn
+    if "pv" in info:
+        data["pv"] = [move.uci() for move in info["pv"]]
+    return data
+
+
+def decode_info(data):
+    info = {key: data[key] for key in INFO_KEYS if key in data}
+    if "score" in data:
+        score = data["score"]
+        relative = chess.engine.Mate(score["mate"]) if "mate" in score else chess.engine.Cp(score["cp"])
+        info["score"] = chess.engine.PovScore(relative, data["turn"])
+    if "pv" in data:
+        info["pv"] = [chess.Move.from_uci(uci) for uci in data["pv"]]
+    return info
+
+
+def encode_analysis(result):
+    if isinstance(result, list):
+        return [encode_info(info) for info in result]
+    return encode_info(result)
+
+
+def decode_analysis(data):
+    if isinstance(data, list):
+        return [decode_info(info) for info in data]
+    return decode_info(data)
+
+
+def encode_play_result(result):
+    return {
+        "move": result.move.uci() if result.move else None,
+        "ponder": result.ponder.uci() if result.ponder else None,
+        "info": encode_info(result.info),
+    }
+
+
+def decode_play_result(data):
+    return chess.engine.PlayResult(
+        chess.Move.from_uci(data["move"]) if data.get("move") else None,
+        chess.Move.from_uci(data["ponder"]) if data.get("ponder") else None,
+        decode_info(data.get("info", {}))
+    )
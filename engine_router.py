@@ -0,0 +1,311 @@
+# engine_router.py
+# Oyunları birden fazla motor sunucusuna (engine_server.py) dağıtan yönlendirici.
+#
+# Oyun id'leri tutarlı hash (consistent hashing) halkası ile düğümlere eşlenir;
+# her düğümün yükü ortalamanın (1 + epsilon) katıyla sınırlandırılır (bounded
+# load). Bir oyun atandığı düğümde kalır, böylece o düğümdeki motorun Hash
+# tablosu sıcak kalır. Düğüm eklenince yalnızca halkada yeni düğüme düşen
+# oyunlar, düğüm çıkınca yalnızca o düğümün oyunları taşınır.
+#
+# Kullanım (yerelde birkaç sunucu ile deneme):
+#   python engine_router.py --spawn-local 3 --engine ./stockfish
+#   ENGINE_NODES=unix:/tmp/chess-engine-0.sock,unix:/tmp/chess-engine-1.sock python app.py
+#   python engine_router.py --simulate 10000 --nodes a,b,c,d   # dağılım ve taşınma ölçümü
+import argparse
+import bisect
+import hashlib
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from engine_client import RemoteEnginePool, RemoteEngineError
+
+# --- CONFIGURATION ---
+VIRTUAL_NODES = 128
+LOAD_EPSILON = float(os.environ.get("ENGINE_ROUTER_EPSILON", 0.25))
+HEALTH_INTERVAL = float(os.environ.get("ENGINE_ROUTER_HEALTH_INTERVAL", 5.0))
+# Bu kadar arka arkaya başarısız kontrol düğümü devre dışı bırakır
+HEALTH_FAILURES = 2
+# Bu süre boyunca istek gelmeyen oyunun ataması unutulur (saniye)
+ASSIGNMENT_TTL = float(os.environ.get("ENGINE_ROUTER_ASSIGNMENT_TTL", 3600))
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Sanal düğümlü tutarlı hash halkası."""
+
+    def __init__(self, nodes=(), virtual_nodes=VIRTUAL_NODES):
+        self.virtual_nodes = virtual_nodes
+        self._points = []  # sıralı hash değerleri
+        self._owners = []  # aynı sırada düğüm adları
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        for i in range(self.virtual_nodes):
+            point = _hash(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node):
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def walk(self, key):
+        """Anahtarın halkadaki yerinden başlayarak düğümleri (tekrarsız) sırayla verir."""
+        if not self._points:
+            return
+        start = bisect.bisect(self._points, _hash(key))
+        seen = set()
+        for offset in range(len(self._points)):
+            owner = self._owners[(start + offset) % len(self._points)]
+            if owner not in seen:
+                seen.add(owner)
+                yield owner
+
+
+class GameRouter:
+    """Oyun -> düğüm ataması (sınırlı yüklü tutarlı hash)."""
+
+    def __init__(self, nodes=(), epsilon=LOAD_EPSILON, assignment_ttl=ASSIGNMENT_TTL):
+        self.epsilon = epsilon
+        self.assignment_ttl = assignment_ttl
+        self.ring = HashRing()
+        self.nodes = set()
+        self.assignments = {}  # oyun id -> (düğüm, son kullanım)
+        self.loads = {}
+        self.moved = 0
+        self._lock = threading.Lock()
+        for node in nodes:
+            self.add_node(node)
+
+    def _capacity(self, extra=0):
+        total = len(self.assignments) + extra
+        return max(1, math.ceil((1 + self.epsilon) * total / len(self.nodes)))
+
+    def _choose(self, game_id):
+        capacity = self._capacity(extra=1)
+        for node in self.ring.walk(game_id):
+            if self.loads[node] < capacity:
+                return node
+        return None
+
+    def _assign(self, game_id, node, now):
+        old = self.assignments.get(game_id)
+        if old is not None:
+            self.loads[old[0]] -= 1
+        self.assignments[game_id] = (node, now)
+        self.loads[node] += 1
+
+    def _expire(self, now):
+        for game_id, (node, used) in list(self.assignments.items()):
+            if now - used > self.assignment_ttl:
+                del self.assignments[game_id]
+                self.loads[node] -= 1
+
+    def route(self, game_id):
+        """Oyunun düğümünü döndürür; gerekirse yeni atama yapar."""
+        now = time.monotonic()
+        with self._lock:
+            if not self.nodes:
+                return None
+            current = self.assignments.get(game_id)
+            if current is not None:
+                self.assignments[game_id] = (current[0], now)
+                return current[0]
+            if len(self.assignments) % 1024 == 0:
+                self._expire(now)
+            node = self._choose(game_id)
+            self._assign(game_id, node, now)
+            return node
+
+    def add_node(self, node):
+        """Düğüm ekler; halkada yeni düğüme düşen oyunları ona taşır. Taşınan sayısını döndürür."""
+        with self._lock:
+            if node in self.nodes:
+                return 0
+            self.nodes.add(node)
+            self.loads[node] = 0
+            self.ring.add(node)
+            moved = 0
+            capacity = self._capacity()
+            for game_id, (current, used) in list(self.assignments.items()):
+                if self.loads[node] >= capacity:
+                    break
+                if next(self.ring.walk(game_id)) == node:
+                    self._assign(game_id, node, used)
+                    moved += 1
+            self.moved += moved
+            return moved
+
+    def remove_node(self, node):
+        """Düğümü çıkarır; yalnızca onun oyunları başka düğümlere dağıtılır."""
+        with self._lock:
+            if node not in self.nodes:
+                return 0
+            self.nodes.discard(node)
+            self.ring.remove(node)
+            orphans = [(g, used) for g, (n, used) in self.assignments.items() if n == node]
+            for game_id, _ in orphans:
+                del self.assignments[game_id]
+            del self.loads[node]
+            if self.nodes:
+                for game_id, used in orphans:
+                    self._assign(game_id, self._choose(game_id), used)
+            self.moved += len(orphans)
+            return len(orphans)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "nodes": sorted(self.nodes),
+                "games": len(self.assignments),
+                "loads": dict(self.loads),
+                "capacity": self._capacity() if self.nodes else None,
+                "moved": self.moved,
+            }
+
+
+class RoutedEnginePool:
+    """Birden fazla motor sunucusunu tek bir havuz gibi gösterir (EnginePool arayüzü)."""
+
+    def __init__(self, addresses, health_interval=HEALTH_INTERVAL):
+        self.clients = {address: RemoteEnginePool(address) for address in addresses}
+        self.router = GameRouter(addresses)
+        self.health_interval = health_interval
+        self.failures = {address: 0 for address in addresses}
+        self._thread = None
+        self._stop = threading.Event()
+
+    def check_health(self):
+        """Her düğümü ping'ler; düşenleri halkadan çıkarır, dönenleri geri ekler."""
+        for address, client in self.clients.items():
+            try:
+                healthy = bool(client.ping().get("available"))
+            except RemoteEngineError:
+                healthy = False
+            if healthy:
+                self.failures[address] = 0
+                if address not in self.router.nodes:
+                    moved = self.router.add_node(address)
+                    print(f"Motor düğümü geri döndü: {address} ({moved} oyun taşındı)")
+            else:
+                self.failures[address] += 1
+                if self.failures[address] >= HEALTH_FAILURES and address in self.router.nodes:
+                    moved = self.router.remove_node(address)
+                    print(f"Motor düğümü devre dışı: {address} ({moved} oyun taşındı)")
+
+    def _run(self):
+        while not self._stop.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                print(f"Düğüm sağlık kontrolünde hata: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="engine-router-health", daemon=True)
+            self._thread.start()
+
+    @property
+    def available(self):
+        return bool(self.router.nodes)
+
+    @contextmanager
+    def acquire(self, game_id, timeout=None):
+        address = self.router.route(game_id)
+        if address is None:
+            raise RemoteEngineError("Sağlıklı motor düğümü yok.")
+        with self.clients[address].acquire(game_id, timeout) as worker:
+            yield worker
+
+    def snapshot(self):
+        nodes = {}
+        for address in self.router.nodes:
+            try:
+                nodes[address] = self.clients[address].snapshot()
+            except RemoteEngineError as e:
+                nodes[address] = {"error": str(e)}
+        return {"router": self.router.snapshot(), "failures": dict(self.failures), "nodes": nodes}
+
+    def plan_snapshot(self):
+        plans = {}
+        for address in self.router.nodes:
+            try:
+                plans[address] = self.clients[address].plan_snapshot()
+            except RemoteEngineError as e:
+                plans[address] = {"error": str(e)}
+        return plans
+
+    def close(self):
+        self._stop.set()
+        for client in self.clients.values():
+            client.close()
+
+
+def spawn_local_servers(count, engine=None, socket_dir="/tmp"):
+    """Yerelde `count` adet engine_server.py başlatır; (süreçler, adresler) döndürür."""
+    server_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "engine_server.py")
+    procs, addresses = [], []
+    for i in range(count):
+        address = f"unix:{os.path.join(socket_dir, f'chess-engine-{i}.sock')}"
+        cmd = [sys.executable, server_script, "--listen", address]
+        if engine:
+            cmd += ["--engine", engine]
+        procs.append(subprocess.Popen(cmd))
+        addresses.append(address)
+    return procs, addresses
+
+
+def simulate(game_count, nodes):
+    """Sentetik oyunlarla dağılımı ve düğüm ekleme/çıkarmada taşınan oyun sayısını ölçer."""
+    router = GameRouter(nodes)
+    for i in range(game_count):
+        router.route(f"game-{i}")
+    print(f"Başlangıç yükleri: {router.snapshot()['loads']}")
+
+    moved = router.remove_node(nodes[-1])
+    print(f"{nodes[-1]} çıkarıldı: {moved} oyun taşındı ({moved / game_count:.1%})")
+    moved = router.add_node(nodes[-1])
+    print(f"{nodes[-1]} geri eklendi: {moved} oyun taşındı ({moved / game_count:.1%})")
+    print(f"Son yükler: {router.snapshot()['loads']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Motor düğümleri arasında oyun yönlendirme araçları.")
+    parser.add_argument("--spawn-local", type=int, default=0, help="Yerelde bu kadar engine_server.py başlat")
+    parser.add_argument("--engine", default=None, help="Sunuculara verilecek Stockfish yolu")
+    parser.add_argument("--simulate", type=int, default=0, help="Bu kadar sentetik oyunla dağılımı ölç")
+    parser.add_argument("--nodes", default="node-0,node-1,node-2,node-3", help="Simülasyon düğüm adları")
+    args = parser.parse_args(argv)
+
+    if args.simulate:
+        simulate(args.simulate, args.nodes.split(","))
+        return 0
+
+    if args.spawn_local:
+        procs, addresses = spawn_local_servers(args.spawn_local, args.engine)
+        print(f"ENGINE_NODES={','.join(addresses)}")
+        try:
+            for proc in procs:
+                proc.wait()
+        except KeyboardInterrupt:
+            for proc in procs:
+                proc.terminate()
+        return 0
+
+    parser.print_help()
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# engine_server.py
+# Motor havuzunu web sürecinden bağımsız çalıştıran sunucu.
+#
+# Web süreçleri yeniden başlatılsa da sıcak motorlar (yüklü NNUE, dolu Hash)
+# burada yaşamaya devam eder; birden fazla web worker aynı motor katmanını
+# paylaşır. Protokol için bkz. engine_protocol.py, istemci için engine_client.py.
+#
+# Kullanım:
+#   python engine_server.py --listen unix:/tmp/chess-engine.sock
+#   python engine_server.py --listen tcp:127.0.0.1:7788
+#   ENGINE_SERVER=unix:/tmp/chess-engine.sock python app.py
+import argparse
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+import chess.engine
+
+from calibrate import load_calibration, recommended_pool_size
+from engine_binary import resolve_stockfish_path
+from engine_pool import EnginePoolTimeout, create_engine_pool
+from engine_protocol import (
+    parse_address, send_frame, recv_frame, decode_board, decode_limit,
+    encode_analysis, encode_play_result, ProtocolError
+)
+
+# --- CONFIGURATION ---
+DEFAULT_LISTEN = os.environ.get("ENGINE_SERVER_LISTEN", "unix:/tmp/chess-engine.sock")
+
+
+class EngineService:
+    """Protokol isteklerini motor havuzuna uygular."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        # Süren analizler: istek id -> python-chess analiz nesnesi (stop için)
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def _register(self, request_id, analysis):
+        with self._lock:
+            self._running[request_id] = analysis
+
+    def handle(self, request):
+        op = request.get("op")
+        if op == "ping":
+            return {"pong": True, "available": self.pool.available}
+        if op == "stats":
+            return {"pool": self.pool.snapshot(), "plan": self.pool.plan_snapshot()}
+        if op == "stop":
+            with self._lock:
+                analysis = self._running.get(request.get("target"))
+            if analysis is not None:
+                analysis.stop()
+            return {"stopped": analysis is not None}
+        if op in ("analyse", "play"):
+            return self._search(op, request)
+        raise ValueError(f"Bilinmeyen işlem: {op}")
+
+    def _search(self, op, request):
+        board = decode_board(request["board"])
+        limit = decode_limit(request.get("limit", {}))
+        with self.pool.acquire(request.get("game"), timeout=request.get("acquire_timeout")) as worker:
+            if request.get("options"):
+                worker.configure(request["options"])
+            if op == "play":
+                return encode_play_result(worker.play(board, limit))
+
+            request_id = request.get("id")
+            try:
+                result = worker.analyse(
+                    board, limit,
+                    multipv=request.get("multipv"),
+                    on_start=lambda analysis: self._register(request_id, analysis)
+                )
+            finally:
+                with self._lock:
+                    self._running.pop(request_id, None)
+            return encode_analysis(result)
+
+
+class EngineRequestHandler(socketserver.BaseRequestHandler):
+    """Tek bir istemci bağlantısı: kapanana kadar istek/cevap çerçeveleri."""
+
+    def handle(self):
+        service = self.server.service
+        while True:
+            try:
+                request = recv_frame(self.request)
+            except (OSError, ProtocolError, ValueError) as e:
+                print(f"Bağlantı hatası: {e}")
+                return
+            if request is None:
+                return
+
+            response = {"id": request.get("id")}
+            try:
+                response["result"] = service.handle(request)
+                response["ok"] = True
+            except EnginePoolTimeout as e:
+                # İstemci bunu EnginePoolTimeout olarak yeniden atar (ör. arka plan işi atlanır)
+                response.update(ok=False, busy=True, error=str(e))
+            except (chess.engine.EngineError, chess.engine.EngineTerminatedError, ValueError, KeyError) as e:
+                response.update(ok=False, error=f"{type(e).__name__}: {e}")
+            except Exception as e:
+                print(f"İstek işlenirken hata: {e}")
+                response.update(ok=False, error=f"{type(e).__name__}: {e}")
+
+            try:
+                send_frame(self.request, response)
+            except OSError:
+                return
+
+
+class ThreadingUnixEngineServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ThreadingTCPEngineServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def create_server(address, service):
+    family, target = parse_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(target):
+            os.unlink(target)
+        server = ThreadingUnixEngineServer(target, EngineRequestHandler)
+    else:
+        server = ThreadingTCPEngineServer(target, EngineRequestHandler)
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stockfish motor havuzunu soket üzerinden sunar.")
+    parser.add_argument("--listen", default=DEFAULT_LISTEN, help="unix:/yol veya tcp:host:port")
+    parser.add_argument("--engine", default=None, help="Stockfish binary yolu (varsayılan: otomatik seçim)")
+    parser.add_argument("--pool-size", type=int, default=None, help="Havuz üst sınırı (varsayılan: kalibrasyon)")
+    args = parser.parse_args(argv)
+
+    engine_path = args.engine or resolve_stockfish_path(
+        build_if_missing=os.environ.get("STOCKFISH_AUTO_BUILD") == "1"
+    )
+    if not engine_path:
+        print("HATA: Stockfish binary bulunamadı.")
+        return 1
+    pool_size = args.pool_size or recommended_pool_size(load_calibration())
+
+    pool = create_engine_pool(engine_path, pool_size)
+    pool.start()
+    if not pool.available:
+        print("HATA: Motor havuzu başlatılamadı.")
+        return 1
+
+    server = create_server(args.listen, EngineService(pool))
+    print(f"Motor sunucusu dinliyor: {args.listen} (havuz: {pool.size}, motor: {engine_path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        family, target = parse_address(args.listen)
+        if family == socket.AF_UNIX and os.path.exists(target):
+            os.unlink(target)
+        pool.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# eval_table.py
+# Worker süreçleri arasında paylaşılan, salt okunur, mmap'lenen değerlendirme tablosu.
+#
+# Önceden hesaplanmış değerlendirmeler (ör. warm_cache.py'nin açılış analizleri)
+# her web worker'ında ayrı bir sözlükte tutulunca bellek worker sayısıyla çarpılır.
+# Bu tablo değişmez, sıralı, sabit kayıtlı bir ikili dosyadır:
+#
+#   başlık   : magic (8) | bayt sırası işareti (4) | kayıt boyutu (4) | kayıt sayısı (8)
+#   anahtarlar: N x uint64 Zobrist hash'i, artan sırada
+#   değerler : N x (skor int16 | hamle uint16 | derinlik uint8 | 3 bayt boşluk)
+#
+# Okuyucu dosyayı mmap'ler; anahtar bölümü memoryview.cast("Q") ile doğrudan
+# bisect edilir, değer struct.unpack_from ile yerinde okunur. Hiçbir şey
+# deserialize edilmez; aynı makinedeki tüm worker'lar işletim sisteminin sayfa
+# önbelleğindeki tek kopyayı paylaşır.
+#
+# Skor: hamle sırasındaki taraf açısından santipiyon; mat skorları
+# ±(MATE_BASE - hamle sayısı) olarak saklanır. Hamle kodu game_session.py ile aynı.
+#
+# Kullanım:
+#   python eval_table.py build analysis_warm.jsonl --output eval_table.bin
+#   python eval_table.py lookup "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+import chess
+
+from analysis_cache import position_key
+from game_session import decode_move, encode_move
+
+# --- CONFIGURATION ---
+EVAL_TABLE_PATH = os.environ.get(
+    "EVAL_TABLE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_table.bin")
+)
+MAGIC = b"CBEVAL01"
+BYTE_ORDER_MARK = 0x01020304
+HEADER = struct.Struct("=8sIIQ")
+VALUE = struct.Struct("=hHB3x")
+MATE_BASE = 32000
+MAX_MATE = 500
+MAX_CP = MATE_BASE - MAX_MATE - 1
+
+
+def encode_table_score(score):
+    """{"cp": ...} / {"mate": ...} -> int16."""
+    if "mate" in score:
+        mate = max(-MAX_MATE, min(MAX_MATE, score["mate"]))
+        return MATE_BASE - mate if mate > 0 else -MATE_BASE - mate
+    return max(-MAX_CP, min(MAX_CP, score["cp"]))
+
+
+def decode_table_score(value):
+    if value > MAX_CP:
+        return {"mate": MATE_BASE - value}
+    if value < -MAX_CP:
+        return {"mate": -MATE_BASE - value}
+    return {"cp": value}
+
+
+def write_table(path, entries):
+    """entries: {zobrist anahtarı: (skor sözlüğü, chess.Move, derinlik)}. Dosya atomik olarak değiştirilir."""
+    keys = array("Q", sorted(entries))
+    values = bytearray(VALUE.size * len(keys))
+    for i, key in enumerate(keys):
+        score, move, depth = entries[key]
+        VALUE.pack_into(values, i * VALUE.size, encode_table_score(score), encode_move(move), min(depth, 255))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, BYTE_ORDER_MARK, VALUE.size, len(keys)))
+        keys.tofile(f)
+        f.write(values)
+    os.replace(tmp_path, path)
+    return len(keys)
+
+
+class EvalTable:
+    """mmap'lenmiş değerlendirme tablosu okuyucusu (thread-safe, salt okunur)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, byte_order, value_size, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Değerlendirme tablosu tanınmadı: {path}")
+        if byte_order != BYTE_ORDER_MARK or value_size != VALUE.size:
+            raise ValueError(f"Değerlendirme tablosu bu makine için uyumsuz: {path}")
+        self.count = count
+        keys_end = HEADER.size + 8 * count
+        self._keys = memoryview(self._mm)[HEADER.size:keys_end].cast("Q")
+        self._values_offset = keys_end
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.count
+
+    def lookup_key(self, key):
+        """Ham kayıt: (skor int16, hamle kodu, derinlik) veya None."""
+        i = bisect_left(self._keys, key)
+        if i < self.count and self._keys[i] == key:
+            self.hits += 1
+            return VALUE.unpack_from(self._mm, self._values_offset + i * VALUE.size)
+        self.misses += 1
+        return None
+
+    def lookup(self, board):
+        """Pozisyonun kaydı: {"move": chess.Move, "score": {...}, "depth": ...} veya None."""
+        record = self.lookup_key(position_key(board))
+        if record is None:
+            return None
+        score, move_code, depth = record
+        return {"move": decode_move(move_code), "score": decode_table_score(score), "depth": depth}
+
+    def close(self):
+        self._keys.release()
+        self._mm.close()
+
+    def snapshot(self):
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": self.count,
+            "bytes": len(self._mm),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+def open_eval_table(path=EVAL_TABLE_PATH):
+    """Tablo dosyası varsa açar, yoksa None döndürür."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return EvalTable(path)
+    except (OSError, ValueError) as e:
+        print(f"UYARI: Değerlendirme tablosu açılamadı: {e}")
+        return None
+
+
+def entries_from_jsonl(paths):
+    """warm_cache.py çıktısı veya {"fen", "pv", "score", "depth"} satırlarından tablo girdileri.
+
+    Aynı pozisyon birden çok kez geçerse en derin analiz kalır.
+    """
+    entries = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    board = chess.Board(record["fen"])
+                    best = record["lines"][0] if "lines" in record else record
+                    move = chess.Move.from_uci(best["pv"][0])
+                except (ValueError, KeyError, IndexError):
+                    continue
+                if move not in board.legal_moves:
+                    continue
+                key = position_key(board)
+                depth = best.get("depth") or 0
+                if key not in entries or entries[key][2] < depth:
+                    entries[key] = (best["score"], move, depth)
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="mmap'lenen değerlendirme tablosunu üretir veya sorgular.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="JSONL analizlerinden tablo üret")
+    build.add_argument("inputs", nargs="+", help="warm_cache.py çıktısı gibi JSONL dosyaları")
+    build.add_argument("--output", default=EVAL_TABLE_PATH)
+    lookup = sub.add_parser("lookup", help="Bir FEN'i tabloda ara")
+    lookup.add_argument("fen")
+    lookup.add_argument("--path", default=EVAL_TABLE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = write_table(args.output, entries_from_jsonl(args.inputs))
+        print(f"Kaydedildi: {args.output} ({count} pozisyon, {os.path.getsize(args.output)} bayt)")
+        return 0
+
+    table = EvalTable(args.path)
+    board = chess.Board(args.fen)
+    entry = table.lookup(board)
+    if entry is None:
+        print("Bulunamadı.")
+        return 1
+    print(f"{board.san(entry['move'])} {entry['score']} derinlik {entry['depth']}")
+    table.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
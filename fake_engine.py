@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# fake_engine.py
+# Yük testleri ve CI için deterministik, sahte bir UCI motoru.
+#
+# Gerçek Stockfish aramaları milisaniyelerden saniyelere sürer ve makineye göre
+# değişir; bu yüzden loadtest.py ile ölçülen gecikmenin ne kadarının Python
+# tarafına (Flask, oturum deposu, motor havuzu, analiz önbelleği) ait olduğu
+# görülemez. Bu motor her `go` komutuna sabit (ayarlanabilir) bir gecikmeyle ve
+# pozisyona göre her zaman aynı yasal hamle ve skorlarla cevap verir:
+#
+#   skor = hamleden sonraki malzeme farkı + pozisyonun Zobrist hash'inden
+#          türetilen küçük bir sapma (mat ve pat doğru raporlanır)
+#
+# Hamleler skora göre sıralanır; MultiPV, searchmoves, depth ve nodes desteklenir.
+# Arama yapılmadığı için tahmin gücü yoktur; yalnızca sunucunun motor
+# protokolü, havuz ve önbellek yollarını gerçek bir süreçle çalıştırmak içindir.
+#
+# Kullanım:
+#   STOCKFISH_PATH=./fake_engine.py python app.py
+#   STOCKFISH_PATH=./fake_engine.py FAKE_ENGINE_LATENCY_MS=20 python loadtest.py --duration 30
+#   python loadtest.py --fake-engine --requests 200 --baseline baseline.json
+import argparse
+import os
+import sys
+import time
+
+import chess
+import chess.polyglot
+
+# --- CONFIGURATION ---
+# Her `go` komutunun cevabından önce beklenen süre
+LATENCY_MS = float(os.environ.get("FAKE_ENGINE_LATENCY_MS", 5))
+# Pozisyona göre deterministik olarak eklenen en fazla ek gecikme (0 = sabit gecikme)
+JITTER_MS = float(os.environ.get("FAKE_ENGINE_JITTER_MS", 0))
+# Skor sapmasını değiştirir; aynı tohum her zaman aynı cevapları verir
+SEED = int(os.environ.get("FAKE_ENGINE_SEED", 0))
+DEFAULT_DEPTH = 10
+NODES_PER_DEPTH = 1000
+NOISE_CP = 15
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 300, chess.BISHOP: 300, chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0}
+OPTIONS = [
+    "option name Hash type spin default 16 min 1 max 33554432",
+    "option name Threads type spin default 1 min 1 max 1024",
+    "option name MultiPV type spin default 1 min 1 max 500",
+    "option name Skill Level type spin default 20 min 0 max 20",
+    "option name Move Overhead type spin default 10 min 0 max 5000",
+    "option name UCI_LimitStrength type check default false",
+    "option name UCI_Elo type spin default 1320 min 1320 max 3190",
+]
+
+
+def _hash(board, seed):
+    return chess.polyglot.zobrist_hash(board) ^ (seed * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF)
+
+
+def material(board, color):
+    score = 0
+    for piece in board.piece_map().values():
+        value = PIECE_VALUES[piece.piece_type]
+        score += value if piece.color == color else -value
+    return score
+
+
+def score_move(board, move, seed=SEED):
+    """Hamle yapan taraf açısından deterministik skor: ("cp", n) veya ("mate", n)."""
+    board.push(move)
+    try:
+        if board.is_checkmate():
+            return ("mate", 1)
+        if board.is_stalemate() or board.is_insufficient_material():
+            return ("cp", 0)
+        noise = _hash(board, seed) % (2 * NOISE_CP + 1) - NOISE_CP
+        return ("cp", material(board, not board.turn) + noise)
+    finally:
+        board.pop()
+
+
+def _sort_key(item):
+    move, (kind, value) = item
+    # Mat her santipiyon skorundan iyidir; eşitlikte UCI sırası
+    return (0 if kind == "mate" else 1, -value, move.uci())
+
+
+def ranked_moves(board, search_moves=None, seed=SEED):
+    moves = search_moves or list(board.legal_moves)
+    return sorted(((move, score_move(board, move, seed)) for move in moves), key=_sort_key)
+
+
+def parse_position(tokens):
+    """`position startpos|fen ... [moves ...]` -> chess.Board."""
+    if "moves" in tokens:
+        split = tokens.index("moves")
+        setup, moves = tokens[:split], tokens[split + 1:]
+    else:
+        setup, moves = tokens, []
+    board = chess.Board() if setup[:1] == ["startpos"] else chess.Board(" ".join(setup[1:]))
+    for uci in moves:
+        board.push_uci(uci)
+    return board
+
+
+def parse_go(tokens):
+    params = {"searchmoves": []}
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "searchmoves":
+            params["searchmoves"] = tokens[i + 1:]
+            break
+        if token in ("infinite", "ponder"):
+            params[token] = True
+        elif i + 1 < len(tokens):
+            try:
+                params[token] = int(tokens[i + 1])
+            except ValueError:
+                pass
+            i += 1
+        i += 1
+    return params
+
+
+class FakeEngine:
+    def __init__(self, out, latency_ms=LATENCY_MS, jitter_ms=JITTER_MS, seed=SEED):
+        self.out = out
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.seed = seed
+        self.board = chess.Board()
+        self.multipv = 1
+        self.pending_bestmove = None  # `go infinite` sonrası `stop` bekleyen cevap
+
+    def send(self, line):
+        self.out.write(line + "\n")
+        self.out.flush()
+
+    def search(self, params):
+        board = self.board
+        search_moves = [chess.Move.from_uci(uci) for uci in params["searchmoves"]]
+        search_moves = [move for move in search_moves if move in board.legal_moves]
+
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += _hash(board, self.seed) % 1000 / 1000 * self.jitter_ms
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        depth = params.get("depth", DEFAULT_DEPTH)
+        nodes = params.get("nodes", depth * NODES_PER_DEPTH)
+        elapsed = max(1, int(delay))
+        ranked = ranked_moves(board, search_moves, self.seed)
+        if not ranked:
+            self.send(f"info depth 0 score {'mate 0' if board.is_check() else 'cp 0'}")
+            return "bestmove (none)"
+        for index, (move, (kind, value)) in enumerate(ranked[:self.multipv], 1):
+            self.send(f"info depth {depth} seldepth {depth} multipv {index} score {kind} {value} "
+                      f"nodes {nodes} nps {nodes * 1000 // elapsed} time {elapsed} pv {move.uci()}")
+        return f"bestmove {ranked[0][0].uci()}"
+
+    def handle(self, line):
+        """Bir UCI komutunu işler; `quit` gelince False döndürür."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "uci":
+            self.send("id name FakeEngine")
+            self.send("id author chess-backend")
+            for option in OPTIONS:
+                self.send(option)
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            if "name" in args and "value" in args:
+                name = " ".join(args[args.index("name") + 1:args.index("value")])
+                if name.lower() == "multipv":
+                    self.multipv = max(1, int(args[args.index("value") + 1]))
+        elif command == "ucinewgame":
+            self.board = chess.Board()
+        elif command == "position":
+            self.board = parse_position(args)
+        elif command == "go":
+            params = parse_go(args)
+            bestmove = self.search(params)
+            if params.get("infinite") or params.get("ponder"):
+                self.pending_bestmove = bestmove
+            else:
+                self.send(bestmove)
+        elif command in ("stop", "ponderhit"):
+            if self.pending_bestmove:
+                self.send(self.pending_bestmove)
+                self.pending_bestmove = None
+        elif command == "quit":
+            return False
+        return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministik sahte UCI motoru (yük testleri ve CI için).")
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS, help="Her aramanın süresi")
+    parser.add_argument("--jitter-ms", type=float, default=JITTER_MS, help="Pozisyona bağlı en fazla ek süre")
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args(argv)
+
+    engine = FakeEngine(sys.stdout, args.latency_ms, args.jitter_ms, args.seed)
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+# game_session.py
+# Boşta bekleyen oyunlar için küçük bellek gösterimi.
+#
+# Bir chess.Board hamle yığınının yanında her ply için tahta durumunu da
+# saklar; oyunların çoğu ise herhangi bir anda boştadır. GameSession yalnızca
+# başlangıç FEN'ini (standart başlangıçta hiç) ve hamleleri 16 bitlik kodlar
+# olarak bir array('H') içinde tutar. Tahta yalnızca istek sırasında kurulur
+# (board()) ve istek bitince atılır. Geri bildirim metinleri sınırlı bir
+# kümeden geldiği için intern edilir; binlerce oyun aynı nesneyi paylaşır.
+#
+# Hamle kodu: from (6 bit) | to (6 bit) << 6 | terfi taşı (3 bit) << 12
+#
+# Analiz geçmişi (geri alma için, bkz. app.py /undo) her ply için bir demet
+# olarak tutulur; hamleler kod, metinler intern edilmiş str olarak.
+#
+# Ölçüm:
+#   python game_session.py --games 10000 --plies 40
+import argparse
+import json
+import sys
+import tracemalloc
+from array import array
+
+import chess
+
+# Kayıt alanlarından hamle içerenler (kod olarak saklanır)
+MOVE_FIELDS = ("last_move", "best_alternative_move", "threat_move", "pending_move")
+TEXT_FIELDS = ("feedback_text", "feedback_color")
+
+
+def encode_move(move):
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def decode_move(code):
+    return chess.Move(code & 0x3F, code >> 6 & 0x3F, code >> 12 or None)
+
+
+def _encode_uci(uci):
+    return None if uci is None else encode_move(chess.Move.from_uci(uci))
+
+
+def _decode_uci(code):
+    return None if code is None else decode_move(code).uci()
+
+
+def _intern(text):
+    return None if text is None else sys.intern(text)
+
+
+def _pack_history_entry(entry):
+    analysis = entry["analysis"]
+    return (
+        entry["ply"], _encode_uci(entry["move"]), entry["difficulty_index"],
+        _intern(analysis["quality"]), _intern(analysis["text"]), _intern(analysis["color"]),
+        _encode_uci(analysis["best_alternative"]), _encode_uci(analysis["threat"]),
+        _encode_uci(entry.get("reply")),
+        _intern(entry.get("feedback_text")), _intern(entry.get("feedback_color")),
+    )
+
+
+def _unpack_history_entry(packed):
+    (ply, move, difficulty_index, quality, text, color,
+     best_alternative, threat, reply, feedback_text, feedback_color) = packed
+    return {
+        "ply": ply,
+        "move": _decode_uci(move),
+        "difficulty_index": difficulty_index,
+        "analysis": {
+            "quality": quality,
+            "text": text,
+            "color": color,
+            "best_alternative": _decode_uci(best_alternative),
+            "threat": _decode_uci(threat),
+        },
+        "reply": _decode_uci(reply),
+        "feedback_text": feedback_text,
+        "feedback_color": feedback_color,
+    }
+
+
+class GameSession:
+    """Tek bir oyunun sıkıştırılmış durumu."""
+
+    __slots__ = (
+        "start_fen", "moves", "engine_key", "tutor_mode_index", "difficulty_index",
+        "feedback_text", "feedback_color",
+        "last_move", "best_alternative_move", "threat_move", "pending_move", "history",
+    )
+
+    def __init__(self, start_fen=None, moves=(), engine_key=None):
+        # Standart başlangıç pozisyonu None olarak tutulur
+        self.start_fen = None if start_fen in (None, chess.STARTING_FEN) else start_fen
+        self.moves = array("H", moves)
+        # uuid hex -> 16 bayt
+        self.engine_key = bytes.fromhex(engine_key) if engine_key else None
+        self.tutor_mode_index = 0
+        self.difficulty_index = 0
+        self.feedback_text = None
+        self.feedback_color = None
+        self.last_move = None
+        self.best_alternative_move = None
+        self.threat_move = None
+        self.pending_move = None
+        self.history = ()
+
+    def board(self):
+        """Tahtayı hamlelerden kurar (her çağrıda yeni bir chess.Board)."""
+        board = chess.Board(self.start_fen or chess.STARTING_FEN)
+        for code in self.moves:
+            board.push(decode_move(code))
+        return board
+
+    @classmethod
+    def from_record(cls, record):
+        """session_store kaydından (start_fen, moves uci listesi, ...) oluşturur."""
+        session = cls(
+            record.get("start_fen"),
+            (_encode_uci(uci) for uci in record.get("moves", ())),
+            record.get("engine_key")
+        )
+        session.tutor_mode_index = record.get("tutor_mode_index", 0)
+        session.difficulty_index = record.get("difficulty_index", 0)
+        for field in TEXT_FIELDS:
+            setattr(session, field, _intern(record.get(field)))
+        for field in MOVE_FIELDS:
+            setattr(session, field, _encode_uci(record.get(field)))
+        session.history = tuple(_pack_history_entry(entry) for entry in record.get("history", ()))
+        return session
+
+    def to_record(self):
+        record = {
+            "start_fen": self.start_fen or chess.STARTING_FEN,
+            "moves": [decode_move(code).uci() for code in self.moves],
+            "engine_key": self.engine_key.hex() if self.engine_key else None,
+            "tutor_mode_index": self.tutor_mode_index,
+            "difficulty_index": self.difficulty_index,
+        }
+        for field in TEXT_FIELDS:
+            record[field] = getattr(self, field)
+        for field in MOVE_FIELDS:
+            record[field] = _decode_uci(getattr(self, field))
+        record["history"] = [_unpack_history_entry(packed) for packed in self.history]
+        return record
+
+
+# --- ÖLÇÜM ---
+FEEDBACK_PARTS = ("Mükemmel hamle!", " Sıra sende!")
+COLOR_PARTS = ("EXCELLENT_MOVE", "_COLOR")
+
+
+def _sample_game(seed, plies):
+    """Rastgele yasal hamlelerle oynanmış bir oyunun hamleleri ve motor anahtarı."""
+    import random
+    import uuid
+
+    rng = random.Random(seed)
+    board = chess.Board()
+    for _ in range(plies):
+        if board.is_game_over():
+            break
+        board.push(rng.choice(list(board.legal_moves)))
+    return list(board.move_stack), uuid.UUID(int=rng.getrandbits(128)).hex
+
+
+def _fields(moves, engine_key):
+    # app.py'deki gibi her istekte metinler birleştirilerek yeniden oluşur;
+    # motor anahtarı da her oyunda ayrı bir str nesnesidir.
+    text, suffix = FEEDBACK_PARTS
+    color, color_suffix = COLOR_PARTS
+    return {
+        "engine_key": engine_key[:16] + engine_key[16:],
+        "tutor_mode_index": 0,
+        "difficulty_index": 1,
+        "feedback_text": text + suffix,
+        "feedback_color": color + color_suffix,
+        "last_move": moves[-1].uci() if moves else None,
+        "best_alternative_move": None,
+        "threat_move": None,
+        "pending_move": None,
+    }
+
+
+def _build_board_dict(samples):
+    games = {}
+    for i, (moves, engine_key) in enumerate(samples):
+        game = _fields(moves, engine_key)
+        game["board"] = chess.Board()
+        for move in moves:
+            game["board"].push(move)
+        games[f"game-{i}"] = game
+    return games
+
+
+def _build_json(samples):
+    records = {}
+    for i, (moves, engine_key) in enumerate(samples):
+        record = dict(_fields(moves, engine_key), start_fen=chess.STARTING_FEN, moves=[m.uci() for m in moves])
+        records[f"game-{i}"] = json.dumps(record, ensure_ascii=False)
+    return records
+
+
+def _build_sessions(samples):
+    sessions = {}
+    for i, (moves, engine_key) in enumerate(samples):
+        record = dict(_fields(moves, engine_key), start_fen=chess.STARTING_FEN, moves=[m.uci() for m in moves])
+        sessions[f"game-{i}"] = GameSession.from_record(record)
+    return sessions
+
+
+def _bytes_per_game(build, samples):
+    tracemalloc.start()
+    kept = build(samples)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return round(used / len(samples))
+
+
+def measure(count, plies):
+    """Boşta oyun başına bayt: dict + chess.Board, JSON kaydı, GameSession."""
+    samples = [_sample_game(i, plies) for i in range(count)]
+    return {
+        "games": count,
+        "plies": plies,
+        "board_dict_bytes": _bytes_per_game(_build_board_dict, samples),
+        "json_record_bytes": _bytes_per_game(_build_json, samples),
+        "game_session_bytes": _bytes_per_game(_build_sessions, samples),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Boşta oyun başına bellek kullanımını ölçer.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--plies", type=int, default=40)
+    args = parser.parse_args(argv)
+
+    result = measure(args.games, args.plies)
+    print(f"{result['games']} oyun, {result['plies']} ply:")
+    print(f"  dict + chess.Board : {result['board_dict_bytes']:>7} bayt/oyun")
+    print(f"  JSON kaydı         : {result['json_record_bytes']:>7} bayt/oyun")
+    print(f"  GameSession        : {result['game_session_bytes']:>7} bayt/oyun")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
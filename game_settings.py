@@ -0,0 +1,56 @@
+# game_settings.py
+# Zorluk seviyeleri, arama limitleri ve motor yolu.
+#
+# Bu modül import edildiğinde hiçbir şey başlatmaz (motor havuzu, oturum deposu,
+# arka plan thread'leri yok). app.py ayarlarını buradan alır; calibrate.py ve
+# warm_cache.py gibi çevrimdışı araçlar da sunucuyu yüklemeden aynı ayarları
+# buradan okur.
+import os
+
+import chess.engine
+
+from engine_binary import resolve_stockfish_path
+
+# --- CONFIGURATION ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STOCKFISH_PATH = os.path.join(BASE_DIR, "stockfish_linux", "stockfish-ubuntu-x86-64-avx2")
+TUTOR_MODES = ["TAVSİYECİ", "KATI"]
+DIFFICULTY_LEVELS = ["Çok Kolay", "Kolay", "Orta", "Zor"]
+# Kalibrasyon uygulanmamış seviye ayarları (calibrate.py bunlardan türetir)
+BASE_AI_SETTINGS = {
+    "Çok Kolay": {"time": 0.3, "depth": 5, "elo": 1320},
+    "Kolay":      {"time": 0.5, "depth": 8, "elo": 1400},
+    "Orta":       {"time": 0.8, "depth": 12, "elo": 1600},
+    "Zor":        {"time": 1.2, "depth": 18, "elo": 2200}
+}
+# warm_cache.py'nin açılış ağacı için ürettiği analizler (varsa açılışta önbelleğe yüklenir)
+ANALYSIS_WARM_PATH = os.environ.get("ANALYSIS_WARM_PATH", os.path.join(BASE_DIR, "analysis_warm.jsonl"))
+
+
+def stockfish_path():
+    """İşlemcinin desteklediği en hızlı binary (bkz. engine_binary.py); STOCKFISH_PATH verilirse o."""
+    return resolve_stockfish_path(
+        default=DEFAULT_STOCKFISH_PATH,
+        build_if_missing=os.environ.get("STOCKFISH_AUTO_BUILD") == "1"
+    )
+
+
+def play_limit(settings):
+    """AI hamlesi için arama limiti (kalibrasyon varsa düğüm sınırı da eklenir)."""
+    return chess.engine.Limit(time=settings["time"], depth=settings["depth"], nodes=settings.get("nodes"))
+
+
+def analysis_limit(settings):
+    """Hamle analizi için arama limiti."""
+    return chess.engine.Limit(depth=settings["depth"], nodes=settings.get("analysis_nodes"))
+
+
+def configure_engine_difficulty(engine, settings):
+    """Motorun oyun gücünü seviye ayarındaki ELO'ya göre sınırlar (ELO yoksa tam güç)."""
+    if engine is None:
+        return
+    elo = settings.get("elo")
+    if elo:
+        engine.configure({"UCI_LimitStrength": True, "UCI_Elo": elo})
+    else:
+        engine.configure({"UCI_LimitStrength": False})
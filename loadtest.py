@@ -0,0 +1,335 @@
+# loadtest.py
+# HTTP API için tekrarlanabilir uçtan uca yük testi ve kıyaslama (benchmark).
+#
+# Her sanal kullanıcı (thread) kendi sentetik oyununu oynar: /new_game ile oyun
+# açar, /change_settings ile zorluğu ayarlar, sonra istek karışımına (--mix) göre
+# /make_move (rastgele yasal hamle; onay istenirse onaylar) ve /game_state
+# istekleri gönderir; oyun bitince yenisini açar. Rastgelelik --seed'den
+# türetildiği için aynı ayarlarla aynı istek dizisi üretilir.
+#
+# Sonuç: rota başına istek sayısı, hata sayısı, saniyedeki istek (throughput) ve
+# p50/p95/p99 gecikme. --output ile JSON olarak yazılır; --baseline verilirse
+# kayıtlı bir sonuçla karşılaştırılır ve tolerans dışındaki gerilemeler
+# (regression) raporlanır, çıkış kodu 1 olur (CI'da kullanılabilir).
+#
+# Kullanım:
+#   python loadtest.py --duration 30 --concurrency 8 --output sonuc.json
+#   python loadtest.py --url http://127.0.0.1:5000 --mix make_move=3,game_state=1 --difficulty 2
+#   python loadtest.py --requests 200 --seed 1 --baseline baseline.json --tolerance 0.25
+#   python loadtest.py --fake-engine --requests 200   # Stockfish yerine fake_engine.py (yalnızca sunucu yükü)
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+import uuid
+
+import chess
+
+import fake_engine
+from concurrency_stress import HttpClient, InProcessClient
+
+# --- CONFIGURATION ---
+DEFAULT_MIX = "make_move=0.7,game_state=0.25,new_game=0.05"
+ROUTES = ("new_game", "make_move", "game_state")
+PERCENTILES = (50, 95, 99)
+# Gerilemede karşılaştırılan gecikme ölçüleri ve güvenilir olmaları için gereken
+# en az örnek sayısı (az örnekte p95/p99 tek bir yavaş isteğe eşittir)
+COMPARED_LATENCIES = {"p50_ms": 20, "p95_ms": 100, "p99_ms": 500}
+
+
+def parse_mix(text):
+    """"make_move=0.7,game_state=0.3" -> {"make_move": 0.7, "game_state": 0.3} (oranlar normalize edilir)."""
+    mix = {}
+    for part in text.split(","):
+        route, _, weight = part.partition("=")
+        route = route.strip().lstrip("/")
+        if route not in ROUTES:
+            raise ValueError(f"Bilinmeyen rota: {route} (geçerli: {', '.join(ROUTES)})")
+        mix[route] = float(weight or 1)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("İstek karışımının toplam ağırlığı sıfırdan büyük olmalı.")
+    return {route: weight / total for route, weight in mix.items()}
+
+
+def percentile(sorted_values, pct):
+    """En yakın sıra (nearest-rank) yüzdeliği."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class Recorder:
+    """Rota başına gecikmeleri ve hataları toplar (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.recording = True
+
+    def record(self, route, seconds, ok):
+        if not self.recording:
+            return
+        with self._lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.latencies = {}
+            self.errors = {}
+
+    def summary(self, elapsed):
+        with self._lock:
+            latencies = {route: sorted(values) for route, values in self.latencies.items()}
+            errors = dict(self.errors)
+        routes = {}
+        for route, values in sorted(latencies.items()):
+            stats = {
+                "count": len(values),
+                "errors": errors.get(route, 0),
+                "rps": round(len(values) / elapsed, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+            for pct in PERCENTILES:
+                stats[f"p{pct}_ms"] = round(percentile(values, pct) * 1000, 2)
+            routes[route] = stats
+        total = sum(stats["count"] for stats in routes.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": total,
+            "errors": sum(stats["errors"] for stats in routes.values()),
+            "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+            "routes": routes,
+        }
+
+
+class VirtualUser:
+    """Tek bir sentetik oyuncu: kendi oyununu açar ve karışıma göre istek gönderir."""
+
+    def __init__(self, client, recorder, mix, seed, difficulty, tutor_mode):
+        self.client = client
+        self.recorder = recorder
+        self.rng = random.Random(seed)
+        self.routes = list(mix)
+        self.weights = [mix[route] for route in self.routes]
+        self.difficulty = difficulty
+        self.tutor_mode = tutor_mode
+        self.game_id = None
+        self.board = None
+
+    def _call(self, route, method, payload):
+        started = time.perf_counter()
+        try:
+            if method == "GET":
+                status, body = self.client.get("/" + route, payload)
+            else:
+                status, body = self.client.post("/" + route, payload)
+        except OSError as e:
+            status, body = None, {"error": str(e)}
+        self.recorder.record(route, time.perf_counter() - started, status == 200)
+        return status, body or {}
+
+    def new_game(self):
+        self.game_id = f"load-{uuid.UUID(int=self.rng.getrandbits(128)).hex[:16]}"
+        status, _ = self._call("new_game", "POST", {"game_id": self.game_id})
+        if status != 200:
+            self.game_id = None
+            return
+        self.board = chess.Board()
+        self._call("change_settings", "POST", {
+            "game_id": self.game_id,
+            "difficulty_index": self.difficulty,
+            "tutor_mode_index": self.tutor_mode,
+        })
+
+    def make_move(self):
+        move = self.rng.choice(list(self.board.legal_moves)).uci()
+        status, body = self._call("make_move", "POST", {"game_id": self.game_id, "move": move})
+        if status == 200 and body.get("status") == "confirmation_required":
+            status, body = self._call("make_move", "POST", {"game_id": self.game_id, "move": move + "_confirmed"})
+        if status == 200:
+            self.board = chess.Board(body["game_state"]["fen"])
+        elif status != 409:
+            # Sunucuyla tahtanın ayrıştığı durumdan yeni oyunla çık
+            self.game_id = None
+
+    def game_state(self):
+        status, body = self._call("game_state", "GET", {"game_id": self.game_id})
+        if status == 200:
+            self.board = chess.Board(body["fen"])
+
+    def step(self):
+        if self.game_id is None or self.board.is_game_over():
+            self.new_game()
+            return
+        route = self.rng.choices(self.routes, self.weights)[0]
+        getattr(self, route)()
+
+
+def run_load(client, mix, concurrency, duration=None, requests=None, warmup=0.0,
+             seed=0, difficulty=0, tutor_mode=0):
+    """Yükü çalıştırır ve özet sözlüğü döndürür.
+
+    requests verilirse her sanal kullanıcı tam bu kadar adım atar (sabit iş
+    yükü); verilmezse `duration` saniye boyunca çalışır. Isınma (warmup)
+    süresindeki istekler sonuca katılmaz.
+    """
+    recorder = Recorder()
+    users = [VirtualUser(client, recorder, mix, seed * 1000003 + i, difficulty, tutor_mode)
+             for i in range(concurrency)]
+
+    def run_all(deadline, steps):
+        def run(user):
+            for _ in range(steps) if steps is not None else itertools.count():
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                user.step()
+
+        threads = [threading.Thread(target=run, args=(user,)) for user in users]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    if warmup > 0:
+        recorder.recording = False
+        run_all(time.monotonic() + warmup, None)
+        recorder.reset()
+        recorder.recording = True
+
+    started = time.perf_counter()
+    run_all(None if requests is not None else time.monotonic() + duration, requests)
+    return recorder.summary(time.perf_counter() - started)
+
+
+def compare(result, baseline, tolerance, min_delta_ms):
+    """Baseline'a göre gerilemeler: [(rota, ölçü, baseline, şimdiki)].
+
+    Gecikme ölçüsü (1 + tolerance) katından ve en az `min_delta_ms` kadar
+    kötüleşirse, throughput (1 - tolerance) katının altına düşerse gerileme sayılır.
+    Yalnızca ROUTES karşılaştırılır (ör. /change_settings yükün parçası değildir);
+    iki sonuçtan birinde yeterli örneği olmayan yüzdelikler atlanır.
+    """
+    regressions = []
+    old_rps, new_rps = baseline.get("throughput_rps"), result.get("throughput_rps")
+    if old_rps and new_rps is not None and new_rps < old_rps * (1 - tolerance):
+        regressions.append(("toplam", "throughput_rps", old_rps, new_rps))
+    for route in ROUTES:
+        old = baseline.get("routes", {}).get(route)
+        new = result["routes"].get(route)
+        if old is None or new is None:
+            continue
+        for metric, min_samples in COMPARED_LATENCIES.items():
+            if metric not in old or min(old.get("count", 0), new["count"]) < min_samples:
+                continue
+            if new[metric] > old[metric] * (1 + tolerance) and new[metric] - old[metric] >= min_delta_ms:
+                regressions.append((route, metric, old[metric], new[metric]))
+        if new["errors"] > old.get("errors", 0):
+            regressions.append((route, "errors", old.get("errors", 0), new["errors"]))
+    return regressions
+
+
+def print_summary(summary):
+    print(f"{summary['requests']} istek, {summary['elapsed_s']:.1f}s, "
+          f"{summary['throughput_rps']:.1f} istek/s, {summary['errors']} hata")
+    print(f"{'rota':<16}{'sayı':>8}{'hata':>6}{'istek/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, stats in summary["routes"].items():
+        print(f"{route:<16}{stats['count']:>8}{stats['errors']:>6}{stats['rps']:>10.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP API için tekrarlanabilir yük testi ve kıyaslama.")
+    parser.add_argument("--url", default=None, help="Sunucu adresi (verilmezse app.py süreç içinde yüklenir)")
+    parser.add_argument("--fake-engine", action="store_true",
+                        help="Süreç içi modda Stockfish yerine deterministik fake_engine.py kullan "
+                             "(gecikme: FAKE_ENGINE_LATENCY_MS)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Eşzamanlı sanal kullanıcı (oyun) sayısı")
+    parser.add_argument("--duration", type=float, default=30.0, help="Ölçüm süresi (saniye)")
+    parser.add_argument("--requests", type=int, default=None,
+                        help="Kullanıcı başına adım sayısı; verilirse süre yerine sabit iş yükü çalışır")
+    parser.add_argument("--warmup", type=float, default=0.0, help="Sonuca katılmayan ısınma süresi (saniye)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"İstek karışımı (varsayılan: {DEFAULT_MIX})")
+    parser.add_argument("--difficulty", type=int, default=0, help="Zorluk seviyesi indeksi")
+    parser.add_argument("--tutor-mode", type=int, default=0, help="Öğretmen modu indeksi (0: TAVSİYECİ, 1: KATI)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Sonucun yazılacağı JSON dosyası")
+    parser.add_argument("--baseline", default=None, help="Karşılaştırılacak önceki sonuç (JSON)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="İzin verilen göreli kötüleşme (0.25 = %%25)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Bundan küçük mutlak gecikme artışları gerileme sayılmaz")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.fake_engine:
+        if args.url:
+            parser.error("--fake-engine yalnızca süreç içi modda kullanılabilir; sunucuyu STOCKFISH_PATH=fake_engine.py ile başlatın.")
+        os.environ["STOCKFISH_PATH"] = os.path.abspath(fake_engine.__file__)
+
+    client = HttpClient(args.url) if args.url else InProcessClient()
+    print(f"{args.concurrency} sanal kullanıcı, karışım {mix}, zorluk {args.difficulty}, "
+          + (f"kullanıcı başına {args.requests} adım" if args.requests else f"{args.duration:.0f}s"))
+    try:
+        summary = run_load(client, mix, args.concurrency, args.duration, args.requests, args.warmup,
+                           args.seed, args.difficulty, args.tutor_mode)
+    finally:
+        client.close()
+
+    result = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "target": args.url or "in-process",
+            "concurrency": args.concurrency,
+            "duration": None if args.requests else args.duration,
+            "requests_per_user": args.requests,
+            "warmup": args.warmup,
+            "mix": mix,
+            "difficulty": args.difficulty,
+            "tutor_mode": args.tutor_mode,
+            "seed": args.seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "stockfish_path": os.environ.get("STOCKFISH_PATH"),
+            "fake_engine_latency_ms": fake_engine.LATENCY_MS if args.fake_engine else None,
+        },
+        **summary,
+    }
+    print_summary(summary)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Kaydedildi: {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config", {}) != result["config"]:
+        print("UYARI: Baseline farklı ayarlarla alınmış; karşılaştırma yanıltıcı olabilir.")
+    regressions = compare(result, baseline, args.tolerance, args.min_delta_ms)
+    for route, metric, old, new in regressions:
+        print(f"GERİLEME: {route} {metric}: {old} -> {new}")
+    print("Baseline'a göre gerileme yok." if not regressions else f"{len(regressions)} gerileme bulundu.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
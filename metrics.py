@@ -0,0 +1,215 @@
+# metrics.py
+# Prometheus metin biçiminde (text exposition format 0.0.4) basit metrikler.
+#
+# Dış bağımlılık eklememek için sayaç (Counter), anlık değer (Gauge) ve
+# histogram (Histogram) burada küçük, thread-safe sınıflar olarak tanımlıdır.
+# Kaydedilmesi pahalı veya başka modüllerde zaten tutulan değerler (önbellek
+# isabetleri, oturum sayısı, motor RSS) her istekte güncellenmez; kayıt
+# defterine eklenen toplayıcı (collector) fonksiyonları /metrics çağrıldığında
+# okunur.
+#
+# serve.py ile birden fazla worker çalışıyorsa her worker kendi metriklerini
+# tutar; her seri `worker` (pid) etiketini taşır. Uygulamanın /metrics yolu
+# yalnızca isteği alan (rastgele) worker'ın metriklerini döndürür; bu yüzden
+# serve.py --metrics-port ile her worker kayıt defterini kendi portunda
+# start_metrics_server() ile sunar ve Prometheus her portu ayrı hedef olarak kazır.
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# --- CONFIGURATION ---
+# Saniye cinsinden gecikme kovaları (istek ve motor çağrıları)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name}: etiketler {self.label_names} olmalı, verilen {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self):
+        """[(ek ad, [(etiket adı, değer)], değer)]"""
+        with self._lock:
+            return [("", list(zip(self.label_names, key)), value) for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += 1
+            state[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), count, total) for key, (counts, count, total) in self._values.items()]
+        result = []
+        for key, counts, count, total in items:
+            labels = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                result.append(("_bucket", labels + [("le", _format_value(float(bound)))], cumulative))
+            result.append(("_bucket", labels + [("le", "+Inf")], count))
+            result.append(("_count", labels, count))
+            result.append(("_sum", labels, total))
+        return result
+
+
+class Registry:
+    """Metrikler ve /metrics çağrıldığında okunan toplayıcılar."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+        self.const_labels = [("worker", str(os.getpid()))]
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def collector(self, fn):
+        """fn() -> [(ad, tür, açıklama, [(etiket sözlüğü, değer)])]; dekoratör olarak da kullanılabilir."""
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        def family(name, kind, documentation, samples):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(self.const_labels + labels)} {_format_value(value)}")
+
+        for metric in metrics:
+            family(metric.name, metric.kind, metric.documentation, metric.samples())
+        for fn in collectors:
+            try:
+                collected = fn()
+            except Exception as e:
+                print(f"Metrik toplayıcı hatası ({getattr(fn, '__name__', fn)}): {e}")
+                continue
+            for name, kind, documentation, values in collected:
+                samples = [("", sorted(labels.items()), value) for labels, value in values if value is not None]
+                family(name, kind, documentation, samples)
+        return "\n".join(lines) + "\n"
+
+
+def process_rss_bytes(pid):
+    """Linux'ta sürecin yerleşik bellek (RSS) kullanımı; okunamazsa None."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+REGISTRY = Registry()
+
+
+def start_metrics_server(host, port, registry=REGISTRY):
+    """Kayıt defterini ayrı bir portta sunar (her yol metrikleri döndürür); arka plan thread'inde çalışır."""
+    from werkzeug.serving import make_server
+
+    def metrics_app(environ, start_response):
+        body = registry.render().encode("utf-8")
+        start_response("200 OK", [("Content-Type", CONTENT_TYPE), ("Content-Length", str(len(body)))])
+        return [body]
+
+    server = make_server(host, port, metrics_app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
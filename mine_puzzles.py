@@ -0,0 +1,219 @@
+# mine_puzzles.py
+# Öğrenci oyunlarındaki büyük hatalardan (blunder) bulmaca çıkarır.
+#
+# PGN'ler oyun oyun akıtılır (review_games.iter_games); her oyun bir worker
+# sürecinde sığ ve tek pv'li bir taramadan geçer. Skor farkı BLUNDER_THRESHOLD'u
+# aşan hamleden sonraki pozisyon bulmaca adayıdır: rakip (bulmacayı çözen)
+# hatayı cezalandıran hamleyi bulmalıdır. Aday daha derin bir multipv=2
+# aramasıyla doğrulanır; en iyi cevap belirgin bir avantaj veriyor ve ikinci en
+# iyi cevaptan açıkça üstünse (tek çözüm) bulmaca yazılır.
+#
+# Bulmacalar Zobrist hash'ine göre tekilleştirilir (aynı açılış hatası birçok
+# oyunda tekrarlanır); çıktı dosyasındaki mevcut bulmacalar da sayılır, böylece
+# yeni PGN'ler aynı dosyaya eklenebilir. Bellek kullanımı girdi boyutundan
+# bağımsızdır: yalnızca işlenmekte olan birkaç oyun ve bulmaca anahtarları tutulur.
+#
+# Kullanım:
+#   python mine_puzzles.py arsiv/*.pgn --output puzzles.jsonl
+#   python mine_puzzles.py review.pgn --workers 8 --verify-depth 20
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import chess
+import chess.engine
+import chess.pgn
+import chess.polyglot
+
+from analysis_cache import encode_score
+from engine_binary import resolve_stockfish_path
+from engine_budget import read_cpu_limit
+from move_classification import BLUNDER_THRESHOLD, move_score_delta
+from review_games import DEFAULT_STOCKFISH_PATH, iter_games
+
+# --- CONFIGURATION ---
+SCAN_DEPTH = 12
+VERIFY_DEPTH = 18
+# Çözümün, hamle sırasındaki taraf için en az bu kadar avantaj vermesi gerekir (cp)
+MIN_SOLUTION_SCORE = -BLUNDER_THRESHOLD
+# En iyi cevap ikinci en iyiden en az bu kadar iyi olmalı (tek çözüm)
+UNIQUE_MARGIN = 150
+# Bulmacada gösterilen çözüm devamının uzunluğu (yarım hamle)
+SOLUTION_PLIES = 5
+PROGRESS_INTERVAL = 30.0  # saniye
+HEADER_FIELDS = ("Event", "Date", "White", "Black")
+
+_engine = None
+_scan_limit = None
+_verify_limit = None
+
+
+# --- WORKER ---
+def _init_worker(engine_path, scan_depth, verify_depth, hash_mb):
+    global _engine, _scan_limit, _verify_limit
+    _engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+    _engine.configure({"Threads": 1, "Hash": hash_mb})
+    _scan_limit = chess.engine.Limit(depth=scan_depth)
+    _verify_limit = chess.engine.Limit(depth=verify_depth)
+
+
+def _scan(board):
+    if board.is_checkmate():
+        return {"score": chess.engine.PovScore(chess.engine.Mate(0), board.turn)}
+    if board.is_game_over():
+        return {"score": chess.engine.PovScore(chess.engine.Cp(0), board.turn)}
+    return _engine.analyse(board, _scan_limit)
+
+
+def verify_puzzle(board):
+    """Pozisyonda tek ve kazandıran bir cevap varsa en iyi analizi, yoksa None döndürür."""
+    if board.is_game_over() or board.legal_moves.count() < 2:
+        return None
+    infos = _engine.analyse(board, _verify_limit, multipv=2)
+    if len(infos) < 2 or not infos[0].get("pv"):
+        return None
+    best = infos[0]["score"].relative.score(mate_score=10000)
+    second = infos[1]["score"].relative.score(mate_score=10000)
+    if best < MIN_SOLUTION_SCORE or best - second < UNIQUE_MARGIN:
+        return None
+    return infos[0]
+
+
+def mine_game(task):
+    """Bir oyundaki bulmacaları bulur: (anahtar, [bulmaca], hata)."""
+    key, path, offset, pgn_text = task
+    puzzles = []
+    try:
+        game = chess.pgn.read_game(io.StringIO(pgn_text))
+        headers = {name: game.headers[name] for name in HEADER_FIELDS if name in game.headers}
+        board = game.board()
+        before = _scan(board)
+        for move in game.mainline_moves():
+            after_board = board.copy(stack=False)
+            after_board.push(move)
+            after = _scan(after_board)
+            # Önceki hamlenin taraması yeniden kullanılır; skorlar PovScore olduğundan
+            # fark her iki renk için de hamle yapan taraf açısından hesaplanır.
+            delta = move_score_delta(board, [before], after)
+            if delta <= BLUNDER_THRESHOLD:
+                solution = verify_puzzle(after_board)
+                if solution is not None:
+                    puzzles.append({
+                        "id": f"{chess.polyglot.zobrist_hash(after_board):016x}",
+                        "fen": after_board.fen(),
+                        "blunder": {"move": move.uci(), "san": board.san(move), "fen": board.fen(), "swing": delta},
+                        "solution": [m.uci() for m in solution["pv"][:SOLUTION_PLIES]],
+                        "score": encode_score(solution["score"]),
+                        "source": {"file": path, "offset": offset, "ply": len(board.move_stack), **headers}
+                    })
+            board.push(move)
+            before = after
+    except Exception as e:
+        return key, puzzles, str(e)
+    return key, puzzles, None
+
+
+# --- PIPELINE ---
+def load_puzzle_ids(output_path):
+    """Çıktı dosyasındaki mevcut bulmacaların id'leri; yarım kalmış son satır kesilir."""
+    ids = set()
+    try:
+        f = open(output_path, "r+b")
+    except FileNotFoundError:
+        return ids
+    with f:
+        valid_end = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                ids.add(int(json.loads(line)["id"], 16))
+            except (ValueError, KeyError):
+                break
+            valid_end += len(line)
+        f.truncate(valid_end)
+    return ids
+
+
+def game_tasks(paths, in_flight, limit=None):
+    """Worker'lara verilecek oyunlar; okunmuş ama bitmemiş oyun sayısı in_flight ile sınırlı."""
+    count = 0
+    for path in paths:
+        for offset, text in iter_games(path):
+            if limit is not None and count >= limit:
+                return
+            count += 1
+            in_flight.acquire()
+            yield f"{os.path.abspath(path)}:{offset}", path, offset, text
+
+
+def mine(pool, paths, in_flight, seen, limit=None):
+    """Tekilleştirilmiş bulmacaları bulundukça üretir; her oyun bittiğinde (None, hata) de üretir."""
+    for _, puzzles, error in pool.imap_unordered(mine_game, game_tasks(paths, in_flight, limit)):
+        in_flight.release()
+        for puzzle in puzzles:
+            puzzle_id = int(puzzle["id"], 16)
+            if puzzle_id in seen:
+                continue
+            seen.add(puzzle_id)
+            yield puzzle, None
+        yield None, error
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PGN'lerdeki büyük hatalardan tek çözümlü bulmacalar çıkarır.")
+    parser.add_argument("pgn", nargs="+", help="Taranacak PGN dosyaları")
+    parser.add_argument("--output", default="puzzles.jsonl", help="Bulmacaların ekleneceği JSONL dosyası")
+    parser.add_argument("--engine", default=None, help="Stockfish binary yolu")
+    parser.add_argument("--workers", type=int, default=read_cpu_limit(), help="Paralel motor/süreç sayısı")
+    parser.add_argument("--scan-depth", type=int, default=SCAN_DEPTH, help="Hata taraması arama derinliği")
+    parser.add_argument("--verify-depth", type=int, default=VERIFY_DEPTH, help="Tek çözüm doğrulaması arama derinliği")
+    parser.add_argument("--hash", type=int, default=64, help="Worker başına motor hash boyutu (MB)")
+    parser.add_argument("--limit", type=int, default=None, help="En fazla bu kadar oyun tara")
+    args = parser.parse_args(argv)
+
+    engine_path = args.engine or resolve_stockfish_path(default=DEFAULT_STOCKFISH_PATH)
+    seen = load_puzzle_ids(args.output)
+    if seen:
+        print(f"Mevcut bulmaca: {len(seen)}")
+
+    in_flight = threading.BoundedSemaphore(max(1, args.workers) * 4)
+    ctx = multiprocessing.get_context("spawn")
+    started = last_report = time.monotonic()
+    games = found = errors = 0
+
+    print(f"Motor: {engine_path}, {args.workers} worker, tarama derinliği {args.scan_depth}, "
+          f"doğrulama derinliği {args.verify_depth}")
+    with open(args.output, "a", encoding="utf-8") as out, ctx.Pool(
+            args.workers, initializer=_init_worker,
+            initargs=(engine_path, args.scan_depth, args.verify_depth, args.hash)) as pool:
+        for puzzle, error in mine(pool, args.pgn, in_flight, seen, args.limit):
+            if puzzle is not None:
+                out.write(json.dumps(puzzle, ensure_ascii=False) + "\n")
+                out.flush()
+                found += 1
+                continue
+            games += 1
+            if error:
+                errors += 1
+                print(f"Oyun okunamadı/analiz edilemedi: {error}")
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                print(f"{games} oyun tarandı, {found} yeni bulmaca ({games / (now - started) * 60:.1f} oyun/dakika)")
+                last_report = now
+
+    elapsed = time.monotonic() - started
+    rate = games / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"Bitti: {games} oyun, {found} yeni bulmaca, {errors} hata, {elapsed:.1f}s ({rate:.1f} oyun/dakika)")
+    print(f"Bulmacalar: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,27 @@
+# move_classification.py
+# Hamle kalitesi eşikleri ve skor farkına göre sınıflandırma.
+#
+# app.py'deki canlı analiz ile review_games.py gibi çevrimdışı araçlar aynı
+# eşikleri kullansın diye ayrı modüldedir; app modülünü (motor havuzu,
+# oturum deposu) içe aktarmadan kullanılabilir.
+
+# --- CONFIGURATION ---
+BLUNDER_THRESHOLD = -200
+MISTAKE_THRESHOLD = -90
+INACCURACY_THRESHOLD = -40
+THRESHOLDS = (BLUNDER_THRESHOLD, MISTAKE_THRESHOLD, INACCURACY_THRESHOLD)
+
+
+def move_score_delta(board, analysis_before, analysis_after):
+    """Oyuncunun hamlesinin, hamle yapan taraf açısından skor değişimi (cp)."""
+    mover = board.turn
+    score_before = analysis_before[0]["score"].pov(mover).score(mate_score=10000)
+    score_after = analysis_after["score"].pov(mover).score(mate_score=10000)
+    return score_after - score_before
+
+
+def classify_delta(score_delta):
+    if score_delta <= BLUNDER_THRESHOLD: return "blunder"
+    elif score_delta <= MISTAKE_THRESHOLD: return "mistake"
+    elif score_delta <= INACCURACY_THRESHOLD: return "inaccuracy"
+    else: return "good" # Technically not a top move but not bad either
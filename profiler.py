@@ -0,0 +1,92 @@
+# profiler.py
+# Çalışan sunucu için istek üzerine istatistiksel yığın (stack) örnekleyici.
+#
+# Bazı gecikme sorunları yalnızca gerçek trafikte görülür. sample_stacks()
+# belirtilen süre boyunca her `interval` saniyede bir sys._current_frames() ile
+# tüm thread'lerin yığınını okur ve aynı yığınları sayar. Çıktı, flamegraph
+# araçlarının (flamegraph.pl, speedscope, inferno) doğrudan okuduğu "collapsed
+# stack" biçimindedir: kökten yaprağa `çerçeve;çerçeve;... sayı`.
+#
+# Örnekleme yorumlayıcıyı durdurmaz; maliyeti örnek başına thread sayısıyla
+# orantılı küçük bir yığın yürüyüşüdür. Aynı anda tek bir profil alınabilir.
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# --- CONFIGURATION ---
+DEFAULT_INTERVAL = 0.01  # saniye (100 Hz)
+MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", 60))
+# Bu fonksiyonlardan birini içeren yığınlar HTTP isteği işleyen thread'lerdir
+REQUEST_FRAMES = ("process_request_thread", "run_wsgi")
+
+_running = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_name(code):
+    """Çerçeve adı: `modül:fonksiyon`; kurulu paketlerde modül noktalı tam addır (flask.app, chess)."""
+    parts = code.co_filename.replace("\\", "/").split("/")
+    if "site-packages" in parts:
+        parts = parts[len(parts) - parts[::-1].index("site-packages"):]
+    else:
+        parts = parts[-1:]
+    if parts[-1].endswith(".py"):
+        parts[-1] = parts[-1][:-3]
+    if len(parts) > 1 and parts[-1] == "__init__":
+        parts.pop()
+    return f"{'.'.join(parts)}:{code.co_name}"
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def sample_stacks(seconds, interval=DEFAULT_INTERVAL, requests_only=True):
+    """`seconds` boyunca yığınları örnekler; (Counter{yığın: sayı}, örnek turu sayısı) döndürür.
+
+    requests_only: yalnızca HTTP isteği işleyen thread'ler (arka plan analizcisi,
+    yazıcı thread'leri vb. hariç). Örnekleyicinin kendi thread'i her zaman hariçtir.
+    """
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy("Zaten bir profil alınıyor.")
+    try:
+        own = threading.get_ident()
+        stacks = Counter()
+        rounds = 0
+        deadline = time.monotonic() + min(seconds, MAX_SECONDS)
+        while time.monotonic() < deadline:
+            threads = None
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = _collapse(frame)
+                if requests_only:
+                    if not any(name.endswith(REQUEST_FRAMES) for name in frames):
+                        continue
+                    # İstek thread'leri birleştirilir; aynı kod yolu tek dal olur
+                    root = "request"
+                else:
+                    if threads is None:
+                        threads = {t.ident: t.name for t in threading.enumerate()}
+                    root = threads.get(ident, str(ident)).split(" ")[0]
+                stacks[";".join([root] + frames)] += 1
+            rounds += 1
+            time.sleep(interval)
+        return stacks, rounds
+    finally:
+        _running.release()
+
+
+def collapsed_output(stacks):
+    """flamegraph araçları için collapsed stack metni (en sık yığın önce)."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -0,0 +1,261 @@
+# review_games.py
+# Arşivlenmiş öğrenci oyunlarını toplu olarak yeniden değerlendirir.
+#
+# Büyük PGN dosyaları chess.pgn ile oyun oyun okunur (dosya belleğe alınmaz),
+# her oyun bir worker sürecine verilir; her worker kendi Stockfish'ini açar ve
+# oyunun hamlelerini canlı analizle aynı eşiklerle (move_classification.py)
+# sınıflandırır. Sonuçlar JSONL olarak yazılır. Her pozisyon bir kez multipv=3
+# ile aranır: bir hamleden sonraki pozisyonun en iyi skoru, o hamlenin "sonrası"
+# skorudur; ayrı arama gerekmez.
+#
+# Çalışma yarıda kesilirse aynı komut tekrar verildiğinde kaldığı yerden devam
+# eder: kontrol noktası dosyası her PGN için tamamen işlenmiş bölümün bayt
+# konumunu tutar, o konumdan sonra bitmiş oyunlar da çıktı dosyasından okunur.
+#
+# Kullanım:
+#   python review_games.py arsiv/*.pgn --output review.jsonl
+#   python review_games.py ogrenciler.pgn --workers 8 --depth 14
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import chess
+import chess.engine
+import chess.pgn
+
+from engine_binary import resolve_stockfish_path
+from engine_budget import read_cpu_limit
+from move_classification import classify_delta, move_score_delta
+
+# --- CONFIGURATION ---
+DEFAULT_STOCKFISH_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "stockfish_linux",
+    "stockfish-ubuntu-x86-64-avx2"
+)
+# Canlı analizdeki ("Zor" seviye) arama derinliği
+DEFAULT_DEPTH = 18
+MULTIPV = 3
+# Kontrol noktası en fazla bu kadar oyunda bir yazılır
+CHECKPOINT_EVERY = 20
+PROGRESS_INTERVAL = 30.0  # saniye
+HEADER_FIELDS = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+QUALITIES = ("excellent", "good", "inaccuracy", "mistake", "blunder")
+
+_engine = None
+_limit = None
+
+
+# --- WORKER ---
+def _init_worker(engine_path, depth, nodes, hash_mb):
+    global _engine, _limit
+    _engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+    options = {"Threads": 1}
+    if hash_mb:
+        options["Hash"] = hash_mb
+    _engine.configure(options)
+    _limit = chess.engine.Limit(depth=depth, nodes=nodes)
+
+
+def _terminal_info(board):
+    """Bitmiş pozisyon için motor araması yerine kullanılan skor."""
+    if board.is_checkmate():
+        return {"score": chess.engine.PovScore(chess.engine.Mate(0), board.turn)}
+    return {"score": chess.engine.PovScore(chess.engine.Cp(0), board.turn)}
+
+
+def _analyse(board):
+    if board.is_game_over():
+        return [_terminal_info(board)]
+    return _engine.analyse(board, _limit, multipv=MULTIPV)
+
+
+def review_game(task):
+    """Bir oyunu sınıflandırır: (anahtar, sonuç sözlüğü)."""
+    key, path, offset, pgn_text = task
+    result = {"key": key, "file": path, "offset": offset}
+    try:
+        game = chess.pgn.read_game(io.StringIO(pgn_text))
+        board = game.board()
+        result["headers"] = {name: game.headers[name] for name in HEADER_FIELDS if name in game.headers}
+        moves = []
+        before = _analyse(board)
+        for move in game.mainline_moves():
+            top_moves = [info["pv"][0] for info in before if info.get("pv")]
+            san = board.san(move)
+            mover = board.turn
+            after_board = board.copy(stack=False)
+            after_board.push(move)
+            after = _analyse(after_board)
+            delta = move_score_delta(board, before, after[0])
+
+            if move in top_moves:
+                quality = "excellent" if move == top_moves[0] else "good"
+            else:
+                quality = classify_delta(delta)
+            moves.append({
+                "ply": len(board.move_stack),
+                "color": "white" if mover == chess.WHITE else "black",
+                "move": move.uci(),
+                "san": san,
+                "quality": quality,
+                "delta": delta,
+                "best": top_moves[0].uci() if top_moves and move != top_moves[0] else None
+            })
+            board.push(move)
+            before = after
+
+        summary = {"white": dict.fromkeys(QUALITIES, 0), "black": dict.fromkeys(QUALITIES, 0)}
+        for entry in moves:
+            summary[entry["color"]][entry["quality"]] += 1
+        result["moves"] = moves
+        result["summary"] = summary
+    except Exception as e:
+        result["error"] = str(e)
+    return key, result
+
+
+# --- GİRDİ / KONTROL NOKTASI ---
+def game_key(path, offset):
+    return f"{os.path.abspath(path)}:{offset}"
+
+
+def iter_games(path, resume_offset=None):
+    """PGN dosyasındaki oyunları (başlangıç konumu, PGN metni) olarak akıtır.
+
+    resume_offset verilirse o konumdaki (zaten değerlendirilmiş) oyun atlanır.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        if resume_offset is not None:
+            f.seek(resume_offset)
+            chess.pgn.skip_game(f)
+        while True:
+            offset = f.tell()
+            game = chess.pgn.read_game(f)
+            if game is None:
+                return
+            yield offset, str(game)
+
+
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"files": {}}
+
+
+def save_checkpoint(path, checkpoint):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def load_done_keys(output_path):
+    """Çıktı dosyasında zaten bulunan oyunlar; yarım kalmış son satır kesilir."""
+    done = set()
+    try:
+        f = open(output_path, "r+b")
+    except FileNotFoundError:
+        return done
+    with f:
+        valid_end = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["key"])
+            except (ValueError, KeyError):
+                break
+            valid_end += len(line)
+        f.truncate(valid_end)
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PGN dosyalarındaki oyunları toplu olarak değerlendirir (JSONL çıktı).")
+    parser.add_argument("pgn", nargs="+", help="Değerlendirilecek PGN dosyaları")
+    parser.add_argument("--output", default="review.jsonl", help="Sonuçların yazılacağı JSONL dosyası")
+    parser.add_argument("--checkpoint", default=None, help="Kontrol noktası dosyası (varsayılan: <output>.checkpoint)")
+    parser.add_argument("--engine", default=None, help="Stockfish binary yolu")
+    parser.add_argument("--workers", type=int, default=read_cpu_limit(), help="Paralel motor/süreç sayısı")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="Pozisyon başına arama derinliği")
+    parser.add_argument("--nodes", type=int, default=None, help="Pozisyon başına düğüm sınırı (isteğe bağlı)")
+    parser.add_argument("--hash", type=int, default=64, help="Worker başına motor hash boyutu (MB)")
+    parser.add_argument("--limit", type=int, default=None, help="Bu çalışmada en fazla bu kadar oyun değerlendir")
+    args = parser.parse_args(argv)
+
+    engine_path = args.engine or resolve_stockfish_path(default=DEFAULT_STOCKFISH_PATH)
+    checkpoint_path = args.checkpoint or args.output + ".checkpoint"
+    checkpoint = load_checkpoint(checkpoint_path)
+    done = load_done_keys(args.output)
+    if done:
+        print(f"Devam ediliyor: {len(done)} oyun zaten değerlendirilmiş.")
+
+    # Havuz girdiyi kendi thread'inde tüketir; okunmuş ama sonucu yazılmamış oyun sayısı sınırlanır
+    in_flight = threading.BoundedSemaphore(max(1, args.workers) * 4)
+    skipped = 0
+
+    def tasks():
+        nonlocal skipped
+        count = 0
+        for path in args.pgn:
+            for offset, text in iter_games(path, checkpoint["files"].get(os.path.abspath(path))):
+                key = game_key(path, offset)
+                if key in done:
+                    # Son kontrol noktasından sonra yazılmış oyun
+                    skipped += 1
+                    continue
+                if args.limit is not None and count >= args.limit:
+                    return
+                count += 1
+                in_flight.acquire()
+                yield key, path, offset, text
+
+    ctx = multiprocessing.get_context("spawn")
+    started = time.monotonic()
+    reviewed = errors = 0
+    last_report = started
+
+    print(f"Motor: {engine_path}, {args.workers} worker, derinlik {args.depth}")
+    with open(args.output, "a", encoding="utf-8") as out, ctx.Pool(
+            args.workers, initializer=_init_worker,
+            initargs=(engine_path, args.depth, args.nodes, args.hash)) as pool:
+        # imap sonuçları gönderim sırasıyla döndürür; böylece her dosyada son
+        # yazılan oyuna kadar her şey yazılmış olur ve kontrol noktası tek bir konumdur
+        for key, result in pool.imap(review_game, tasks()):
+            in_flight.release()
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            reviewed += 1
+            if "error" in result:
+                errors += 1
+            checkpoint["files"][os.path.abspath(result["file"])] = result["offset"]
+
+            if reviewed % CHECKPOINT_EVERY == 0:
+                out.flush()
+                save_checkpoint(checkpoint_path, checkpoint)
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                rate = reviewed / (now - started) * 60
+                print(f"{reviewed} oyun değerlendirildi ({rate:.1f} oyun/dakika, {errors} hata)")
+                last_report = now
+        out.flush()
+        save_checkpoint(checkpoint_path, checkpoint)
+
+    elapsed = time.monotonic() - started
+    rate = reviewed / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"Bitti: {reviewed} oyun değerlendirildi, {skipped} oyun atlandı (önceden yapılmış), "
+          f"{errors} hata, {elapsed:.1f}s ({rate:.1f} oyun/dakika)")
+    print(f"Sonuçlar: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,6 +5,7 @@ import os
 import chess
 import chess.engine
 import random
+from engine_binary import resolve_stockfish_path
 from kivy.app import App
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.boxlayout import BoxLayout
@@ -16,7 +17,7 @@ from kivy.clock import Clock
 from kivy.graphics import Color, Rectangle
 
 # ---------- OYUN AYARLARI ----------
-STOCKFISH_PATH = "./stockfish_arm" 
+STOCKFISH_PATH = resolve_stockfish_path(default="./stockfish_arm")
 
 # --- Renk Paleti ---
 COLOR_LIGHT_SQUARE = (240/255, 217/255, 181/255, 1)
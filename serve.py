@@ -0,0 +1,180 @@
+# serve.py
+# Üretim için giriş noktası: birden fazla worker süreci, her biri kendi motor
+# havuzu ile.
+#
+# Ana süreç dinleme soketini açar ve worker'ları fork eder; worker'lar aynı
+# soketten bağlantı kabul eder (pre-fork). app.py her worker'da fork'tan SONRA
+# yüklenir, böylece her süreç kendi motorlarını ve thread'lerini başlatır.
+# Oyun oturumları paylaşılan SQLite deposunda tutulur, bu yüzden her worker
+# her oyuna hizmet edebilir. Ölen worker yeniden başlatılır.
+#
+# Salt okunur veriler fork'tan ÖNCE ana süreçte bir kez yüklenir: oyun sonu
+# tabloları (dosya yoksa burada bir kez üretilir) ve açılış analizleri
+# (ANALYSIS_WARM_PATH). Worker'lar bunları copy-on-write devralır; aynı dosyayı
+# her worker'da yeniden okumak veya üretmek gerekmez.
+#
+# Geri kalan süreç içi durum worker başınadır: açılıştan sonra eklenen analiz
+# önbelleği girdileri (bir /hint, /make_move'u işleyen worker'dan farklı bir
+# worker'a düşerse önbelleği ıskalayabilir), arka plan analizcisi, /ready,
+# /metrics ve /admin/profile. /ready her worker'da aynı cevabı verir, çünkü
+# beklediği veriler ana süreçte yüklenmiştir. /metrics isteği rastgele bir
+# worker'a düştüğünden Prometheus için --metrics-port verilmelidir: worker N
+# metriklerini port+N'de sunar ve her port ayrı bir hedef olarak kazınır.
+#
+# app.run(debug=True) yalnızca geliştirme içindir: reloader ikinci bir süreç ve
+# ikinci bir motor başlatır.
+#
+# Kullanım:
+#   python serve.py                          # PORT veya 5000, çekirdek sayısı kadar worker
+#   python serve.py --workers 4 --sessions sqlite:/var/lib/chess/sessions.db
+#   python serve.py --workers 4 --metrics-port 9100   # worker metrikleri 9100-9103
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+
+from engine_budget import read_cpu_limit
+
+# --- CONFIGURATION ---
+DEFAULT_PORT = int(os.environ.get("PORT", 5000))
+DEFAULT_WORKERS = int(os.environ.get("WEB_WORKERS", 0))
+# Worker başına metrik portlarının başlangıcı (0: kapalı)
+DEFAULT_METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+DEFAULT_SESSIONS = os.environ.get(
+    "SESSION_STORE",
+    "sqlite:" + os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions.db")
+)
+# Bu süreden kısa yaşayan worker'lar art arda yeniden başlatılmaz (saniye)
+RESTART_BACKOFF = 1.0
+
+
+def open_listener(host, port, backlog=128):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload_shared_state():
+    """Tüm worker'ların paylaşacağı salt okunur verileri fork'tan önce yükler.
+
+    Ana süreçte thread veya motor başlatılmaz; yalnızca veri belleğe alınır.
+    """
+    from analysis_cache import warm_shared_cache
+    from endgame_tables import shared_tables
+    from game_settings import ANALYSIS_WARM_PATH
+
+    tables = shared_tables()
+    tables.ensure(background=False)
+    try:
+        count = warm_shared_cache(ANALYSIS_WARM_PATH)
+        print(f"Açılış analizleri yüklendi: {count} ({ANALYSIS_WARM_PATH})")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Açılış analizleri yüklenemedi: {e}")
+
+
+def run_worker(index, host, port, fd, metrics_port=0):
+    """Worker süreci: app.py'yi yükler ve paylaşılan soketten istek kabul eder."""
+    from werkzeug.serving import make_server
+
+    # Ctrl+C tüm süreç grubuna gider; worker'ları ana süreç SIGTERM ile durdurur
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    import app
+    server = make_server(host, port, app.app, threaded=True, fd=fd)
+    if metrics_port:
+        from metrics import start_metrics_server
+        start_metrics_server(host, metrics_port + index)
+    print(f"Worker {index} hazır (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    finally:
+        app.engine_pool.close()
+        app.session_store.close()
+
+
+def spawn(index, host, port, fd, metrics_port=0):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(index, host, port, fd, metrics_port)
+        except SystemExit:
+            pass
+        except BaseException as e:
+            print(f"Worker {index} hata ile çıktı: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Satranç backend'ini çok süreçli çalıştırır.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker sayısı (0: çekirdek sayısı)")
+    parser.add_argument("--sessions", default=DEFAULT_SESSIONS, help="Oturum deposu (sqlite:/yol)")
+    parser.add_argument("--metrics-port", type=int, default=DEFAULT_METRICS_PORT,
+                        help="Worker N metriklerini bu port + N'de sunar (0: kapalı)")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or read_cpu_limit()
+    if workers > 1 and not args.sessions.startswith("sqlite:"):
+        print("HATA: Birden fazla worker için paylaşılan bir oturum deposu gerekli (sqlite:/yol).")
+        return 1
+
+    # Worker'lar fork'tan sonra app.py'yi yükler; ayarlar ortamdan okunur.
+    os.environ["SESSION_STORE"] = args.sessions
+    os.environ["ENGINE_BUDGET_PROCESSES"] = str(workers)
+
+    preload_shared_state()
+    listener = open_listener(args.host, args.port)
+    fd = listener.fileno()
+    children = {}  # pid -> (worker no, başlama zamanı)
+    for index in range(workers):
+        children[spawn(index, args.host, args.port, fd, args.metrics_port)] = (index, time.monotonic())
+    print(f"{workers} worker dinliyor: http://{args.host}:{args.port} (oturumlar: {args.sessions})")
+
+    stopping = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index, started = children.pop(pid, (None, None))
+        if index is None or stopping:
+            continue
+        print(f"Worker {index} (pid {pid}) durdu, yeniden başlatılıyor.")
+        if time.monotonic() - started < RESTART_BACKOFF:
+            time.sleep(RESTART_BACKOFF)
+        children[spawn(index, args.host, args.port, fd, args.metrics_port)] = (index, time.monotonic())
+
+    listener.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
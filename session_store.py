@@ -0,0 +1,388 @@
+# session_store.py
+# Oyun oturumlarının saklandığı yer. Tek süreçte bellek yeterlidir; serve.py
+# ile birden fazla worker süreci çalışırken oturumlar SQLite dosyasında tutulur
+# ve her worker her oyuna hizmet edebilir.
+#
+# Her kayıt bir sürüm numarası taşır. save(), kaydı okunduğu sürümden
+# değişmemişse yazar (compare-and-swap); arada başka bir istek (aynı veya başka
+# bir süreçte) oyunu değiştirdiyse None döndürür ve çağıran 409 döner.
+#
+# Seçim SESSION_STORE ortam değişkeni ile yapılır:
+#   SESSION_STORE=memory                      (varsayılan)
+#   SESSION_STORE=disk:/var/lib/chess/sessions  (tek süreç, yeniden başlatmada kaybolmaz)
+#   SESSION_STORE=sqlite:/var/lib/chess/sessions.db
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from game_session import GameSession
+
+# --- CONFIGURATION ---
+SESSION_STORE = os.environ.get("SESSION_STORE", "memory")
+# SQLite kilidi için bekleme süresi (saniye)
+SQLITE_BUSY_TIMEOUT = float(os.environ.get("SESSION_STORE_BUSY_TIMEOUT", 5.0))
+# Disk deposu: günlük kayıtları bu aralıkla topluca yazılır (saniye)
+FLUSH_INTERVAL = float(os.environ.get("SESSION_FLUSH_INTERVAL", 0.5))
+# Bu kadar süre dokunulmayan oyunlar bellekten çıkarılıp yalnızca diskte tutulur (saniye)
+HIBERNATE_AFTER = float(os.environ.get("SESSION_HIBERNATE_AFTER", 600))
+# Her toplu yazmada fsync yapılsın mı (güç kesintisine karşı; daha yavaş)
+FSYNC = os.environ.get("SESSION_LOG_FSYNC") == "1"
+# Günlükte fark olarak yazılan liste alanları ve kayıt anahtarlarının önekleri
+LIST_FIELDS = {"moves": "", "history": "history_"}
+
+
+class MemorySessionStore:
+    """Süreç içi oturum deposu; oyunlar sıkıştırılmış GameSession olarak tutulur."""
+
+    def __init__(self):
+        self._records = {}  # game id -> (sürüm, GameSession)
+        self._lock = threading.Lock()
+
+    def _get(self, game_id):
+        # Kilit tutulurken çağrılır
+        return self._records.get(game_id)
+
+    def _written(self, game_id, old, session, version):
+        # Kilit tutulurken, her yazmadan sonra çağrılır (alt sınıflar için)
+        pass
+
+    def load(self, game_id):
+        """(kayıt, sürüm) döndürür; oyun yoksa None."""
+        with self._lock:
+            entry = self._get(game_id)
+        if entry is None:
+            return None
+        version, session = entry
+        return session.to_record(), version
+
+    def create(self, game_id, record):
+        """Oyunu (varsa üzerine yazarak) kaydeder; yeni sürümü döndürür."""
+        session = GameSession.from_record(record)
+        with self._lock:
+            old = self._get(game_id)
+            version = old[0] + 1 if old else 1
+            self._records[game_id] = (version, session)
+            self._written(game_id, None, session, version)
+        return version
+
+    def save(self, game_id, record, version):
+        """Kayıt hâlâ `version` sürümündeyse yazar; yeni sürümü veya çakışmada None döndürür."""
+        session = GameSession.from_record(record)
+        with self._lock:
+            old = self._get(game_id)
+            if old is None or old[0] != version:
+                return None
+            self._records[game_id] = (version + 1, session)
+            self._written(game_id, old[1], session, version + 1)
+        return version + 1
+
+    def count(self):
+        with self._lock:
+            return len(self._records)
+
+    def snapshot(self):
+        return {"backend": "memory", "sessions": self.count()}
+
+    def close(self):
+        pass
+
+
+def _log_entry(old, session, version):
+    """İki GameSession arasındaki farkı günlük kaydına çevirir."""
+    new_record = session.to_record()
+    if old is None or old.start_fen != session.start_fen:
+        return {"v": version, "reset": new_record}
+
+    old_record = old.to_record()
+    entry = {"v": version}
+    # Listeler (hamleler, analiz geçmişi) ortak önekten sonrası olarak yazılır
+    for field, prefix in LIST_FIELDS.items():
+        old_items, new_items = old_record.get(field, []), new_record.get(field, [])
+        common = 0
+        limit = min(len(old_items), len(new_items))
+        while common < limit and old_items[common] == new_items[common]:
+            common += 1
+        if common < len(old_items):
+            entry[prefix + "truncate"] = common
+        if common < len(new_items):
+            entry[prefix + "push"] = new_items[common:]
+
+    changed = {
+        key: value for key, value in new_record.items()
+        if key != "start_fen" and key not in LIST_FIELDS and old_record.get(key) != value
+    }
+    if changed:
+        entry["set"] = changed
+    return entry
+
+
+def replay_log(lines):
+    """Günlük satırlarından (game id, kayıt, sürüm, bozuk satır var mı) üretir.
+
+    Yarım yazılmış son satır (çökme sırasında) yok sayılır.
+    """
+    game_id, record, version, torn = None, None, 0, False
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            torn = True
+            break
+        if "reset" in entry:
+            game_id = entry.get("game_id", game_id)
+            record = entry["reset"]
+        elif record is not None:
+            for field, prefix in LIST_FIELDS.items():
+                items = record.setdefault(field, [])
+                if prefix + "truncate" in entry:
+                    del items[entry[prefix + "truncate"]:]
+                items.extend(entry.get(prefix + "push", ()))
+            record.update(entry.get("set", {}))
+        version = entry["v"]
+    return game_id, record, version, torn
+
+
+class DiskSessionStore(MemorySessionStore):
+    """Oturumları bellekte tutar, değişiklikleri oyun başına günlük dosyalarına yazar.
+
+    Yazma istek thread'inde yapılmaz (write-behind): her değişiklik yalnızca
+    farkı (eklenen/geri alınan hamleler, değişen alanlar) içeren bir kayıt
+    olarak kuyruğa girer, arka plandaki tek yazıcı thread kuyruğu
+    FLUSH_INTERVAL aralıklarla oyun dosyalarına topluca ekler. Uzun süre
+    dokunulmayan oyunlar, tüm kayıtları yazıldıktan sonra bellekten çıkarılır
+    (hibernate) ve dosyaları tek satırlık bir anlık görüntüye sıkıştırılır;
+    ilk erişimde dosyadan yeniden yüklenir. Açılışta dosyalar taranır, yarım
+    kalmış satırlar onarılır.
+    """
+
+    def __init__(self, directory, flush_interval=FLUSH_INTERVAL, hibernate_after=HIBERNATE_AFTER):
+        super().__init__()
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.hibernate_after = hibernate_after
+        self._queue = []  # (game id, kayıt)
+        self._pending = {}  # game id -> yazılmamış kayıt sayısı
+        self._last_access = {}
+        self.stats = {"flushes": 0, "entries": 0, "hibernated": 0, "rehydrated": 0, "recovered": 0, "repaired": 0}
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        self.recover()
+        # Dosyalara yalnızca bu thread yazar
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _path(self, game_id):
+        name = hashlib.blake2b(game_id.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name + ".jsonl")
+
+    def _read(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return replay_log(f)
+        except FileNotFoundError:
+            return None, None, 0, False
+
+    def _get(self, game_id):
+        entry = self._records.get(game_id)
+        if entry is None:
+            _, record, version, _ = self._read(self._path(game_id))
+            if record is None:
+                return None
+            entry = (version, GameSession.from_record(record))
+            self._records[game_id] = entry
+            self.stats["rehydrated"] += 1
+        self._last_access[game_id] = time.monotonic()
+        return entry
+
+    def _written(self, game_id, old, session, version):
+        # Yeni oluşturulan oyun _get'ten geçmez; boşta kalma süresi yazmadan da başlamalı
+        self._last_access[game_id] = time.monotonic()
+        entry = _log_entry(old, session, version)
+        if "reset" in entry:
+            entry["game_id"] = game_id
+        self._queue.append((game_id, entry))
+        self._pending[game_id] = self._pending.get(game_id, 0) + 1
+
+    # --- yazıcı thread ---
+    def flush(self):
+        """Kuyruktaki kayıtları dosyalara ekler; yazılan kayıt sayısını döndürür."""
+        with self._lock:
+            batch, self._queue = self._queue, []
+        if not batch:
+            return 0
+        by_game = {}
+        for game_id, entry in batch:
+            by_game.setdefault(game_id, []).append(entry)
+        for game_id, entries in by_game.items():
+            lines = "".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in entries)
+            with open(self._path(game_id), "a", encoding="utf-8") as f:
+                f.write(lines)
+                if FSYNC:
+                    f.flush()
+                    os.fsync(f.fileno())
+        with self._lock:
+            for game_id, entries in by_game.items():
+                left = self._pending.get(game_id, 0) - len(entries)
+                if left > 0:
+                    self._pending[game_id] = left
+                else:
+                    self._pending.pop(game_id, None)
+            self.stats["flushes"] += 1
+            self.stats["entries"] += len(batch)
+        return len(batch)
+
+    def _compact(self, game_id, version, session):
+        record = session.to_record()
+        line = json.dumps({"v": version, "game_id": game_id, "reset": record}, ensure_ascii=False, separators=(",", ":"))
+        path = self._path(game_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(line + "\n")
+        os.replace(path + ".tmp", path)
+
+    def hibernate_idle(self, now=None):
+        """Boşta kalan ve tüm kayıtları yazılmış oyunları bellekten çıkarır."""
+        now = now or time.monotonic()
+        with self._lock:
+            evicted = []
+            for game_id, accessed in list(self._last_access.items()):
+                if now - accessed < self.hibernate_after or self._pending.get(game_id):
+                    continue
+                version, session = self._records.pop(game_id)
+                del self._last_access[game_id]
+                evicted.append((game_id, version, session))
+            self.stats["hibernated"] += len(evicted)
+        for game_id, version, session in evicted:
+            self._compact(game_id, version, session)
+        return len(evicted)
+
+    def _run(self):
+        last_sweep = time.monotonic()
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.monotonic() - last_sweep >= min(self.hibernate_after, 60):
+                    self.hibernate_idle()
+                    last_sweep = time.monotonic()
+            except Exception as e:
+                print(f"Oturum günlüğü yazılırken hata: {e}")
+
+    def recover(self):
+        """Açılışta günlükleri tarar: yarım satırları onarır, yakın zamanda oynanan oyunları belleğe alır."""
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith(".jsonl"):
+                continue
+            path = os.path.join(self.directory, name)
+            game_id, record, version, torn = self._read(path)
+            if record is None or game_id is None:
+                continue
+            session = GameSession.from_record(record)
+            if torn:
+                self._compact(game_id, version, session)
+                self.stats["repaired"] += 1
+            if now - os.path.getmtime(path) < self.hibernate_after:
+                self._records[game_id] = (version, session)
+                self._last_access[game_id] = time.monotonic()
+            self.stats["recovered"] += 1
+        if self.stats["recovered"]:
+            print(f"Oturumlar kurtarıldı: {self.stats['recovered']} oyun "
+                  f"({len(self._records)} bellekte, {self.stats['repaired']} onarıldı)")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "backend": "disk",
+                "sessions_in_memory": len(self._records),
+                "queued_entries": len(self._queue),
+                **self.stats,
+            }
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+
+class SQLiteSessionStore:
+    """Birden fazla sürecin paylaştığı SQLite oturum deposu (WAL kipinde)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " game_id TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        # sqlite3 bağlantıları thread'ler arasında paylaşılmaz; her thread kendi bağlantısını açar
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, game_id):
+        row = self._connection().execute(
+            "SELECT data, version FROM sessions WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def create(self, game_id, record):
+        data = json.dumps(record, ensure_ascii=False)
+        row = self._connection().execute(
+            "INSERT INTO sessions (game_id, version, data, updated_at) VALUES (?, 1, ?, ?)"
+            " ON CONFLICT(game_id) DO UPDATE SET"
+            " version = version + 1, data = excluded.data, updated_at = excluded.updated_at"
+            " RETURNING version",
+            (game_id, data, time.time())
+        ).fetchone()
+        return row[0]
+
+    def save(self, game_id, record, version):
+        data = json.dumps(record, ensure_ascii=False)
+        cursor = self._connection().execute(
+            "UPDATE sessions SET version = version + 1, data = ?, updated_at = ?"
+            " WHERE game_id = ? AND version = ?",
+            (data, time.time(), game_id, version)
+        )
+        return version + 1 if cursor.rowcount == 1 else None
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def snapshot(self):
+        return {"backend": "sqlite", "path": self.path, "sessions": self.count()}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def create_session_store(spec=None):
+    """'memory', 'disk:/dizin' veya 'sqlite:/yol' tanımından depo oluşturur."""
+    spec = spec or SESSION_STORE
+    if spec == "memory":
+        return MemorySessionStore()
+    if spec.startswith("disk:"):
+        return DiskSessionStore(spec[len("disk:"):])
+    if spec.startswith("sqlite:"):
+        return SQLiteSessionStore(spec[len("sqlite:"):])
+    raise ValueError(f"Bilinmeyen oturum deposu: {spec}")
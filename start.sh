@@ -1,9 +1,14 @@
 #!/bin/bash
 # Stockfish binary için çalıştırma izni ver
-chmod +x ./stockfish_linux/stockfish-ubuntu-x86-64-avx2 || true
+chmod +x ./stockfish_linux/stockfish-* || true
 
 # Python bağımlılıklarını yükle (Replit bazen otomatik yapmıyor)
 pip install -r requirements.txt --quiet
 
-# Flask backend’i başlat
-python3 app.py
+# Açılış kitabı/PGN verilmişse açılış ağacı analizlerini önceden üret (bkz. warm_cache.py)
+if [ -n "$OPENING_BOOK" ]; then
+    python3 warm_cache.py "$OPENING_BOOK" --plies "${OPENING_PLIES:-12}" || true
+fi
+
+# Flask backend’i başlat (çok süreçli üretim modu, bkz. serve.py)
+python3 serve.py
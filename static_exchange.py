@@ -0,0 +1,227 @@
+# static_exchange.py
+# Motor çağırmadan, python-chess bitboard saldırı maskeleri üzerinde çalışan
+# statik takas değerlendirmesi (SEE) ve asılı taş tespiti.
+#
+# analyze_player_move, oyuncunun hamlesi en iyi hamlelerden biri değilse
+# normalde hamleden sonraki pozisyonu ve rakibin tehdidini motorla arar.
+# screen_move() açıkça güvenli hamleleri (kaybettiren takas yok, asılı taş
+# yok, kaçırılan taş kazancı yok, mat tehdidi yok) ayırır; bu hamleler için
+# arama yapılmaz, yalnızca emin olunamayan hamleler derin aramaya gider.
+#
+# SEE yalnızca tek karedeki takası görür: kendi matını, çatalı veya rakibin
+# zaten var olan tehdidini kaçıran hamleyi ayırt edemez. Bu yüzden hızlı yol
+# yalnızca eldeki multipv analizi pozisyonun sakin olduğunu gösteriyorsa
+# kullanılır: en iyi devam mat, taş alma, şah veya terfi değildir ve ilk üç
+# devam arasındaki fark küçüktür. SEE çakılmış (pinned) taşları da hesaba
+# katmaz; bu yüzden eşikler temkinlidir.
+import threading
+
+import chess
+
+from move_classification import MISTAKE_THRESHOLD
+
+# --- CONFIGURATION ---
+PIECE_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 320,
+    chess.BISHOP: 330,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 20000,
+}
+# Rakibin bu kadar (cp) veya fazlasını kazanabildiği taş asılı sayılır
+HANGING_MARGIN = 50
+# Oyuncunun kaçırdığı taş kazancı bu kadar büyükse hamle derin analize gider
+MISSED_GAIN_MARGIN = 90
+# multipv'nin ilk ve son (üçüncü) devamı arasındaki fark bundan küçük olmalı (cp)
+MAX_LINE_SPREAD = -MISTAKE_THRESHOLD
+
+
+def _least_valuable_attacker(board, square, color, occupied):
+    attackers = board.attackers_mask(color, square, occupied) & occupied
+    if not attackers:
+        return None
+    for piece_type in (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING):
+        candidates = attackers & board.pieces_mask(piece_type, color)
+        if candidates:
+            return chess.lsb(candidates), piece_type
+    return None
+
+
+def _exchange(board, square, first_gain, piece_on_square, side, occupied):
+    """`side` sıradayken `square` üzerindeki takas dizisinin ilk hamleyi yapan için değeri."""
+    gains = [first_gain]
+    while True:
+        attacker = _least_valuable_attacker(board, square, side, occupied)
+        if attacker is None:
+            break
+        from_square, piece_type = attacker
+        if piece_type == chess.KING and _least_valuable_attacker(
+                board, square, not side, occupied & ~chess.BB_SQUARES[from_square]) is not None:
+            # Şah korunan bir taşı alamaz
+            break
+        gains.append(PIECE_VALUES[piece_on_square] - gains[-1])
+        occupied &= ~chess.BB_SQUARES[from_square]
+        piece_on_square = piece_type
+        side = not side
+
+    while len(gains) > 1:
+        last = gains.pop()
+        gains[-1] = -max(-gains[-1], last)
+    return gains[0]
+
+
+def see(board, move):
+    """Hamle yapan taraf için hamlenin hedef karesindeki takasın statik değeri (cp)."""
+    occupied = board.occupied & ~chess.BB_SQUARES[move.from_square]
+    moving = board.piece_type_at(move.from_square)
+    if board.is_en_passant(move):
+        captured = chess.PAWN
+        occupied &= ~chess.BB_SQUARES[move.to_square - 8 if board.turn == chess.WHITE else move.to_square + 8]
+    else:
+        captured = board.piece_type_at(move.to_square)
+    gain = PIECE_VALUES[captured] if captured else 0
+    if move.promotion:
+        gain += PIECE_VALUES[move.promotion] - PIECE_VALUES[chess.PAWN]
+        moving = move.promotion
+    return _exchange(board, move.to_square, gain, moving, not board.turn, occupied)
+
+
+def capture_gain(board, square, attacker_color):
+    """`attacker_color` kare üzerindeki taşı en ucuz saldıranla alırsa statik kazancı (cp); alamıyorsa 0."""
+    target = board.piece_type_at(square)
+    if target is None:
+        return 0
+    attacker = _least_valuable_attacker(board, square, attacker_color, board.occupied)
+    if attacker is None:
+        return 0
+    from_square, piece_type = attacker
+    occupied = board.occupied & ~chess.BB_SQUARES[from_square]
+    if piece_type == chess.KING and _least_valuable_attacker(board, square, not attacker_color, occupied) is not None:
+        return 0
+    return max(0, _exchange(board, square, PIECE_VALUES[target], piece_type, not attacker_color, occupied))
+
+
+def hanging_pieces(board, color, margin=HANGING_MARGIN):
+    """`color` tarafının rakip tarafından en az `margin` kazançla alınabilen taşları: [(kare, kazanç)]."""
+    hanging = []
+    for square in chess.scan_forward(board.occupied_co[color] & ~board.kings):
+        gain = capture_gain(board, square, not color)
+        if gain >= margin:
+            hanging.append((square, gain))
+    return hanging
+
+
+def best_capture_gain(board):
+    """Sıradaki tarafın yasal taş almalarından en kazançlısının statik değeri (cp)."""
+    best = 0
+    for move in board.generate_legal_captures():
+        best = max(best, see(board, move))
+    return best
+
+
+def sharp_position(board, analysis_before):
+    """Hamle öncesi multipv analizine göre pozisyon hızlı yol için fazla keskin mi?
+
+    Sebep (str) veya sakin ise None döndürür.
+    """
+    lines = [info for info in analysis_before if info.get("pv") and "score" in info]
+    if len(lines) < 2:
+        return "few_lines"
+    best = lines[0]
+    if best["score"].is_mate():
+        return "forcing_best"
+    best_move = best["pv"][0]
+    if board.is_capture(best_move) or board.gives_check(best_move) or best_move.promotion:
+        return "forcing_best"
+    spread = (best["score"].relative.score(mate_score=10000)
+              - lines[-1]["score"].relative.score(mate_score=10000))
+    if spread >= MAX_LINE_SPREAD:
+        return "wide_spread"
+    return None
+
+
+def screen_move(board, move, analysis_before):
+    """Hamle motorsuz olarak 'açıkça iyi' sayılabilir mi?
+
+    analysis_before: hamle öncesi pozisyonun multipv analizi (en iyi devam önce).
+    (True, None) veya (False, sebep) döndürür. Sebep, derin analize neden
+    gidildiğini istatistiklerde göstermek içindir.
+    """
+    if board.is_check():
+        return False, "in_check"
+    reason = sharp_position(board, analysis_before)
+    if reason:
+        return False, reason
+    color = board.turn
+    move_gain = see(board, move) if board.is_capture(move) or move.promotion else 0
+    if move_gain < 0:
+        return False, "losing_exchange"
+    if best_capture_gain(board) - move_gain >= MISSED_GAIN_MARGIN:
+        return False, "missed_capture"
+
+    after = board.copy(stack=False)
+    after.push(move)
+    if after.is_game_over():
+        return False, "game_over"
+    if hanging_pieces(after, color):
+        return False, "hanging_piece"
+
+    # Rakibin tek hamlede mat veya terfi tehdidi
+    promotion_rank = chess.BB_RANK_2 if color == chess.WHITE else chess.BB_RANK_7
+    if after.pieces_mask(chess.PAWN, not color) & promotion_rank:
+        return False, "promotion_threat"
+    for reply in after.legal_moves:
+        if after.gives_check(reply):
+            after.push(reply)
+            mate = after.is_checkmate()
+            after.pop()
+            if mate:
+                return False, "mate_threat"
+    return True, None
+
+
+class ScreenStats:
+    """Hızlı yolun ne sıklıkla kullanıldığı ve motorla ne sıklıkla aynı fikirde olduğu."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.screened = 0
+        self.fast = 0
+        self.escalated = {}  # sebep -> sayı
+        self.shadow_checked = 0
+        self.shadow_same_bucket = 0
+        self.shadow_accepted = 0  # motor da hamleyi kabul edilebilir buldu (blunder/mistake değil)
+        self.shadow_disagreements = []  # son uyuşmazlıklar: (fen, hamle, motor kalitesi)
+
+    def record_screen(self, fast, reason=None):
+        with self._lock:
+            self.screened += 1
+            if fast:
+                self.fast += 1
+            else:
+                self.escalated[reason] = self.escalated.get(reason, 0) + 1
+
+    def record_shadow(self, fen, move_uci, fast_quality, engine_quality):
+        with self._lock:
+            self.shadow_checked += 1
+            if engine_quality == fast_quality:
+                self.shadow_same_bucket += 1
+            if engine_quality not in ("blunder", "mistake"):
+                self.shadow_accepted += 1
+            else:
+                self.shadow_disagreements = (self.shadow_disagreements + [(fen, move_uci, engine_quality)])[-20:]
+
+    def snapshot(self):
+        with self._lock:
+            checked = self.shadow_checked
+            return {
+                "screened": self.screened,
+                "fast_path": self.fast,
+                "fast_path_rate": round(self.fast / self.screened, 3) if self.screened else None,
+                "escalated": dict(self.escalated),
+                "shadow_checked": checked,
+                "shadow_same_bucket_rate": round(self.shadow_same_bucket / checked, 3) if checked else None,
+                "shadow_accept_agreement": round(self.shadow_accepted / checked, 3) if checked else None,
+                "recent_disagreements": list(self.shadow_disagreements),
+            }
@@ -0,0 +1,87 @@
+# tiered_analysis.py
+# Hamle sınıflandırması için kademeli (önce sığ, gerekirse derin) arama kararları.
+#
+# Sınıflandırma yalnızca skor farkının BLUNDER/MISTAKE/INACCURACY eşiklerine
+# göre hangi aralığa düştüğünü bilmek ister; derinlik 18'deki kesin santipiyon
+# değerine ihtiyaç yoktur. Hamleden sonraki pozisyon önce sığ aranır; sığ
+# aramanın hatası (±TIER_MARGIN) farkı başka bir aralığa taşıyabiliyorsa, skor
+# mat ise veya pozisyon taktikse (şah, asılı taş, kazançlı alma) derin aramaya
+# geçilir.
+import os
+import threading
+
+from static_exchange import HANGING_MARGIN, best_capture_gain, hanging_pieces
+
+# --- CONFIGURATION ---
+TIER_SHALLOW_DEPTH = int(os.environ.get("TIER_SHALLOW_DEPTH", 8))
+# Sığ aramanın farkında beklenen hata (cp). Eşikler arasındaki en küçük aralığın
+# (-90 ile -40: 50) yarısından küçük olmalıdır; büyük olursa eşiklerin çevresindeki
+# bantlar birleşir ve "good" hamlelerin çoğu da derin aramaya gider.
+TIER_MARGIN = int(os.environ.get("TIER_MARGIN", 20))
+
+
+def _bucket(delta, thresholds):
+    # Farkın aşağısında kaldığı eşik sayısı: aynı sayı = aynı sınıf
+    return sum(1 for threshold in thresholds if delta <= threshold)
+
+
+def deepen_reason(board_after, delta, info, thresholds, margin=TIER_MARGIN):
+    """Sığ sonuç yeterli değilse sebebini, yeterliyse None döndürür."""
+    score = info.get("score")
+    if score is None or score.is_mate():
+        return "mate_score"
+    if _bucket(delta - margin, thresholds) != _bucket(delta + margin, thresholds):
+        return "near_threshold"
+    if board_after.is_check():
+        return "check"
+    if best_capture_gain(board_after) >= HANGING_MARGIN or hanging_pieces(board_after, board_after.turn):
+        return "tactical"
+    return None
+
+
+class TierStats:
+    """Kaç hamlenin sığ aramayla sınıflandırıldığı, harcanan düğümler ve derin aramayla uyuşma."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.classified = {"shallow": 0, "deep": 0}
+        self.nodes = {"shallow": 0, "deep": 0}
+        self.deepened = {}  # sebep -> sayı
+        self.shadow_checked = 0
+        self.shadow_same_bucket = 0
+        self.shadow_shallow_nodes = 0
+        self.shadow_deep_nodes = 0
+
+    def record(self, tier, nodes, reason=None):
+        with self._lock:
+            self.classified[tier] += 1
+            self.nodes[tier] += nodes or 0
+            if reason:
+                self.deepened[reason] = self.deepened.get(reason, 0) + 1
+
+    def record_shadow(self, shallow_bucket, deep_bucket, shallow_nodes, deep_nodes):
+        with self._lock:
+            self.shadow_checked += 1
+            if shallow_bucket == deep_bucket:
+                self.shadow_same_bucket += 1
+            self.shadow_shallow_nodes += shallow_nodes or 0
+            self.shadow_deep_nodes += deep_nodes or 0
+
+    def snapshot(self):
+        with self._lock:
+            total = sum(self.classified.values())
+            checked = self.shadow_checked
+            return {
+                "classified": dict(self.classified),
+                "shallow_rate": round(self.classified["shallow"] / total, 3) if total else None,
+                "avg_nodes": {
+                    tier: self.nodes[tier] // count for tier, count in self.classified.items() if count
+                },
+                "deepened": dict(self.deepened),
+                "shadow_checked": checked,
+                "shadow_same_bucket_rate": round(self.shadow_same_bucket / checked, 3) if checked else None,
+                # Örneklenen hamlelerde sığ aramanın derin aramaya göre düğüm oranı
+                "shadow_node_fraction": (
+                    round(self.shadow_shallow_nodes / self.shadow_deep_nodes, 3) if self.shadow_deep_nodes else None
+                ),
+            }
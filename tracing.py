@@ -0,0 +1,126 @@
+# tracing.py
+# İstek başına hafif süre izleme (span) ve Server-Timing başlığı.
+#
+# Bir /make_move 3 saniye sürdüğünde zamanın multipv aramasına mı, sonraki
+# pozisyon aramasına mı, tehdit aramasına mı yoksa AI cevabına mı gittiği
+# görülebilsin diye istek yolundaki motor çağrıları ve tahta işlemleri
+# span(...) ile sarılır. İstek bitince aynı adlı span'ler toplanıp
+# Server-Timing başlığı olarak döner (tarayıcı geliştirici araçları bunu
+# gösterir); TRACE_LOG verilmişse her istek ayrıca bir JSONL kaydı olarak yazılır.
+#
+# Aktif iz contextvars ile tutulur; istek dışında (arka plan thread'leri)
+# span() hiçbir şey yapmaz.
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# --- CONFIGURATION ---
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "1") == "1"
+# Yapılandırılmış iz kayıtlarının yazılacağı JSONL dosyası ("-" = stdout); boşsa yazılmaz
+TRACE_LOG = os.environ.get("TRACE_LOG")
+# Yalnızca bu kadar (ms) veya daha uzun süren istekler kaydedilir
+TRACE_SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", 0))
+
+_current = contextvars.ContextVar("trace", default=None)
+_log_lock = threading.Lock()
+
+
+class Trace:
+    __slots__ = ("started", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []  # (ad, başlangıç ms, süre ms)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def totals(self):
+        """Aynı adlı span'lerin toplamı, ilk görülme sırasıyla: [(ad, süre ms, sayı)]."""
+        totals = {}
+        for name, _, duration in self.spans:
+            total, count = totals.get(name, (0.0, 0))
+            totals[name] = (total + duration, count + 1)
+        return [(name, total, count) for name, (total, count) in totals.items()]
+
+
+def start_trace():
+    if not (SERVER_TIMING or TRACE_LOG):
+        return None
+    trace = Trace()
+    _current.set(trace)
+    return trace
+
+
+def current_trace():
+    return _current.get()
+
+
+def end_trace():
+    trace = _current.get()
+    _current.set(None)
+    return trace
+
+
+@contextmanager
+def span(name):
+    """Aktif istek izine `name` adlı bir süre ekler; iz yoksa maliyetsizdir."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        trace.spans.append((name, (started - trace.started) * 1000, (now - started) * 1000))
+
+
+def record_span(name, started):
+    """perf_counter() ile alınmış `started` anından şimdiye kadar süren bir span ekler.
+
+    Bir context manager'ın içine girmeden ölçülmesi gereken süreler (ör. motor
+    bekleme) için.
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.spans.append((name, (started - trace.started) * 1000, (time.perf_counter() - started) * 1000))
+
+
+def server_timing_header(trace, total_ms):
+    parts = []
+    for name, duration, count in trace.totals():
+        entry = f"{name};dur={duration:.1f}"
+        if count > 1:
+            entry += f';desc="{count}x"'
+        parts.append(entry)
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+def log_trace(trace, total_ms, **fields):
+    """İzi TRACE_LOG'a bir JSON satırı olarak yazar (eşikten kısa istekler atlanır)."""
+    if not TRACE_LOG or total_ms < TRACE_SLOW_MS:
+        return
+    record = {
+        "ts": round(time.time(), 3),
+        **fields,
+        "duration_ms": round(total_ms, 2),
+        "spans": [
+            {"name": name, "start_ms": round(start, 2), "dur_ms": round(duration, 2)}
+            for name, start, duration in trace.spans
+        ],
+    }
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _log_lock:
+        if TRACE_LOG == "-":
+            sys.stdout.write(line)
+            sys.stdout.flush()
+        else:
+            with open(TRACE_LOG, "a", encoding="utf-8") as f:
+                f.write(line)
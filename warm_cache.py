@@ -0,0 +1,152 @@
+# warm_cache.py
+# Açılış ağacındaki pozisyonları önceden analiz eder (deploy sırasında çalışır).
+#
+# Öğretmen trafiğinin çoğu birkaç açılışın ilk 10-15 yarım hamlesindedir ve bu
+# pozisyonların analizi her deploy'dan sonra soğuktur. Bu araç bir PGN
+# dosyasından (oyunların ana hatları) veya polyglot açılış kitabından açılış
+# ağacını çıkarır, her düğümü analyze_player_move ile aynı limit ve multipv=3
+# ile HER zorluk seviyesinde analiz eder ve sonucu ANALYSIS_WARM_PATH'e yazar.
+# Sunucu açılışta bu dosyayı analiz önbelleğine yükler; /ready yükleme bitene
+# kadar 503 döner.
+#
+# Kullanım:
+#   python warm_cache.py acilislar.pgn --plies 12 --min-games 3
+#   python warm_cache.py book.bin --plies 14
+import argparse
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import chess
+import chess.pgn
+import chess.polyglot
+
+from analysis_cache import encode_lines, position_key
+from calibrate import apply_calibration, load_calibration, recommended_pool_size
+from engine_pool import create_engine_pool
+from game_settings import (ANALYSIS_WARM_PATH, BASE_AI_SETTINGS, DIFFICULTY_LEVELS, analysis_limit,
+                           configure_engine_difficulty, stockfish_path)
+
+# --- CONFIGURATION ---
+DEFAULT_PLIES = 12
+PROGRESS_INTERVAL = 30.0  # saniye
+
+
+def opening_tree_from_pgn(path, plies, min_games=1):
+    """PGN'deki oyunların ilk `plies` yarım hamlesinde en az `min_games` kez görülen pozisyonlar."""
+    counts = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while True:
+            game = chess.pgn.read_game(f)
+            if game is None:
+                break
+            board = game.board()
+            seen = set()
+            for ply, move in enumerate(game.mainline_moves()):
+                if ply >= plies:
+                    break
+                key = position_key(board)
+                if key not in seen:
+                    seen.add(key)
+                    fen, count = counts.get(key, (board.fen(), 0))
+                    counts[key] = (fen, count + 1)
+                board.push(move)
+    for fen, count in counts.values():
+        if count >= min_games:
+            yield chess.Board(fen)
+
+
+def opening_tree_from_book(path, plies, min_weight=1):
+    """Polyglot kitabındaki hamlelerle başlangıçtan `plies` yarım hamle derinliğe kadar pozisyonlar."""
+    seen = set()
+    with chess.polyglot.open_reader(path) as reader:
+        stack = [(chess.Board(), 0)]
+        while stack:
+            board, ply = stack.pop()
+            key = position_key(board)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield board
+            if ply >= plies:
+                continue
+            for entry in reader.find_all(board, minimum_weight=min_weight):
+                child = board.copy(stack=False)
+                child.push(entry.move)
+                stack.append((child, ply + 1))
+
+
+def main(argv=None):
+    # app.py import edilmez: sunucunun motor havuzunu, oturum deposunu ve arka plan
+    # işlerini başlatırdı. Ayarlar aynı kaynaktan (game_settings, kalibrasyon) okunur.
+    calibration = load_calibration()
+    ai_settings = copy.deepcopy(BASE_AI_SETTINGS)
+    apply_calibration(ai_settings, calibration)
+
+    parser = argparse.ArgumentParser(description="Açılış ağacını her zorluk seviyesinde önceden analiz eder.")
+    parser.add_argument("source", help="Açılış ağacı kaynağı: PGN dosyası veya polyglot kitabı (.bin)")
+    parser.add_argument("--plies", type=int, default=DEFAULT_PLIES, help="Ağacın derinliği (yarım hamle)")
+    parser.add_argument("--min-games", type=int, default=1,
+                        help="PGN: pozisyonun en az bu kadar oyunda görülmesi gerekir; kitap: en küçük hamle ağırlığı")
+    parser.add_argument("--output", default=ANALYSIS_WARM_PATH, help="Yazılacak JSONL dosyası")
+    parser.add_argument("--workers", type=int, default=max(1, recommended_pool_size(calibration)),
+                        help="Aynı anda kullanılacak motor sayısı")
+    parser.add_argument("--engine", default=None, help="Stockfish binary yolu (varsayılan: sunucunun seçtiği)")
+    args = parser.parse_args(argv)
+
+    pool = create_engine_pool(args.engine or stockfish_path(), args.workers)
+    if not pool.available:
+        print("HATA: Motor bulunamadı.")
+        pool.close()
+        return 1
+
+    if args.source.endswith(".bin"):
+        positions = opening_tree_from_book(args.source, args.plies, args.min_games)
+    else:
+        positions = opening_tree_from_pgn(args.source, args.plies, args.min_games)
+    positions = [board for board in positions if not board.is_game_over()]
+    print(f"{len(positions)} pozisyon x {len(DIFFICULTY_LEVELS)} seviye analiz edilecek ({args.workers} motor)")
+
+    tmp_path = args.output + ".tmp"
+    lock = threading.Lock()
+    done = 0
+    started = last_report = time.monotonic()
+
+    def analyse_position(board):
+        nonlocal done, last_report
+        records = []
+        # Her thread kendi anahtarıyla motor alır
+        with pool.acquire(f"warm-cache-{threading.get_ident()}") as engine:
+            for level_name in DIFFICULTY_LEVELS:
+                settings = ai_settings[level_name]
+                configure_engine_difficulty(engine, settings)
+                infos = engine.analyse(board, analysis_limit(settings), multipv=3)
+                records.append({"fen": board.fen(), "variant": level_name, "lines": encode_lines(infos)})
+        with lock:
+            for record in records:
+                out.write(json.dumps(record) + "\n")
+            done += 1
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                print(f"{done}/{len(positions)} pozisyon ({done / (now - started) * 60:.0f} pozisyon/dakika)")
+                last_report = now
+
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                for _ in executor.map(analyse_position, positions):
+                    pass
+        os.replace(tmp_path, args.output)
+    finally:
+        pool.close()
+
+    print(f"Bitti: {done} pozisyon, {time.monotonic() - started:.1f}s. Kaydedildi: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())